@@ -0,0 +1,115 @@
+"""
+Сравнение пропускной способности хранилищ тарифов (MySQL, SQLite, память)
+на одном наборе операций интерфейса ITariffStorage.
+
+Запуск:
+    python -m benchmarks.backends --backends memory sqlite --rows 100000
+    python -m benchmarks.backends --backends mysql      # нужен доступ к MySQL
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from storage import ITariffStorage
+
+BENCH_DATABASE = 'shipping_company_bench'
+BULK_CHUNK = 1000
+
+
+def make_storage(backend: str) -> ITariffStorage:
+    """Пустое хранилище заданного типа, не затрагивающее рабочие данные.
+
+    Файл SQLite создается во временном каталоге, который удаляется при
+    закрытии хранилища (или при выходе, если его не закрыли).
+    """
+    if backend == 'memory':
+        from memory_database import MemoryDatabase
+        return MemoryDatabase()
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDatabase
+        directory = tempfile.TemporaryDirectory(prefix='tariffs-bench-')
+        db = SQLiteDatabase(os.path.join(directory.name, 'bench.db'))
+        close = db.close
+
+        def close_and_remove():
+            close()
+            directory.cleanup()
+
+        db.close = close_and_remove
+        return db
+    if backend == 'mysql':
+        from database import Database
+        db = Database(database=BENCH_DATABASE)
+        with db.cursor() as cursor:
+            cursor.execute("TRUNCATE TABLE tariffs")
+        return db
+    raise ValueError(f"Неизвестное хранилище '{backend}'")
+
+
+def synthetic_rows(count: int, seed: int = 0) -> List[tuple]:
+    """Синтетический каталог: (название, цена, скидка)"""
+    rng = random.Random(seed)
+    return [(f"tariff-{i:07d}", round(rng.uniform(1, 1000), 2), rng.choice((0, 0, 5, 10, 25)))
+            for i in range(count)]
+
+
+def ops_per_second(func: Callable[[int], object], repeats: int) -> float:
+    started = time.perf_counter()
+    for i in range(repeats):
+        func(i)
+    elapsed = time.perf_counter() - started
+    return repeats / elapsed if elapsed else float('inf')
+
+
+def run_backend(backend: str, rows: int, repeats: int) -> Dict[str, float]:
+    db = make_storage(backend)
+    catalogue = synthetic_rows(rows)
+    names = [name for name, _, _ in catalogue]
+    rng = random.Random(1)
+    results = {}
+
+    started = time.perf_counter()
+    for start in range(0, rows, BULK_CHUNK):
+        db.bulk_add_tariffs(catalogue[start:start + BULK_CHUNK])
+    results['bulk_add rows/s'] = rows / (time.perf_counter() - started)
+
+    results['add_tariff'] = ops_per_second(lambda i: db.add_tariff(f"new-{i}", 10.0), repeats)
+    results['get_tariff_by_name'] = ops_per_second(
+        lambda i: db.get_tariff_by_name(rng.choice(names)), repeats)
+    results['tariff_exists (miss)'] = ops_per_second(lambda i: db.tariff_exists(f"missing-{i}"), repeats)
+    results['set_tariff_discount'] = ops_per_second(
+        lambda i: db.set_tariff_discount(rng.choice(names), rng.choice((0, 5, 10))), repeats)
+    results['get_tariffs_page(100)'] = ops_per_second(
+        lambda i: db.get_tariffs_page(100, None, None, rng.uniform(1, 900)), repeats)
+    results['find_cheapest(10)'] = ops_per_second(lambda i: db.find_cheapest(10), repeats)
+
+    started = time.perf_counter()
+    db.get_all_tariffs()
+    results['get_all_tariffs rows/s'] = (rows + repeats) / (time.perf_counter() - started)
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['memory', 'sqlite'],
+                        choices=['memory', 'sqlite', 'mysql'])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {backend: run_backend(backend, args.rows, args.repeats) for backend in args.backends}
+    operations = list(next(iter(results.values())))
+    print(f"rows: {args.rows}, repeats: {args.repeats} (operations per second)")
+    print(f"{'operation':<26}" + ''.join(f"{backend:>14}" for backend in args.backends))
+    for operation in operations:
+        print(f"{operation:<26}" + ''.join(f"{results[backend][operation]:>14.0f}"
+                                           for backend in args.backends))
+
+
+if __name__ == '__main__':
+    main()
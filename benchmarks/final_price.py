@@ -0,0 +1,66 @@
+"""
+Итоговая цена тарифа: замер кэша BaseTariff.
+
+Замер сравнивает расчет итоговой цены и ее строки для вывода при каждом
+обращении с повторными обращениями к уже посчитанным значениям (как при
+перерисовке таблицы). Совпадение с столбцом final_price хранилищ проверяет
+tests/test_final_price.py.
+
+Запуск:
+    python -m benchmarks.final_price --rows 1000000 --renders 5
+"""
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from tariffs import BaseTariff
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def random_rows(count: int, seed: int = 0) -> List[Tuple[str, float, float]]:
+    rng = random.Random(seed)
+    return [(f"tariff-{i:07d}", rng.randrange(1, 10000000) / 100, rng.randrange(0, 10001) / 100)
+            for i in range(count)]
+
+
+def run_benchmark(rows: int, renders: int) -> None:
+    catalogue = random_rows(rows)
+    print(f"тарифов: {rows}, перерисовок: {renders}")
+
+    def uncached():
+        # Расчет и форматирование заново при каждом обращении, как до кэширования
+        for _ in range(renders):
+            for _, price, discount in catalogue:
+                f"{round(price * (1 - discount / 100), 2):.2f}"
+
+    _, uncached_s = timed(uncached)
+    tariffs = [BaseTariff(*row) for row in catalogue]
+    _, first_s = timed(lambda: [tariff.format_final_price() for tariff in tariffs])
+    _, repeated_s = timed(lambda: [[tariff.format_final_price() for tariff in tariffs]
+                                   for _ in range(renders)])
+    _, price_s = timed(lambda: [[tariff.calculate_final_price() for tariff in tariffs]
+                                for _ in range(renders)])
+    print(f"  без кэша (расчет + форматирование): {uncached_s / renders * 1000:10.1f} ms на перерисовку")
+    print(f"  первый расчет в копейках:           {first_s * 1000:10.1f} ms")
+    print(f"  повторный format_final_price:       {repeated_s / renders * 1000:10.1f} ms на перерисовку"
+          f" (x{uncached_s / repeated_s:.1f})")
+    print(f"  повторный calculate_final_price:    {price_s / renders * 1000:10.1f} ms на перерисовку")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--renders', type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.renders)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Нагрузочный тест HTTP-сервиса тарифов: задержки p50/p99 и запросы в секунду.
+
+По умолчанию сервис запускается в этом же процессе (в отдельном потоке)
+поверх ShippingCompany с хранилищем --backend (по умолчанию - из настроек
+SHIPPING_DB_*). Уже запущенный сервис можно указать через --url.
+
+Запуск:
+    python -m benchmarks.load_test --backend memory --concurrency 32 --duration 10
+    python -m benchmarks.load_test --url http://127.0.0.1:8080
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+# Доли операций в нагрузке
+REQUEST_MIX = (
+    ('get', 0.70),
+    ('cheapest', 0.10),
+    ('list', 0.10),
+    ('discount', 0.07),
+    ('add', 0.03),
+)
+
+
+async def http_request(reader, writer, method: str, path: str,
+                       payload: Optional[dict] = None) -> Tuple[int, bytes]:
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                  ).encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def choose_request(names: List[str], counter: int) -> Tuple[str, str, Optional[dict]]:
+    operation = random.choices([op for op, _ in REQUEST_MIX], [w for _, w in REQUEST_MIX])[0]
+    name = random.choice(names)
+    if operation == 'get':
+        return 'GET', f"/tariffs/{quote(name)}", None
+    if operation == 'cheapest':
+        return 'GET', "/tariffs/cheapest?k=10", None
+    if operation == 'list':
+        return 'GET', "/tariffs?limit=50", None
+    if operation == 'discount':
+        return 'PUT', f"/tariffs/{quote(name)}/discount", {'discount': random.choice((0, 5, 10, 15))}
+    return 'POST', "/tariffs", {'name': f"load-new-{time.time_ns()}-{counter}",
+                                'base_price': round(random.uniform(1, 500), 2)}
+
+
+async def seed(host: str, port: int, count: int) -> List[str]:
+    """Создать тарифы для теста (уже существующие пропускаются)"""
+    names = [f"load-{i}" for i in range(count)]
+    reader, writer = await asyncio.open_connection(host, port)
+    for name in names:
+        await http_request(reader, writer, 'POST', '/tariffs',
+                           {'name': name, 'base_price': round(random.uniform(1, 500), 2)})
+    writer.close()
+    return names
+
+
+async def client(host: str, port: int, names: List[str], deadline: float,
+                 latencies: List[float], statuses: Counter) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    counter = 0
+    try:
+        while time.perf_counter() < deadline:
+            counter += 1
+            method, path, payload = choose_request(names, counter)
+            started = time.perf_counter()
+            status, _ = await http_request(reader, writer, method, path, payload)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, concurrency: int, duration: float, seed_count: int) -> None:
+    names = await seed(host, port, seed_count)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(host, port, names, deadline, latencies, statuses)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"concurrency: {concurrency}, duration: {elapsed:.1f} s, requests: {len(latencies)}")
+    print(f"  throughput: {len(latencies) / elapsed:10.1f} req/s")
+    print(f"  p50:        {percentile(latencies, 0.50) * 1000:10.2f} ms")
+    print(f"  p99:        {percentile(latencies, 0.99) * 1000:10.2f} ms")
+    print(f"  max:        {(latencies[-1] if latencies else 0) * 1000:10.2f} ms")
+    print(f"  statuses:   {dict(sorted(statuses.items()))}")
+
+
+def start_local_service(backend: Optional[str] = None) -> Tuple[str, int]:
+    """Запустить сервис в фоновом потоке со своим циклом событий"""
+    from service import TariffService
+    from shipping_company import ShippingCompany
+    from storage import create_storage
+
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        service = TariffService(ShippingCompany(db=create_storage(backend)))
+        loop.run_until_complete(service.start('127.0.0.1', 0))
+        address['port'] = service.port
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return '127.0.0.1', address['port']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='адрес запущенного сервиса, например http://127.0.0.1:8080')
+    parser.add_argument('--backend', choices=['mysql', 'sqlite', 'memory'],
+                        help='хранилище для сервиса, запускаемого в этом процессе')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--seed-tariffs', type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = start_local_service(args.backend)
+    asyncio.run(run_load(host, port, args.concurrency, args.duration, args.seed_tariffs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Сравнение поиска тарифа по имени: полная выборка таблицы с фильтрацией в Python
+против точечного запроса по уникальному индексу tariffs.name.
+
+Запуск (нужен доступ к MySQL, данные пишутся в отдельную базу):
+    python -m benchmarks.lookup --sizes 1000 100000 1000000
+"""
+import argparse
+import random
+import time
+
+from database import Database
+
+BENCH_DATABASE = 'shipping_company_bench'
+INSERT_BATCH = 10000
+
+
+def fill_tariffs(db: Database, count: int) -> None:
+    """Заполнить таблицу тарифов синтетическими данными"""
+    with db.cursor() as cursor:
+        cursor.execute("TRUNCATE TABLE tariffs")
+    query = "INSERT INTO tariffs (name, base_price) VALUES (%s, %s)"
+    for start in range(0, count, INSERT_BATCH):
+        rows = [(f"tariff-{i}", round(random.uniform(1, 1000), 2))
+                for i in range(start, min(start + INSERT_BATCH, count))]
+        with db.cursor() as cursor:
+            cursor.executemany(query, rows)
+
+
+def measure(func, names) -> float:
+    """Среднее время одного вызова в миллисекундах"""
+    started = time.perf_counter()
+    for name in names:
+        func(name)
+    return (time.perf_counter() - started) * 1000 / len(names)
+
+
+def scan_exists(db: Database, name: str) -> bool:
+    return any(tariff[0] == name for tariff in db.get_all_tariffs())
+
+
+def check_then_insert(db: Database, name: str) -> bool:
+    if scan_exists(db, name):
+        return False
+    return db.add_tariff(name, 100.0)
+
+
+def run(sizes, scan_repeats: int, point_repeats: int) -> None:
+    db = Database(database=BENCH_DATABASE)
+    print(f"{'rows':>10} | {'scan exists':>12} | {'point exists':>12} | "
+          f"{'check+insert':>12} | {'insert only':>12}")
+    for size in sizes:
+        fill_tariffs(db, size)
+        names = [f"tariff-{random.randrange(size)}" for _ in range(point_repeats)]
+        scan_ms = measure(lambda name: scan_exists(db, name), names[:scan_repeats])
+        point_ms = measure(db.tariff_exists, names)
+
+        new_names = [f"new-{size}-{i}" for i in range(point_repeats)]
+        check_insert_ms = measure(lambda name: check_then_insert(db, name),
+                                  [name + "-c" for name in new_names[:scan_repeats]])
+        insert_ms = measure(lambda name: db.add_tariff(name, 100.0), new_names)
+
+        print(f"{size:>10} | {scan_ms:>10.3f}ms | {point_ms:>10.3f}ms | "
+              f"{check_insert_ms:>10.3f}ms | {insert_ms:>10.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--scan-repeats', type=int, default=5)
+    parser.add_argument('--point-repeats', type=int, default=1000)
+    args = parser.parse_args()
+    run(args.sizes, args.scan_repeats, args.point_repeats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Память на один тариф: объекты с __dict__ и собственной стратегией
+(как было устроено BaseTariff раньше), BaseTariff со __slots__ и общими
+стратегиями, колоночная TariffTable.
+
+Запуск (база данных не нужна):
+    python -m benchmarks.memory --rows 1000000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from tariff_table import TariffTable
+from tariffs import BaseTariff
+
+
+class LegacyRegularStrategy:
+    def calculate_price(self, price):
+        return price
+
+
+class LegacyDiscountStrategy:
+    def __init__(self, discount_percent):
+        self.discount_percent = discount_percent
+
+    def calculate_price(self, price):
+        return price * (1 - self.discount_percent / 100)
+
+
+class LegacyTariff:
+    """Тариф с __dict__ и отдельным объектом стратегии на каждый экземпляр"""
+    def __init__(self, name, price, discount_percent=0):
+        self.name = name
+        self.price = price
+        self.discount_percent = discount_percent
+        if discount_percent > 0:
+            self.price_strategy = LegacyDiscountStrategy(discount_percent)
+        else:
+            self.price_strategy = LegacyRegularStrategy()
+
+
+def rows(names):
+    # Цены и скидки создаются внутри замера, как при чтении из БД
+    for i, name in enumerate(names):
+        yield name, float(i % 100000) / 100 + 1, float((i % 4) * 5)
+
+
+def measure(build, names) -> float:
+    """Прирост памяти на один тариф в байтах (названия в замер не входят)"""
+    gc.collect()
+    tracemalloc.start()
+    collection = build(names)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del collection
+    return size / len(names)
+
+
+def run(count: int) -> None:
+    names = [f"tariff-{i}" for i in range(count)]
+    results = {
+        'LegacyTariff list (before)': measure(
+            lambda names: [LegacyTariff(*row) for row in rows(names)], names),
+        'BaseTariff list (__slots__)': measure(
+            lambda names: [BaseTariff(*row) for row in rows(names)], names),
+        'TariffTable (columns)': measure(
+            lambda names: TariffTable.from_rows(rows(names)), names),
+    }
+    print(f"tariffs: {count}")
+    for label, per_tariff in results.items():
+        print(f"  {label:<30} {per_tariff:8.1f} bytes/tariff  ({per_tariff * count / 2 ** 20:8.1f} MiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
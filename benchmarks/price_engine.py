@@ -0,0 +1,56 @@
+"""
+Сравнение поштучного расчета BaseTariff.calculate_final_price
+с пакетным расчетом PricePipeline.
+
+Запуск (база данных не нужна):
+    python -m benchmarks.price_engine --rows 1000000
+"""
+import argparse
+import random
+import time
+
+import price_engine
+from price_engine import PricePipeline, DiscountRule, RoundingRule
+from tariffs import BaseTariff
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def run(rows: int) -> None:
+    random.seed(0)
+    prices = [round(random.uniform(1, 1000), 2) for _ in range(rows)]
+    discounts = [random.choice((0, 0, 5, 10, 25, 50)) for _ in range(rows)]
+    tariffs = [BaseTariff(f"tariff-{i}", price, discount)
+               for i, (price, discount) in enumerate(zip(prices, discounts))]
+
+    per_object, per_object_s = timed(lambda: [tariff.calculate_final_price() for tariff in tariffs])
+    pipeline = PricePipeline([DiscountRule()])
+    columns = (price_engine.to_column(prices), price_engine.to_column(discounts))
+    batch, batch_s = timed(lambda: pipeline.calculate(*columns))
+    rounded, rounded_s = timed(lambda: PricePipeline([DiscountRule(), RoundingRule()]).calculate(*columns))
+
+    # Поштучный расчет округляет до копеек, сравнивается с пакетным расчетом с округлением
+    mismatches = sum(1 for a, b in zip(per_object, rounded) if abs(a - b) > 0.005)
+    backend = 'numpy' if price_engine.np is not None else 'array'
+    print(f"rows: {rows}, batch backend: {backend}")
+    print(f"  per-object calculate_final_price: {per_object_s * 1000:10.1f} ms")
+    print(f"  batch discount:                   {batch_s * 1000:10.1f} ms "
+          f"(x{per_object_s / batch_s:.1f})")
+    print(f"  batch discount + rounding:        {rounded_s * 1000:10.1f} ms")
+    print(f"  mismatches: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Масштабирование пакетного расчета стоимости перевозок по числу процессов.
+
+Генерирует каталог тарифов в памяти и файл перевозок, затем считает его
+с разным числом процессов и выводит пропускную способность и ускорение
+относительно одного процесса.
+
+Запуск:
+    python -m benchmarks.quoting --tariffs 100000 --shipments 2000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.backends import BULK_CHUNK, make_storage, synthetic_rows
+from quoting import quote_files
+from shipping_company import ShippingCompany
+
+
+def write_shipments(path: str, count: int, tariffs: int, seed: int = 0) -> None:
+    """Синтетические перевозки; около 1% строк ссылаются на несуществующий тариф"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('tariff,weight,distance\n')
+        for _ in range(count):
+            number = rng.randrange(tariffs + tariffs // 100 + 1)
+            file.write(f"tariff-{number:07d},{rng.uniform(1, 10000):.1f},{rng.randrange(10, 5000)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tariffs', type=int, default=100000)
+    parser.add_argument('--shipments', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    db = make_storage('memory')
+    catalogue = synthetic_rows(args.tariffs)
+    for start in range(0, len(catalogue), BULK_CHUNK):
+        db.bulk_add_tariffs(catalogue[start:start + BULK_CHUNK])
+    company = ShippingCompany(db=db)
+
+    with tempfile.TemporaryDirectory() as directory:
+        shipments = os.path.join(directory, 'shipments.csv')
+        write_shipments(shipments, args.shipments, args.tariffs)
+        print(f"Ядер: {os.cpu_count()}, перевозок: {args.shipments}, тарифов: {args.tariffs}")
+        baseline = None
+        for workers in args.workers:
+            report = quote_files(company, [shipments], os.path.join(directory, 'quotes.csv'), workers)
+            baseline = baseline or report.rows_per_second
+            print(f"процессов {workers:>3}: {report.elapsed:8.2f} s  {report.rows_per_second:12.0f} строк/с"
+                  f"  ускорение x{report.rows_per_second / baseline:5.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Холодный и теплый запуск: загрузка кэша тарифов из хранилища и из снимка каталога.
+
+Каждый запуск - новый процесс Python, который создает ShippingCompany
+и загружает кэш тарифов. Холодный запуск читает все тарифы из хранилища,
+теплый - отображает снимок каталога в память и догружает только изменения
+после его ревизии. Выводится время загрузки кэша внутри процесса и время
+всего процесса.
+
+Запуск:
+    python -m benchmarks.snapshot --rows 1000000 --changes 0 1000 20000
+    python -m benchmarks.snapshot --backend mysql     # нужен доступ к MySQL
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from benchmarks.backends import BENCH_DATABASE, BULK_CHUNK, make_storage, synthetic_rows
+from shipping_company import ShippingCompany
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOAD_CACHE = """
+import time
+started = time.perf_counter()
+from shipping_company import ShippingCompany
+ShippingCompany().has_tariff('tariff-0000000')
+print(time.perf_counter() - started)
+"""
+
+
+def start_once(env: Dict[str, str]) -> Tuple[float, float]:
+    """Время загрузки кэша внутри процесса и время всего процесса"""
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', LOAD_CACHE], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.split()[-1]), time.perf_counter() - started
+
+
+def measure(name: str, env: Dict[str, str], repeats: int,
+            before: Optional[Callable[[], None]] = None) -> None:
+    timings = []
+    for _ in range(repeats):
+        if before is not None:
+            before()
+        timings.append(start_once(env))
+    load = statistics.median(load for load, _ in timings)
+    total = statistics.median(total for _, total in timings)
+    print(f"{name:<36} загрузка кэша {load * 1000:9.1f} ms   процесс {total * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--changes', type=int, nargs='+', default=[0, 1000],
+                        help='сколько скидок изменить после записи снимка')
+    parser.add_argument('--backend', choices=('sqlite', 'mysql'), default='sqlite')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    db = make_storage(args.backend)
+    catalogue = synthetic_rows(args.rows)
+    for start in range(0, len(catalogue), BULK_CHUNK):
+        db.bulk_add_tariffs(catalogue[start:start + BULK_CHUNK])
+    env = dict(os.environ, SHIPPING_DB_BACKEND=args.backend, SHIPPING_METRICS='0')
+    if args.backend == 'sqlite':
+        env['SHIPPING_DB_PATH'] = db.path
+    else:
+        env['SHIPPING_DB_NAME'] = BENCH_DATABASE
+    env.pop('SHIPPING_SNAPSHOT', None)
+
+    print(f"хранилище: {args.backend}, тарифов: {args.rows}")
+    measure('холодный запуск (без снимка)', env, args.repeats)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tariffs.snapshot')
+        original = path + '.original'
+        rng = random.Random(0)
+        names = [name for name, _, _ in catalogue]
+        for changes in sorted(args.changes):
+            # Снимок записывается заново, чтобы после него было ровно changes изменений
+            ShippingCompany(db=db, snapshot_path=original).save_snapshot()
+            if changes:
+                db.bulk_set_discounts([(rng.choice(names), rng.randrange(0, 51)) for _ in range(changes)])
+            # При SNAPSHOT_STALE_CHANGES изменений процесс перезаписывает снимок,
+            # поэтому перед каждым запуском восстанавливается исходный
+            measure(f"теплый запуск (+{changes} изменений)", dict(env, SHIPPING_SNAPSHOT=path),
+                    args.repeats, lambda: shutil.copyfile(original, path))
+        print(f"размер снимка: {os.path.getsize(original) / 2 ** 20:.1f} MiB")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Замер времени запуска точек входа: импорт модулей и короткие команды CLI.
+
+Каждая команда выполняется в новом процессе Python, поэтому в замер входят
+загрузка интерпретатора, импорты и подключение к хранилищу. Для SQLite
+отдельно замеряется первый запуск (создание схемы) и повторные запуски,
+на которых создание схемы пропускается по сохраненной версии.
+
+Запуск:
+    python -m benchmarks.startup --repeats 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться при запуске CLI
+HEAVY_MODULES = ('PyQt6', 'numpy', 'mysql')
+
+
+def run_once(args: List[str], env: Dict[str, str]) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def measure(name: str, args: List[str], env: Dict[str, str], repeats: int) -> None:
+    timings = [run_once(args, env) for _ in range(repeats)]
+    print(f"{name:<40} median {statistics.median(timings) * 1000:8.1f} ms"
+          f"   min {min(timings) * 1000:8.1f} ms")
+
+
+def loaded_heavy_modules(module: str, env: Dict[str, str]) -> List[str]:
+    code = (f"import sys, {module}; "
+            f"print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return output.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, SHIPPING_DB_BACKEND='sqlite',
+                   SHIPPING_DB_PATH=os.path.join(directory, 'startup.db'))
+        measure('python (пустой запуск)', ['-c', 'pass'], env, args.repeats)
+        measure('import cli', ['-c', 'import cli'], env, args.repeats)
+        measure('import main', ['-c', 'import main'], env, args.repeats)
+
+        cold = []
+        for number in range(args.repeats):
+            cold_env = dict(env, SHIPPING_DB_PATH=os.path.join(directory, f"cold-{number}.db"))
+            cold.append(run_once(['cli.py', 'list', '--limit', '1'], cold_env))
+        print(f"{'cli.py list (sqlite, новая база)':<40} median {statistics.median(cold) * 1000:8.1f} ms"
+              f"   min {min(cold) * 1000:8.1f} ms")
+
+        run_once(['cli.py', 'add', 'startup-tariff', '10'], env)
+        measure('cli.py list (sqlite, схема создана)', ['cli.py', 'list', '--limit', '1'], env, args.repeats)
+        measure('cli.py cheapest (sqlite)', ['cli.py', 'cheapest'], env, args.repeats)
+        measure('cli.py cheapest (memory)', ['cli.py', 'cheapest'],
+                dict(env, SHIPPING_DB_BACKEND='memory'), args.repeats)
+
+        for module in ('cli', 'main'):
+            heavy = loaded_heavy_modules(module, env)
+            print(f"import {module}: тяжелые модули - {', '.join(heavy) if heavy else 'нет'}")
+
+
+if __name__ == '__main__':
+    main()
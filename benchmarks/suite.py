@@ -0,0 +1,193 @@
+"""
+Набор замеров горячих путей ShippingCompany, хранилища и стратегий цены
+на синтетических каталогах. Результаты сохраняются в JSON, чтобы сравнивать
+их между коммитами и замечать регрессии.
+
+Запуск:
+    python -m benchmarks.suite run --sizes 1000 100000 --backend memory -o before.json
+    python -m benchmarks.suite run --sizes 1000 100000 --backend memory -o after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 0.10
+
+Каждый замер повторяется несколькими раундами; число вызовов в раунде
+подбирается так, чтобы раунд длился не меньше --min-time секунд.
+В JSON попадают медиана и минимум времени одного вызова.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.backends import BULK_CHUNK, make_storage, synthetic_rows
+from shipping_company import ShippingCompany
+from tariffs import BaseTariff, DiscountPriceStrategy, RegularPriceStrategy
+
+# Верхняя граница вызовов в раунде, чтобы медленные операции не шли бесконечно
+MAX_CALLS_PER_ROUND = 1 << 20
+
+
+def measure(func: Callable[[], object], rounds: int, min_time: float) -> Dict[str, float]:
+    """Время одного вызова func: медиана и минимум по раундам"""
+    calls = 1
+    while calls < MAX_CALLS_PER_ROUND:
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        if time.perf_counter() - started >= min_time:
+            break
+        calls *= 2
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        timings.append((time.perf_counter() - started) / calls)
+    return {'median_s': statistics.median(timings), 'min_s': min(timings),
+            'calls_per_round': calls, 'rounds': rounds}
+
+
+def build_company(backend: str, size: int) -> ShippingCompany:
+    db = make_storage(backend)
+    catalogue = synthetic_rows(size)
+    for start in range(0, size, BULK_CHUNK):
+        db.bulk_add_tariffs(catalogue[start:start + BULK_CHUNK])
+    # Кэш не сверяется с БД во время замеров, чтобы не смешивать операции
+    return ShippingCompany(cache_ttl=float('inf'), db=db)
+
+
+def company_benchmarks(company: ShippingCompany, size: int) -> Dict[str, Callable[[], object]]:
+    rng = random.Random(42)
+    names = [f"tariff-{i:07d}" for i in rng.sample(range(size), min(size, 1000))]
+    hits = itertools.cycle(names)
+    new_names = (f"bench-new-{i}" for i in itertools.count())
+    discounts = itertools.cycle((0, 5, 10, 25))
+    company.has_tariff(names[0])  # загрузка кэша не входит в замеры
+    company.search_tariffs(names[0])  # как и построение индекса названий
+    typos = itertools.cycle([name[:5] + name[6:] for name in names])
+
+    return {
+        'ShippingCompany.add_tariff': lambda: company.add_tariff(BaseTariff(next(new_names), 10.0)),
+        'ShippingCompany.has_tariff (hit)': lambda: company.has_tariff(next(hits)),
+        'ShippingCompany.has_tariff (miss)': lambda: company.has_tariff('missing-tariff'),
+        'ShippingCompany.get_tariff': lambda: company.get_tariff(next(hits)),
+        'ShippingCompany.set_tariff_discount':
+            lambda: company.set_tariff_discount(next(hits), next(discounts)),
+        'ShippingCompany.search_tariffs (prefix)': lambda: company.search_tariffs(next(hits)[:12]),
+        'ShippingCompany.search_tariffs (typo)': lambda: company.search_tariffs(next(typos)),
+        'ShippingCompany.get_all_tariffs': company.get_all_tariffs,
+        'ShippingCompany.find_min_price_tariff': company.find_min_price_tariff,
+        'ShippingCompany.reload_cache': company.reload_cache,
+        'storage.get_tariff_by_name': lambda: company.db.get_tariff_by_name(next(hits)),
+        'storage.get_all_tariffs': company.db.get_all_tariffs,
+        'storage.get_min_price_tariff': company.db.get_min_price_tariff,
+    }
+
+
+def strategy_benchmarks(size: int) -> Dict[str, Callable[[], object]]:
+    regular = RegularPriceStrategy()
+    discount = DiscountPriceStrategy(15)
+    prices = [float(i % 1000) + 0.5 for i in range(size)]
+    return {
+        'RegularPriceStrategy.calculate_price': lambda: regular.calculate_price(123.45),
+        'DiscountPriceStrategy.calculate_price': lambda: discount.calculate_price(123.45),
+        'DiscountPriceStrategy.calculate_prices (catalogue)': lambda: discount.calculate_prices(prices),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(args) -> int:
+    results: List[dict] = []
+    for size in args.sizes:
+        print(f"--- {size} tariffs ({args.backend}) ---", file=sys.stderr)
+        company = build_company(args.backend, size)
+        benchmarks = {**company_benchmarks(company, size), **strategy_benchmarks(size)}
+        for name, func in benchmarks.items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            timing = measure(func, args.rounds, args.min_time)
+            results.append({'name': name, 'size': size, 'backend': args.backend, **timing})
+            print(f"{name:<52} {timing['median_s'] * 1e6:14.2f} us", file=sys.stderr)
+        company.db.close()
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    return 0
+
+
+def compare(args) -> int:
+    """Сравнить два отчета; код возврата 1, если есть замедление больше порога"""
+    def load(path):
+        with open(path, encoding='utf-8') as file:
+            report = json.load(file)
+        return {(r['name'], r['size'], r['backend']): r for r in report['results']}, report['meta']
+
+    base, base_meta = load(args.base)
+    new, new_meta = load(args.new)
+    print(f"{base_meta['revision']} -> {new_meta['revision']}")
+    regressions = 0
+    for key in sorted(base.keys() & new.keys(), key=lambda key: (key[2], key[1], key[0])):
+        ratio = new[key]['median_s'] / base[key]['median_s']
+        marker = ''
+        if ratio > 1 + args.threshold:
+            marker = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            marker = '  faster'
+        name, size, backend = key
+        print(f"{backend:<7} {size:>8} {name:<52} x{ratio:6.2f}{marker}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='выполнить замеры')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    run_parser.add_argument('--backend', choices=['memory', 'sqlite', 'mysql'], default='memory')
+    run_parser.add_argument('--rounds', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.05,
+                            help='минимальная длительность раунда в секундах')
+    run_parser.add_argument('--only', nargs='+', help='замерять только операции с этими подстроками')
+    run_parser.add_argument('-o', '--output', help='файл для JSON-отчета (по умолчанию stdout)')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='сравнить два JSON-отчета')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='допустимое относительное замедление')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
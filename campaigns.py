@@ -0,0 +1,167 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from shipping_company import ShippingCompany
+from storage import TariffSelector
+from tariffs import TariffException
+
+PENDING = 'pending'
+ACTIVE = 'active'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+
+
+class DiscountCampaign:
+    """Скидочная кампания: скидка для тарифов селектора на заданный срок.
+
+    Время начала и окончания - метки time.time(); без начала кампания
+    запускается сразу, без окончания - действует, пока ее не отменят.
+    При запуске запоминаются прежние скидки, при завершении они
+    возвращаются тем тарифам, скидку которых с тех пор не меняли.
+    """
+    def __init__(self, name: str, selector: TariffSelector, discount_percent: float,
+                 starts_at: Optional[float] = None, ends_at: Optional[float] = None):
+        if not 0 <= discount_percent <= 100:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+        if starts_at is not None and ends_at is not None and ends_at <= starts_at:
+            raise TariffException("Кампания должна заканчиваться позже, чем начинается")
+        self.name = name
+        self.selector = selector
+        self.discount_percent = discount_percent
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+        self.state = PENDING
+        self.previous_discounts: List[Tuple[str, float]] = []
+
+    def apply(self, company: ShippingCompany) -> int:
+        """Запустить кампанию; возвращает число тарифов, получивших скидку"""
+        if self.state != PENDING:
+            raise TariffException(f"Кампания '{self.name}' уже запущена")
+        self.previous_discounts = company.set_discount_where(self.selector, self.discount_percent)
+        self.state = ACTIVE
+        return len(self.previous_discounts)
+
+    def revert(self, company: ShippingCompany, state: str = FINISHED) -> int:
+        """Вернуть прежние скидки; возвращает число восстановленных тарифов"""
+        if self.state != ACTIVE:
+            raise TariffException(f"Кампания '{self.name}' не активна")
+        # Скидку, установленную вручную во время кампании, не трогаем
+        rows = [(name, discount) for name, discount in self.previous_discounts
+                if company.has_tariff(name)
+                and round(company.get_tariff(name).get_discount(), 2) == round(self.discount_percent, 2)]
+        result = company.bulk_set_discounts(rows)
+        if result.failed:
+            raise TariffException(f"Не удалось вернуть скидки кампании '{self.name}'")
+        self.state = state
+        self.previous_discounts = []
+        return result.succeeded
+
+
+class CampaignScheduler:
+    """Запуск и завершение кампаний по расписанию.
+
+    События хранятся в куче по времени, фоновый поток спит до ближайшего
+    события, а не опрашивает кампании. run_pending можно вызывать и вручную.
+
+    Кампании могут пересекаться по тарифам: для каждого тарифа хранится
+    стопка активных кампаний с прежней скидкой под каждой. Закончившаяся
+    кампания, поверх которой действует другая, скидку не меняет, а свою
+    прежнюю скидку передает кампании выше - та вернет ее при завершении.
+    """
+    def __init__(self, company: ShippingCompany):
+        self.company = company
+        # Тариф -> [кампания, скидка до нее] в порядке запуска
+        self._layers: Dict[str, List[list]] = {}
+        self._events: List[Tuple[float, int, str, DiscountCampaign]] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def schedule(self, campaign: DiscountCampaign) -> None:
+        with self._condition:
+            starts_at = campaign.starts_at if campaign.starts_at is not None else time.time()
+            heapq.heappush(self._events, (starts_at, next(self._order), 'start', campaign))
+            if campaign.ends_at is not None:
+                heapq.heappush(self._events, (campaign.ends_at, next(self._order), 'end', campaign))
+            self._condition.notify()
+
+    def _start(self, campaign: DiscountCampaign) -> int:
+        count = campaign.apply(self.company)
+        for name, previous in campaign.previous_discounts:
+            self._layers.setdefault(name, []).append([campaign, previous])
+        return count
+
+    def _finish(self, campaign: DiscountCampaign, state: str = FINISHED) -> int:
+        """Завершить кампанию с учетом кампаний, запущенных поверх нее"""
+        restore = []
+        for name, _ in campaign.previous_discounts:
+            layers = self._layers.get(name, [])
+            position = next((i for i, (owner, _) in enumerate(layers) if owner is campaign), None)
+            if position is None:
+                continue
+            _, previous = layers.pop(position)
+            if position < len(layers):
+                layers[position][1] = previous
+            else:
+                restore.append((name, previous))
+            if not layers:
+                del self._layers[name]
+        campaign.previous_discounts = restore
+        return campaign.revert(self.company, state)
+
+    def cancel(self, campaign: DiscountCampaign) -> None:
+        """Отменить кампанию; активная кампания сразу возвращает прежние скидки"""
+        with self._condition:
+            if campaign.state == ACTIVE:
+                self._finish(campaign, CANCELLED)
+            elif campaign.state == PENDING:
+                campaign.state = CANCELLED
+
+    def next_event_at(self) -> Optional[float]:
+        with self._condition:
+            return self._events[0][0] if self._events else None
+
+    def run_pending(self, now: Optional[float] = None) -> List[Tuple[DiscountCampaign, str, int]]:
+        """Выполнить наступившие события: (кампания, 'start' или 'end', число тарифов)"""
+        now = time.time() if now is None else now
+        done = []
+        with self._condition:
+            while self._events and self._events[0][0] <= now:
+                _, _, action, campaign = heapq.heappop(self._events)
+                if action == 'start' and campaign.state == PENDING:
+                    done.append((campaign, action, self._start(campaign)))
+                elif action == 'end' and campaign.state == ACTIVE:
+                    done.append((campaign, action, self._finish(campaign)))
+        return done
+
+    def _run(self) -> None:
+        with self._condition:
+            while not self._stopped:
+                next_at = self.next_event_at()
+                timeout = None if next_at is None else max(0.0, next_at - time.time())
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                try:
+                    self.run_pending()
+                except TariffException as e:
+                    print(f"Ошибка кампании: {e}")
+
+    def start(self) -> None:
+        """Выполнять события в фоновом потоке"""
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='campaign-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
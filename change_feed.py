@@ -0,0 +1,243 @@
+"""
+Уведомления об изменениях тарифов.
+
+Каждое добавление тарифа и изменение цены или скидки увеличивает ревизию
+(ShippingCompany.get_revision), а ShippingCompany.changes_since(revision)
+возвращает только измененные тарифы. Клиенту нужно узнать, что ревизия
+выросла, двумя способами:
+
+- ChangePoller - сам периодически запрашивает changes_since;
+- ChangeBroadcaster - один процесс опрашивает хранилище и рассылает новую
+  ревизию через локальный сокет, а ChangeSubscriber получает ее и только
+  тогда запрашивает изменения. Хранилище опрашивает один процесс, а не
+  каждый клиент.
+
+Адрес сокета - путь к Unix-сокету или host:port для TCP (на Windows).
+"""
+import os
+import socket
+import threading
+from typing import Callable, List, Optional, Tuple, Union
+
+from config import get_change_feed_address
+from shipping_company import ShippingCompany
+from tariffs import BaseTariff, TariffException
+
+# Как часто (в секундах) опрашивать хранилище
+POLL_INTERVAL = 2.0
+BROADCAST_INTERVAL = 0.2
+# Пауза перед повторным подключением подписчика
+RECONNECT_DELAY = 1.0
+
+ChangesCallback = Callable[[List[BaseTariff], int], None]
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """Семейство сокета и адрес: 'host:port' - TCP, иначе путь к Unix-сокету"""
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit() and os.sep not in address:
+        return socket.AF_INET, (host or 'localhost', int(port))
+    return socket.AF_UNIX, address
+
+
+class ChangePoller:
+    """Периодический опрос changes_since в фоновом потоке.
+
+    callback(tariffs, revision) вызывается из фонового потока и только
+    при наличии изменений.
+    """
+    def __init__(self, company: ShippingCompany, callback: ChangesCallback,
+                 interval: float = POLL_INTERVAL, revision: Optional[int] = None):
+        self.company = company
+        self.callback = callback
+        self.interval = interval
+        self.revision = revision
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> List[BaseTariff]:
+        """Запросить изменения сейчас и передать их в callback"""
+        if self.revision is None:
+            self.revision = self.company.get_revision()
+            return []
+        tariffs, self.revision = self.company.changes_since(self.revision)
+        if tariffs:
+            self.callback(tariffs, self.revision)
+        return tariffs
+
+    def wake(self) -> None:
+        """Опросить хранилище, не дожидаясь интервала"""
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            try:
+                self.poll()
+            except TariffException as e:
+                print(f"Ошибка чтения изменений: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='change-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class ChangeBroadcaster:
+    """Рассылка ревизии тарифов подписчикам через локальный сокет.
+
+    Подписчик сразу после подключения получает текущую ревизию, затем -
+    ревизию после каждого изменения. Сообщение - номер ревизии в отдельной
+    строке; изменение, зафиксированное позже изменения с большим номером,
+    рассылается повторно той же ревизией.
+    """
+    def __init__(self, company: ShippingCompany, address: Optional[str] = None,
+                 interval: float = BROADCAST_INTERVAL):
+        self.company = company
+        self.address = address or get_change_feed_address()
+        if not self.address:
+            raise TariffException("Не задан адрес рассылки изменений (SHIPPING_CHANGE_FEED)")
+        self.interval = interval
+        self.revision: Optional[int] = None
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server: Optional[socket.socket] = None
+        self._threads: List[threading.Thread] = []
+
+    def _send(self, client: socket.socket, revision: int) -> bool:
+        try:
+            client.sendall(f"{revision}\n".encode())
+            return True
+        except OSError:
+            client.close()
+            return False
+
+    def publish(self, revision: int) -> None:
+        """Разослать ревизию; отключившиеся подписчики удаляются"""
+        with self._lock:
+            self.revision = revision
+            self._clients = [client for client in self._clients if self._send(client, revision)]
+
+    def _accept(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                if self.revision is None or self._send(client, self.revision):
+                    self._clients.append(client)
+
+    def _watch(self) -> None:
+        # Изменения читаются через changes_since, а не по номеру последнего:
+        # так видны и строки, появившиеся на месте пропущенных номеров
+        revision = self.revision
+        while not self._stopped.wait(self.interval):
+            try:
+                tariffs, revision = self.company.changes_since(revision)
+            except TariffException:
+                continue
+            if tariffs:
+                self.publish(revision)
+
+    def start(self) -> None:
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.unlink(address)  # сокет, оставшийся от прошлого запуска
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen()
+        self.revision = self.company.get_revision()
+        self._stopped.clear()
+        self._threads = [threading.Thread(target=target, name=name, daemon=True)
+                         for target, name in ((self._accept, 'change-feed-accept'),
+                                              (self._watch, 'change-feed-watch'))]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients = []
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.unlink(address)
+
+
+class ChangeSubscriber:
+    """Получение ревизий от ChangeBroadcaster в фоновом потоке.
+
+    callback(revision) вызывается на каждую полученную ревизию; при
+    обрыве соединения подписчик переподключается.
+    """
+    def __init__(self, callback: Callable[[int], None], address: Optional[str] = None):
+        self.callback = callback
+        self.address = address or get_change_feed_address()
+        if not self.address:
+            raise TariffException("Не задан адрес рассылки изменений (SHIPPING_CHANGE_FEED)")
+        self._stopped = threading.Event()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _listen(self) -> None:
+        family, address = parse_address(self.address)
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(address)
+            self._socket = connection
+            with connection.makefile('r', encoding='ascii') as lines:
+                for line in lines:
+                    if self._stopped.is_set():
+                        return
+                    self.callback(int(line))
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except (OSError, ValueError):
+                pass
+            self._socket = None
+            self._stopped.wait(RECONNECT_DELAY)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='change-subscriber', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        connection = self._socket
+        if connection is not None:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,247 @@
+import argparse
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+import metrics
+from config import get_change_feed_address
+from shipping_company import BaseTariff, BulkResult, ShippingCompany, TariffException
+from tariff_io import DISCOUNT_FIELDS, FORMATS, TARIFF_FIELDS, read_rows, write_tariffs
+
+# Сколько ошибок по строкам выводить в отчете
+MAX_REPORTED_ERRORS = 20
+# Сколько похожих названий предлагать, если тариф не найден
+SUGGESTIONS_LIMIT = 5
+
+
+def print_report(result: BulkResult) -> int:
+    print(f"Успешно: {result.succeeded}, с ошибками: {result.failed}")
+    for row_number, message in result.errors[:MAX_REPORTED_ERRORS]:
+        print(f"  строка {row_number}: {message}", file=sys.stderr)
+    if result.failed > MAX_REPORTED_ERRORS:
+        print(f"  ... и еще {result.failed - MAX_REPORTED_ERRORS}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+def format_tariff(tariff: BaseTariff) -> str:
+    return (f"{tariff.get_name()}\t{tariff.get_price():.2f}\t{tariff.get_discount():g}%\t"
+            f"{tariff.format_final_price()}")
+
+
+def list_tariffs(company: ShippingCompany, args) -> int:
+    tariffs = company.iter_tariffs(name_prefix=args.prefix, min_price=args.min_price,
+                                   max_price=args.max_price)
+    for tariff in islice(tariffs, args.limit):
+        print(format_tariff(tariff))
+    return 0
+
+
+def add_tariff(company: ShippingCompany, args) -> int:
+    company.add_tariff(BaseTariff(args.name, args.price))
+    print("Тариф успешно добавлен!")
+    return 0
+
+
+def suggest_names(company: ShippingCompany, name: str) -> None:
+    """Вывести похожие названия, если тарифа с таким названием нет"""
+    if company.has_tariff(name):
+        return
+    names = company.search_tariffs(name, SUGGESTIONS_LIMIT)
+    if names:
+        print(f"Возможно, имелось в виду: {', '.join(names)}", file=sys.stderr)
+
+
+def set_discount(company: ShippingCompany, args) -> int:
+    try:
+        company.set_tariff_discount(args.name, args.discount)
+    except TariffException:
+        suggest_names(company, args.name)
+        raise
+    print("Скидка успешно установлена!")
+    return 0
+
+
+def search_names(company: ShippingCompany, args) -> int:
+    for name in company.search_tariffs(args.query, args.limit, fuzzy=not args.exact):
+        print(name)
+    return 0
+
+
+def show_cheapest(company: ShippingCompany, args) -> int:
+    for tariff in company.find_cheapest(args.k):
+        print(format_tariff(tariff))
+    return 0
+
+
+@contextmanager
+def file_errors(path: str):
+    """Неизвестный формат и ошибки чтения или записи файла - как TariffException"""
+    try:
+        yield
+    except (ValueError, OSError) as e:
+        raise TariffException(f"Файл '{path}': {e}") from e
+
+
+def import_tariffs(company: ShippingCompany, args) -> int:
+    # read_rows читает файл по мере импорта, поэтому ошибки файла возникают внутри bulk_add_tariffs
+    with file_errors(args.path):
+        rows = read_rows(args.path, TARIFF_FIELDS, args.format)
+        result = company.bulk_add_tariffs(rows, args.chunk_size)
+    return print_report(result)
+
+
+def import_discounts(company: ShippingCompany, args) -> int:
+    with file_errors(args.path):
+        rows = read_rows(args.path, DISCOUNT_FIELDS, args.format)
+        result = company.bulk_set_discounts(rows, args.chunk_size)
+    return print_report(result)
+
+
+def export_tariffs(company: ShippingCompany, args) -> int:
+    with file_errors(args.path):
+        count = write_tariffs(args.path, company.iter_tariffs(), args.format)
+    print(f"Выгружено тарифов: {count}")
+    return 0
+
+
+def quote_shipments(company: ShippingCompany, args) -> int:
+    # Пул процессов нужен только этой команде, поэтому модуль импортируется здесь
+    from quoting import quote_files
+    report = quote_files(company, args.paths, args.output, args.workers)
+    print(f"Рассчитано: {report.quoted}, с ошибками: {report.failed}, "
+          f"{report.rows_per_second:.0f} строк/с")
+    return 1 if report.failed else 0
+
+
+def wait_for_interrupt() -> None:
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+def watch_changes(company: ShippingCompany, args) -> int:
+    from change_feed import ChangePoller, ChangeSubscriber
+
+    def print_changes(tariffs, revision):
+        for tariff in tariffs:
+            print(f"{revision}\t{format_tariff(tariff)}", flush=True)
+
+    poller = ChangePoller(company, print_changes, args.interval, company.get_revision())
+    # При заданной рассылке изменения запрашиваются сразу по уведомлению
+    subscriber = ChangeSubscriber(lambda revision: poller.wake()) if get_change_feed_address() else None
+    poller.start()
+    if subscriber is not None:
+        subscriber.start()
+    wait_for_interrupt()
+    if subscriber is not None:
+        subscriber.stop()
+    poller.stop()
+    return 0
+
+
+def serve_changes(company: ShippingCompany, args) -> int:
+    from change_feed import ChangeBroadcaster
+    broadcaster = ChangeBroadcaster(company, args.address)
+    broadcaster.start()
+    print(f"Рассылка изменений: {broadcaster.address}", flush=True)
+    wait_for_interrupt()
+    broadcaster.stop()
+    return 0
+
+
+def save_snapshot(company: ShippingCompany, args) -> int:
+    revision = company.save_snapshot(args.path)
+    print(f"Снимок каталога записан: {args.path or company.snapshot_path} (ревизия {revision})")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Управление тарифами грузоперевозок')
+    parser.add_argument('--profile', metavar='PATH',
+                        help="профилировать команду через cProfile и сохранить статистику ('-' - в stderr)")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='сохранить метрики по завершении (.json или формат Prometheus)')
+    parser.add_argument('--slow-query-ms', type=float,
+                        help='выводить в stderr вызовы хранилища дольше заданного времени')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_command = commands.add_parser('list', help='тарифы по возрастанию цены')
+    list_command.add_argument('--prefix', help='только тарифы, название которых начинается так')
+    list_command.add_argument('--min-price', type=float)
+    list_command.add_argument('--max-price', type=float)
+    list_command.add_argument('--limit', type=int, help='вывести не больше заданного числа тарифов')
+    list_command.set_defaults(handler=list_tariffs)
+
+    add_command = commands.add_parser('add', help='добавить тариф')
+    add_command.add_argument('name')
+    add_command.add_argument('price', type=float)
+    add_command.set_defaults(handler=add_tariff)
+
+    discount_command = commands.add_parser('discount', help='установить скидку тарифа')
+    discount_command.add_argument('name')
+    discount_command.add_argument('discount', type=float, help='процент скидки (0-100)')
+    discount_command.set_defaults(handler=set_discount)
+
+    search_command = commands.add_parser('search', help='поиск названий тарифов (префикс, подстрока, опечатки)')
+    search_command.add_argument('query')
+    search_command.add_argument('--limit', type=int, default=ShippingCompany.SEARCH_LIMIT)
+    search_command.add_argument('--exact', action='store_true', help='без поиска с опечатками')
+    search_command.set_defaults(handler=search_names)
+
+    cheapest_command = commands.add_parser('cheapest', help='самые дешевые тарифы')
+    cheapest_command.add_argument('-k', type=int, default=1, help='сколько тарифов вывести')
+    cheapest_command.set_defaults(handler=show_cheapest)
+
+    quote_command = commands.add_parser('quote', help='стоимость перевозок из CSV (tariff, weight, distance)')
+    quote_command.add_argument('paths', nargs='+', help='файлы перевозок .csv')
+    quote_command.add_argument('-o', '--output', required=True, help='файл для результата .csv')
+    quote_command.add_argument('--workers', type=int, help='число процессов (по умолчанию - число ядер)')
+    quote_command.set_defaults(handler=quote_shipments)
+
+    watch_command = commands.add_parser('watch', help='выводить изменения тарифов по мере появления')
+    watch_command.add_argument('--interval', type=float, default=2.0, help='интервал опроса, с')
+    watch_command.set_defaults(handler=watch_changes)
+
+    serve_command = commands.add_parser('serve-changes', help='рассылать ревизию тарифов через локальный сокет')
+    serve_command.add_argument('--address', help='путь к Unix-сокету или host:port (по умолчанию SHIPPING_CHANGE_FEED)')
+    serve_command.set_defaults(handler=serve_changes)
+
+    snapshot_command = commands.add_parser('snapshot', help='записать снимок каталога для быстрого запуска')
+    snapshot_command.add_argument('--path', help='файл снимка (по умолчанию SHIPPING_SNAPSHOT)')
+    snapshot_command.set_defaults(handler=save_snapshot)
+
+    def add_file_command(name, handler, help_text, chunked=True):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('path', help='путь к файлу .csv или .jsonl')
+        command.add_argument('--format', choices=FORMATS, help='формат файла, если не ясен из расширения')
+        if chunked:
+            command.add_argument('--chunk-size', type=int, default=ShippingCompany.BULK_CHUNK_SIZE,
+                                 help='число строк в одной транзакции')
+        command.set_defaults(handler=handler)
+
+    add_file_command('import', import_tariffs, 'импорт тарифов (name, base_price, discount)')
+    add_file_command('import-discounts', import_discounts, 'импорт скидок (name, discount)')
+    add_file_command('export', export_tariffs, 'экспорт всех тарифов', chunked=False)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.slow_query_ms is not None:
+        import logging
+        logging.basicConfig(format='%(name)s: %(message)s')
+        metrics.set_slow_query_threshold(args.slow_query_ms / 1000)
+    with metrics.session(args.profile, args.metrics):
+        company = ShippingCompany()
+        try:
+            return args.handler(company, args)
+        except TariffException as e:
+            print(f"Ошибка: {e}", file=sys.stderr)
+            return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
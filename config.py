@@ -0,0 +1,75 @@
+import os
+from typing import Optional
+
+# Значения по умолчанию соответствуют локальной установке MySQL
+DEFAULT_DB_HOST = 'localhost'
+DEFAULT_DB_PORT = 3306
+DEFAULT_DB_USER = 'root'
+DEFAULT_DB_PASSWORD = '5930'
+DEFAULT_DB_NAME = 'shipping_company'
+DEFAULT_POOL_SIZE = 5
+
+
+def get_db_config() -> dict:
+    """Параметры подключения к MySQL из переменных окружения SHIPPING_DB_*"""
+    return {
+        'host': os.environ.get('SHIPPING_DB_HOST', DEFAULT_DB_HOST),
+        'port': int(os.environ.get('SHIPPING_DB_PORT', DEFAULT_DB_PORT)),
+        'user': os.environ.get('SHIPPING_DB_USER', DEFAULT_DB_USER),
+        'password': os.environ.get('SHIPPING_DB_PASSWORD', DEFAULT_DB_PASSWORD),
+        'database': os.environ.get('SHIPPING_DB_NAME', DEFAULT_DB_NAME),
+    }
+
+
+def get_pool_size() -> int:
+    """Размер пула соединений (SHIPPING_DB_POOL_SIZE)"""
+    return int(os.environ.get('SHIPPING_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+
+BACKENDS = ('mysql', 'sqlite', 'memory')
+DEFAULT_BACKEND = 'mysql'
+DEFAULT_SQLITE_PATH = 'shipping_company.db'
+
+
+def get_backend() -> str:
+    """Тип хранилища тарифов (SHIPPING_DB_BACKEND): mysql, sqlite или memory"""
+    backend = os.environ.get('SHIPPING_DB_BACKEND', DEFAULT_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестное хранилище '{backend}', ожидается одно из: {', '.join(BACKENDS)}")
+    return backend
+
+
+def get_sqlite_path() -> str:
+    """Путь к файлу базы SQLite (SHIPPING_DB_PATH)"""
+    return os.environ.get('SHIPPING_DB_PATH', DEFAULT_SQLITE_PATH)
+
+
+def metrics_enabled() -> bool:
+    """Собирать ли метрики вызовов хранилища (SHIPPING_METRICS, по умолчанию 1)"""
+    return os.environ.get('SHIPPING_METRICS', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+def get_slow_query_threshold() -> Optional[float]:
+    """Порог журнала медленных запросов в секундах (SHIPPING_SLOW_QUERY_MS), None - выключен"""
+    value = os.environ.get('SHIPPING_SLOW_QUERY_MS')
+    return float(value) / 1000 if value else None
+
+
+def get_profile_path() -> Optional[str]:
+    """Файл статистики cProfile для сеанса CLI или GUI (SHIPPING_PROFILE), '-' - вывод в stderr"""
+    return os.environ.get('SHIPPING_PROFILE') or None
+
+
+def get_metrics_dump_path() -> Optional[str]:
+    """Файл, в который выгружаются метрики по завершении (SHIPPING_METRICS_DUMP)"""
+    return os.environ.get('SHIPPING_METRICS_DUMP') or None
+
+
+def get_snapshot_path() -> Optional[str]:
+    """Файл снимка каталога тарифов для быстрого запуска (SHIPPING_SNAPSHOT), None - без снимка"""
+    return os.environ.get('SHIPPING_SNAPSHOT') or None
+
+
+def get_change_feed_address() -> Optional[str]:
+    """Адрес рассылки изменений тарифов (SHIPPING_CHANGE_FEED): путь к Unix-сокету или host:port"""
+    return os.environ.get('SHIPPING_CHANGE_FEED') or None
@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class PoolError(Exception):
+    """Пул не смог выдать соединение"""
+    pass
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений фиксированного размера.
+
+    Соединение выдается на время одной операции. Перед выдачей соединение,
+    простаивавшее дольше ping_interval секунд или вернувшееся в пул после
+    ошибки, проверяется функцией ping: она должна переподключиться
+    или выбросить исключение. Пул не зависит от драйвера, поэтому
+    работает и с MySQL, и с sqlite3.
+    """
+    def __init__(self, connect: Callable[[], Any], size: int = 5,
+                 ping: Optional[Callable[[Any], None]] = None,
+                 ping_interval: float = 30.0, timeout: float = 30.0):
+        if size < 1:
+            raise ValueError("Размер пула должен быть не меньше 1")
+        self._connect = connect
+        self._ping = ping
+        self.size = size
+        self.ping_interval = ping_interval
+        self.timeout = timeout
+        # Элементы очереди: (соединение, время последней успешной операции)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> Any:
+        try:
+            return self._connect()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def acquire(self) -> Any:
+        """Получить соединение, при необходимости дождавшись свободного"""
+        if self._closed:
+            raise PoolError("Пул соединений закрыт")
+        try:
+            connection, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                return self._open()
+            try:
+                connection, last_used = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolError(f"Нет свободных соединений за {self.timeout} с")
+
+        if self._ping is not None and time.monotonic() - last_used >= self.ping_interval:
+            try:
+                self._ping(connection)
+            except Exception:
+                self._close_connection(connection)
+                return self._open()
+        return connection
+
+    def release(self, connection: Any, healthy: bool = True) -> None:
+        """Вернуть соединение в пул; после ошибки оно будет проверено при выдаче"""
+        if self._closed:
+            self._discard(connection)
+            return
+        self._idle.put((connection, time.monotonic() if healthy else 0.0))
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, healthy=False)
+            raise
+        else:
+            self.release(connection)
+
+    def _discard(self, connection: Any) -> None:
+        with self._lock:
+            self._created -= 1
+        self._close_connection(connection)
+
+    @staticmethod
+    def _close_connection(connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Закрыть все свободные соединения; занятые закроются при возврате"""
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
@@ -1,37 +1,184 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import ClientFlag, Error, errorcode
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Optional, List, Tuple
 import os
 
-class Database:
-    def __init__(self):
-        self.connection = None
-        self.create_database()
+from config import get_db_config, get_pool_size
+from connection_pool import ConnectionPool, PoolError
+from metrics import record_error
+from storage import ITariffStorage, TariffSelector
+
+# Ошибки, после которых методы Database возвращают пустой результат
+DB_ERRORS = (Error, PoolError)
+
+# Изменения схемы для таблиц, созданных предыдущими версиями программы.
+# Повторное применение безопасно: ошибки "уже существует" игнорируются.
+SCHEMA_MIGRATIONS = [
+    """
+    ALTER TABLE tariffs ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+        DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+    """,
+    "CREATE INDEX idx_tariffs_updated_at ON tariffs (updated_at)",
+    "CREATE INDEX idx_tariffs_price ON tariffs (base_price, id)",
+    """
+    ALTER TABLE tariffs ADD COLUMN final_price DECIMAL(10, 2)
+        AS (ROUND(base_price * (1 - COALESCE(discount, 0) / 100), 2)) STORED
+    """,
+    "CREATE INDEX idx_tariffs_final_price ON tariffs (final_price, id)",
+    """
+    ALTER TABLE tariffs ADD CONSTRAINT chk_tariffs_discount
+        CHECK (discount BETWEEN 0 AND 100)
+    """,
+    # История цен: строка на каждое добавление тарифа и изменение цены или скидки
+    """
+    CREATE TABLE IF NOT EXISTS tariff_price_history (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        tariff_id INT NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        base_price DECIMAL(10, 2) NOT NULL,
+        discount DECIMAL(5, 2) NOT NULL,
+        changed_at TIMESTAMP(6) NOT NULL,
+        INDEX idx_price_history_name (name, changed_at, id),
+        INDEX idx_price_history_tariff (tariff_id, id),
+        INDEX idx_price_history_changed_at (changed_at)
+    )
+    """,
+    # Контрольные точки: состояние всех тарифов на момент строки истории history_id
+    """
+    CREATE TABLE IF NOT EXISTS tariff_price_checkpoints (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        history_id BIGINT NOT NULL,
+        as_of TIMESTAMP(6) NOT NULL,
+        INDEX idx_price_checkpoints_as_of (as_of)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tariff_price_checkpoint_rows (
+        checkpoint_id INT NOT NULL,
+        tariff_id INT NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        base_price DECIMAL(10, 2) NOT NULL,
+        discount DECIMAL(5, 2) NOT NULL,
+        PRIMARY KEY (checkpoint_id, tariff_id)
+    )
+    """,
+    # Тарифы, созданные до появления истории, попадают в нее текущим состоянием
+    """
+    INSERT INTO tariff_price_history (tariff_id, name, base_price, discount, changed_at)
+    SELECT id, name, base_price, COALESCE(discount, 0), updated_at FROM tariffs
+    WHERE NOT EXISTS (SELECT 1 FROM tariff_price_history)
+    """,
+    # История пишется триггерами, поэтому ее ведут все клиенты и пакетные UPDATE
+    """
+    CREATE TRIGGER trg_tariffs_history_insert AFTER INSERT ON tariffs FOR EACH ROW
+        INSERT INTO tariff_price_history (tariff_id, name, base_price, discount, changed_at)
+        VALUES (NEW.id, NEW.name, NEW.base_price, COALESCE(NEW.discount, 0), NEW.updated_at)
+    """,
+    """
+    CREATE TRIGGER trg_tariffs_history_update AFTER UPDATE ON tariffs FOR EACH ROW
+        INSERT INTO tariff_price_history (tariff_id, name, base_price, discount, changed_at)
+        SELECT NEW.id, NEW.name, NEW.base_price, COALESCE(NEW.discount, 0), NEW.updated_at
+        FROM DUAL
+        WHERE NOT (OLD.base_price <=> NEW.base_price AND OLD.discount <=> NEW.discount)
+    """,
+]
+
+# Версия схемы, записываемая в таблицу schema_version после миграций;
+# растет с каждой новой миграцией
+SCHEMA_VERSION = len(SCHEMA_MIGRATIONS)
+
+# Ошибки повторного применения миграций
+MIGRATION_DUPLICATE_ERRORS = (
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_CHECK_CONSTRAINT_DUP_NAME,
+    errorcode.ER_TRG_ALREADY_EXISTS,
+)
+
+# Последняя строка истории каждого тарифа среди строк с id > %s и временем <= %s
+LATEST_HISTORY_ROWS = """
+SELECT h.tariff_id, h.name, h.base_price, h.discount
+FROM tariff_price_history h
+JOIN (
+    SELECT tariff_id, MAX(id) AS id
+    FROM tariff_price_history
+    WHERE id > %s AND changed_at <= %s
+    GROUP BY tariff_id
+) latest ON h.id = latest.id
+"""
+
+class Database(ITariffStorage):
+    # Сколько имен селектора подставляется в одно условие IN
+    NAMES_PER_STATEMENT = 1000
+
+    def __init__(self, database: Optional[str] = None, pool_size: Optional[int] = None):
+        self.config = get_db_config()
+        if database:
+            self.config['database'] = database
+        self.database = self.config['database']
+        self.pool_size = pool_size or get_pool_size()
+        self.pool = None
         self.connect()
-        self.create_tables()
+        # CREATE DATABASE, CREATE TABLE и миграции - только при первом запуске
+        # или после обновления схемы
+        if not self.schema_is_current():
+            self.create_database()
+            self.create_tables()
+
+    def _open_connection(self):
+        # FOUND_ROWS: rowcount UPDATE - число найденных строк, а не измененных,
+        # иначе установка той же скидки выглядела бы как отсутствие тарифа
+        return mysql.connector.connect(autocommit=False, client_flags=[ClientFlag.FOUND_ROWS],
+                                       **self.config)
+
+    @staticmethod
+    def _ping(connection):
+        connection.ping(reconnect=True, attempts=3, delay=1)
 
     def connect(self):
+        # Соединения открываются при первом запросе
+        self.pool = ConnectionPool(self._open_connection, self.pool_size, ping=self._ping)
+
+    def schema_is_current(self) -> bool:
+        """Создана ли схема этой или более новой версией программы"""
         try:
-            self.connection = mysql.connector.connect(
-                host='localhost',
-                user='root',
-                password='5930',
-                database='shipping_company'
-            )
-            if self.connection.is_connected():
-                print("Successfully connected to MySQL database")
-        except Error as e:
-            print(f"Error connecting to MySQL: {e}")
+            with self.cursor() as cursor:
+                cursor.execute("SELECT MAX(version) FROM schema_version")
+                row = cursor.fetchone()
+            return row is not None and row[0] is not None and row[0] >= SCHEMA_VERSION
+        except DB_ERRORS:
+            # Нет базы данных или таблицы schema_version
+            return False
+
+    @contextmanager
+    def cursor(self):
+        """Курсор на соединении из пула; по выходу транзакция фиксируется или откатывается"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    yield cursor
+                    connection.commit()
+                except BaseException:
+                    try:
+                        connection.rollback()
+                    except Error:
+                        pass
+                    raise
+                finally:
+                    cursor.close()
+        except DB_ERRORS as e:
+            record_error(type(self).__name__, e)
+            raise
 
     def create_database(self):
+        server_config = {key: value for key, value in self.config.items() if key != 'database'}
         try:
-            connection = mysql.connector.connect(
-                host='localhost',
-                user='root',
-                password='5930'  # Using the password here as well
-            )
+            connection = mysql.connector.connect(**server_config)
             cursor = connection.cursor()
-            cursor.execute("CREATE DATABASE IF NOT EXISTS shipping_company")
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{self.database}`")
             connection.commit()
             print("Database created successfully")
             cursor.close()
@@ -40,87 +187,428 @@ class Database:
             print(f"Error creating database: {e}")
 
     def create_tables(self):
-        if not self.connection:
-            return
-
         create_tariffs_table = """
         CREATE TABLE IF NOT EXISTS tariffs (
             id INT AUTO_INCREMENT PRIMARY KEY,
             name VARCHAR(255) NOT NULL UNIQUE,
             base_price DECIMAL(10, 2) NOT NULL,
             discount DECIMAL(5, 2) DEFAULT 0.00,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+            final_price DECIMAL(10, 2)
+                AS (ROUND(base_price * (1 - COALESCE(discount, 0) / 100), 2)) STORED,
+            INDEX idx_tariffs_updated_at (updated_at),
+            INDEX idx_tariffs_price (base_price, id),
+            INDEX idx_tariffs_final_price (final_price, id),
+            CONSTRAINT chk_tariffs_discount CHECK (discount BETWEEN 0 AND 100)
         )
         """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(create_tariffs_table)
-            self.connection.commit()
+            with self.cursor() as cursor:
+                cursor.execute(create_tariffs_table)
+                self.apply_migrations(cursor)
+                cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INT NOT NULL)")
+                cursor.execute("DELETE FROM schema_version")
+                cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
             print("Tariffs table created successfully")
-        except Error as e:
+        except DB_ERRORS as e:
             print(f"Error creating table: {e}")
 
-    def add_tariff(self, name: str, base_price: float) -> bool:
-        if not self.connection:
-            return False
+    def apply_migrations(self, cursor):
+        for statement in SCHEMA_MIGRATIONS:
+            try:
+                cursor.execute(statement)
+            except Error as e:
+                if e.errno not in MIGRATION_DUPLICATE_ERRORS:
+                    raise
 
+    def add_tariff(self, name: str, base_price: float) -> bool:
         query = "INSERT INTO tariffs (name, base_price) VALUES (%s, %s)"
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, (name, base_price))
-            self.connection.commit()
+            with self.cursor() as cursor:
+                cursor.execute(query, (name, base_price))
             return True
-        except Error as e:
-            print(f"Error adding tariff: {e}")
+        except DB_ERRORS as e:
+            # Уникальность имени проверяет индекс tariffs.name, а не отдельный SELECT
+            if getattr(e, 'errno', None) == errorcode.ER_DUP_ENTRY:
+                print(f"Tariff '{name}' already exists")
+            else:
+                print(f"Error adding tariff: {e}")
             return False
 
     def set_tariff_discount(self, name: str, discount: float) -> bool:
-        if not self.connection:
-            return False
-
         query = "UPDATE tariffs SET discount = %s WHERE name = %s"
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, (discount, name))
-            self.connection.commit()
-            return cursor.rowcount > 0
-        except Error as e:
+            with self.cursor() as cursor:
+                cursor.execute(query, (discount, name))
+                return cursor.rowcount > 0
+        except DB_ERRORS as e:
             print(f"Error setting discount: {e}")
             return False
 
-    def get_all_tariffs(self) -> List[Tuple]:
-        if not self.connection:
+    def bulk_add_tariffs(self, rows: List[Tuple[str, float, float]]) -> List[Tuple[str, str]]:
+        """Добавить пачку тарифов (name, base_price, discount) одной транзакцией.
+
+        Возвращает список (name, ошибка) для строк, которые не удалось вставить.
+        """
+        if not rows:
             return []
 
+        query = "INSERT INTO tariffs (name, base_price, discount) VALUES (%s, %s, %s)"
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany(query, rows)
+            return []
+        except DB_ERRORS as e:
+            if getattr(e, 'errno', None) != errorcode.ER_DUP_ENTRY:
+                print(f"Error adding tariffs: {e}")
+                return [(row[0], str(e)) for row in rows]
+
+        # В пачке есть дубликат: вставляем построчно в одной транзакции,
+        # ошибка отдельного INSERT не отменяет остальные
+        failed = []
+        try:
+            with self.cursor() as cursor:
+                for row in rows:
+                    try:
+                        cursor.execute(query, row)
+                    except Error as e:
+                        if e.errno != errorcode.ER_DUP_ENTRY:
+                            raise
+                        failed.append((row[0], "already exists"))
+            return failed
+        except DB_ERRORS as e:
+            print(f"Error adding tariffs: {e}")
+            return [(row[0], str(e)) for row in rows]
+
+    def bulk_set_discounts(self, rows: List[Tuple[str, float]]) -> bool:
+        """Установить скидки для пачки тарифов (name, discount) одной транзакцией"""
+        if not rows:
+            return True
+
+        query = "UPDATE tariffs SET discount = %s WHERE name = %s"
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany(query, [(discount, name) for name, discount in rows])
+            return True
+        except DB_ERRORS as e:
+            print(f"Error setting discounts: {e}")
+            return False
+
+    @staticmethod
+    def _filter_conditions(name_prefix: Optional[str] = None,
+                           min_price: Optional[float] = None,
+                           max_price: Optional[float] = None) -> Tuple[List[str], list]:
+        """Условия WHERE и параметры для отбора по префиксу имени и диапазону цены"""
+        conditions = []
+        params = []
+        if name_prefix:
+            escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("name LIKE %s")
+            params.append(escaped + '%')
+        if min_price is not None:
+            conditions.append("base_price >= %s")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append("base_price <= %s")
+            params.append(max_price)
+        return conditions, params
+
+    def set_discount_where(self, selector: TariffSelector, discount: float) -> Optional[List[Tuple[str, float]]]:
+        """Установить скидку тарифам селектора одной транзакцией.
+
+        Строки блокируются SELECT ... FOR UPDATE, чтобы вернуть их прежние
+        скидки, затем изменяются одним UPDATE с тем же условием (длинный
+        список имен делится на группы по NAMES_PER_STATEMENT). Условие
+        "%s BETWEEN 0 AND 100" повторяет проверку DiscountPriceStrategy
+        в самом запросе, а CHECK chk_tariffs_discount - для остальных клиентов.
+        """
+        if not 0 <= discount <= 100:
+            # Пустой список означал бы "ничего не отобрано", а это ошибка вызова
+            print(f"Error setting discounts: discount {discount} is out of range 0-100")
+            return None
+        conditions, params = self._filter_conditions(selector.name_prefix, selector.min_price,
+                                                     selector.max_price)
+        conditions.append("%s BETWEEN 0 AND 100")
+        params.append(discount)
+        if selector.names is None:
+            name_groups = [None]
+        else:
+            name_groups = [selector.names[start:start + self.NAMES_PER_STATEMENT]
+                           for start in range(0, len(selector.names), self.NAMES_PER_STATEMENT)]
+
+        previous = []
+        try:
+            with self.cursor() as cursor:
+                for names in name_groups:
+                    group_conditions, group_params = list(conditions), list(params)
+                    if names is not None:
+                        group_conditions.append(f"name IN ({', '.join(['%s'] * len(names))})")
+                        group_params.extend(names)
+                    where = " WHERE " + " AND ".join(group_conditions)
+                    cursor.execute(f"SELECT name, discount FROM tariffs{where} FOR UPDATE", group_params)
+                    rows = cursor.fetchall()
+                    if rows:
+                        cursor.execute(f"UPDATE tariffs SET discount = %s{where}", [discount] + group_params)
+                    previous.extend((name, float(old_discount)) for name, old_discount in rows)
+            return previous
+        except DB_ERRORS as e:
+            print(f"Error setting discounts: {e}")
+            return None
+
+    def get_tariff_by_name(self, name: str) -> Optional[Tuple]:
+        query = "SELECT name, base_price, discount FROM tariffs WHERE name = %s"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name,))
+                return cursor.fetchone()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff: {e}")
+            return None
+
+    def tariff_exists(self, name: str) -> bool:
+        query = "SELECT 1 FROM tariffs WHERE name = %s LIMIT 1"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name,))
+                return cursor.fetchone() is not None
+        except DB_ERRORS as e:
+            print(f"Error checking tariff: {e}")
+            return False
+
+    def get_all_tariffs(self) -> List[Tuple]:
         query = "SELECT name, base_price, discount FROM tariffs ORDER BY base_price ASC"
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query)
-            return cursor.fetchall()
-        except Error as e:
+            with self.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+        except DB_ERRORS as e:
             print(f"Error getting tariffs: {e}")
             return []
 
-    def get_min_price_tariff(self) -> Optional[Tuple]:
-        if not self.connection:
+    def get_tariffs_page(self, limit: int, after: Optional[Tuple] = None,
+                         name_prefix: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None) -> List[Tuple]:
+        """Страница тарифов (id, name, base_price, discount) в порядке (base_price, id).
+
+        after - ключ (base_price, id) последней строки предыдущей страницы.
+        Выборка идет по индексу idx_tariffs_price без OFFSET, поэтому
+        стоимость страницы не зависит от ее номера.
+        """
+        conditions, params = self._filter_conditions(name_prefix, min_price, max_price)
+        if after is not None:
+            conditions.append("(base_price > %s OR (base_price = %s AND id > %s))")
+            params.extend((after[0], after[0], after[1]))
+
+        query = "SELECT id, name, base_price, discount FROM tariffs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY base_price ASC, id ASC LIMIT %s"
+        params.append(limit)
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariffs page: {e}")
+            return []
+
+    def get_price_as_of(self, name: str, when: datetime) -> Optional[Tuple]:
+        """Тариф (name, base_price, discount) в том виде, в каком он был в момент when"""
+        query = """
+        SELECT name, base_price, discount
+        FROM tariff_price_history
+        WHERE name = %s AND changed_at <= %s
+        ORDER BY changed_at DESC, id DESC
+        LIMIT 1
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name, when))
+                return cursor.fetchone()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff price history: {e}")
             return None
 
+    def get_price_history(self, name: str) -> List[Tuple]:
+        """Все изменения тарифа (changed_at, base_price, discount) по времени"""
         query = """
-        SELECT name, base_price, discount, 
-               base_price * (1 - discount/100) as final_price 
-        FROM tariffs 
-        ORDER BY final_price ASC 
+        SELECT changed_at, base_price, discount
+        FROM tariff_price_history
+        WHERE name = %s
+        ORDER BY changed_at ASC, id ASC
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name,))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff price history: {e}")
+            return []
+
+    def get_catalogue_as_of(self, when: datetime) -> List[Tuple]:
+        """Все тарифы (name, base_price, discount) на момент when по возрастанию цены.
+
+        Берется последняя контрольная точка не позже when, и к ней
+        применяются только строки истории, записанные после нее.
+        """
+        checkpoint_query = """
+        SELECT id, history_id FROM tariff_price_checkpoints
+        WHERE as_of <= %s
+        ORDER BY as_of DESC, id DESC
         LIMIT 1
         """
+        rows_query = """
+        SELECT tariff_id, name, base_price, discount
+        FROM tariff_price_checkpoint_rows
+        WHERE checkpoint_id = %s
+        """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(query)
-            result = cursor.fetchone()
-            return result if result else None
-        except Error as e:
-            print(f"Error finding min price tariff: {e}")
+            with self.cursor() as cursor:
+                cursor.execute(checkpoint_query, (when,))
+                checkpoint = cursor.fetchone()
+                tariffs = {}
+                history_id = 0
+                if checkpoint is not None:
+                    checkpoint_id, history_id = checkpoint
+                    cursor.execute(rows_query, (checkpoint_id,))
+                    tariffs = {row[0]: row[1:] for row in cursor.fetchall()}
+                cursor.execute(LATEST_HISTORY_ROWS, (history_id, when))
+                tariffs.update((row[0], row[1:]) for row in cursor.fetchall())
+            return sorted(tariffs.values(), key=lambda row: row[1])
+        except DB_ERRORS as e:
+            print(f"Error getting catalogue history: {e}")
+            return []
+
+    def create_price_checkpoint(self) -> Optional[int]:
+        """Сохранить контрольную точку - последнюю строку истории каждого тарифа"""
+        insert_rows = """
+        INSERT INTO tariff_price_checkpoint_rows (checkpoint_id, tariff_id, name, base_price, discount)
+        SELECT %s, h.tariff_id, h.name, h.base_price, h.discount
+        FROM tariff_price_history h
+        JOIN (
+            SELECT tariff_id, MAX(id) AS id
+            FROM tariff_price_history
+            WHERE id <= %s
+            GROUP BY tariff_id
+        ) latest ON h.id = latest.id
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("SELECT MAX(id), MAX(changed_at) FROM tariff_price_history")
+                history_id, as_of = cursor.fetchone()
+                if history_id is None:
+                    return None
+                cursor.execute("SELECT id FROM tariff_price_checkpoints WHERE history_id = %s", (history_id,))
+                existing = cursor.fetchone()
+                if existing is not None:
+                    return existing[0]
+                cursor.execute("INSERT INTO tariff_price_checkpoints (history_id, as_of) VALUES (%s, %s)",
+                               (history_id, as_of))
+                checkpoint_id = cursor.lastrowid
+                cursor.execute(insert_rows, (checkpoint_id, history_id))
+            return checkpoint_id
+        except DB_ERRORS as e:
+            print(f"Error creating price checkpoint: {e}")
+            return None
+
+    def get_revision(self) -> Optional[int]:
+        """Номер последнего изменения тарифов - id последней строки истории цен (0 - изменений нет)"""
+        query = "SELECT COALESCE(MAX(id), 0) FROM tariff_price_history"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query)
+                return int(cursor.fetchone()[0])
+        except DB_ERRORS as e:
+            print(f"Error getting tariffs revision: {e}")
             return None
 
+    def get_changes_since(self, revision: int, limit: int) -> List[Tuple]:
+        """Изменения после revision по порядку: (revision, name, base_price, discount).
+
+        Номера строк истории выдаются при вставке, а видны после фиксации
+        транзакции, поэтому при одновременной записи из нескольких
+        соединений строка с меньшим номером может стать видна позже большей;
+        такие номера ShippingCompany.changes_since запрашивает снова
+        через get_changes_at.
+        """
+        query = """
+        SELECT id, name, base_price, discount
+        FROM tariff_price_history
+        WHERE id > %s
+        ORDER BY id ASC
+        LIMIT %s
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (revision, limit))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff changes: {e}")
+            return []
+
+    def get_changes_at(self, revisions: List[int]) -> List[Tuple]:
+        """Видимые сейчас изменения с номерами из revisions (пропуски, оставшиеся после get_changes_since)"""
+        if not revisions:
+            return []
+        query = f"""
+        SELECT id, name, base_price, discount
+        FROM tariff_price_history
+        WHERE id IN ({', '.join(['%s'] * len(revisions))})
+        ORDER BY id ASC
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, tuple(revisions))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff changes: {e}")
+            return []
+
+    def get_min_price_tariff(self) -> Optional[Tuple]:
+        result = self.find_cheapest(1)
+        return result[0] if result else None
+
+    def find_cheapest(self, k: int) -> List[Tuple]:
+        """k самых дешевых тарифов (name, base_price, discount, final_price) по индексу final_price"""
+        if k < 1:
+            # LIMIT с отрицательным числом в SQLite снимает ограничение, в MySQL - ошибка
+            return []
+        query = """
+        SELECT name, base_price, discount, final_price
+        FROM tariffs
+        ORDER BY final_price ASC, id ASC
+        LIMIT %s
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (k,))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error finding cheapest tariffs: {e}")
+            return []
+
+    def find_in_price_range(self, low: float, high: float) -> List[Tuple]:
+        """Тарифы с итоговой ценой от low до high включительно, по возрастанию цены"""
+        query = """
+        SELECT name, base_price, discount, final_price
+        FROM tariffs
+        WHERE final_price BETWEEN %s AND %s
+        ORDER BY final_price ASC, id ASC
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (low, high))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error finding tariffs in price range: {e}")
+            return []
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+
     def __del__(self):
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        self.close()
@@ -0,0 +1,91 @@
+from typing import Callable, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskSignals(QObject):
+    """Сигналы фоновой задачи; доставляются в поток интерфейса"""
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    finished = pyqtSignal()
+
+
+class DbTask(QRunnable):
+    """Вызов функции в потоке из пула с передачей результата через сигналы"""
+    def __init__(self, func: Callable, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.func = func
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class DbExecutor(QObject):
+    """Выполняет операции с базой данных вне потока интерфейса.
+
+    Задачи выполняются по одной в порядке поступления: так операции
+    пользователя не обгоняют друг друга и не обращаются к кэшу
+    ShippingCompany одновременно. Задачи с одинаковым coalesce_key
+    не копятся в очереди: пока одна выполняется, из новых запоминается
+    только последняя.
+    """
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._tasks = set()
+        self._in_flight = set()
+        self._pending = {}
+
+    def is_busy(self) -> bool:
+        return bool(self._tasks)
+
+    def submit(self, func: Callable, *args,
+               on_result: Optional[Callable] = None,
+               on_error: Optional[Callable] = None,
+               coalesce_key: Optional[str] = None) -> None:
+        if coalesce_key is not None and coalesce_key in self._in_flight:
+            self._pending[coalesce_key] = (func, args, on_result, on_error)
+            return
+
+        task = DbTask(func, *args)
+        if on_result is not None:
+            task.signals.result.connect(on_result)
+        if on_error is not None:
+            task.signals.error.connect(on_error)
+        task.signals.finished.connect(lambda: self._on_finished(task, coalesce_key))
+
+        self._tasks.add(task)
+        if coalesce_key is not None:
+            self._in_flight.add(coalesce_key)
+        if len(self._tasks) == 1:
+            self.busy_changed.emit(True)
+        self._pool.start(task)
+
+    def _on_finished(self, task: DbTask, coalesce_key: Optional[str]) -> None:
+        self._tasks.discard(task)
+        if coalesce_key is not None:
+            self._in_flight.discard(coalesce_key)
+            pending = self._pending.pop(coalesce_key, None)
+            if pending is not None:
+                func, args, on_result, on_error = pending
+                self.submit(func, *args, on_result=on_result, on_error=on_error,
+                            coalesce_key=coalesce_key)
+        if not self._tasks:
+            self.busy_changed.emit(False)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Дождаться завершения запущенных задач"""
+        return self._pool.waitForDone(msecs)
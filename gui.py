@@ -1,16 +1,41 @@
 import sys
+import threading
+from PyQt6.QtCore import Qt, QObject, QStringListModel, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QLineEdit, QMessageBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QDoubleSpinBox
+    QPushButton, QLabel, QLineEdit, QMessageBox, QTableView,
+    QHeaderView, QDoubleSpinBox, QProgressBar, QCompleter
 )
+from change_feed import ChangeSubscriber
+from config import get_change_feed_address
+from db_executor import DbExecutor
 from shipping_company import ShippingCompany, BaseTariff, TariffException
+from tariff_model import TariffTableModel, TariffFilterProxyModel
+
+class ChangeSignals(QObject):
+    """Передает ревизии из потока подписчика в поток интерфейса"""
+    revision_received = pyqtSignal(int)
+
 
 class ShippingCompanyGUI(QMainWindow):
+    # Интервал опроса изменений, мс; при рассылке через сокет опрос - только страховка
+    CHANGES_POLL_INTERVAL = 3000
+    CHANGES_FALLBACK_INTERVAL = 30000
+
     def __init__(self):
         super().__init__()
-        self.company = ShippingCompany()
+        # Все обращения к БД выполняются в фоне, окно показывается сразу
+        self.company = None
+        self.executor = DbExecutor(self)
+        # Ревизия, до которой изменения уже показаны в таблице
+        self.revision = None
+        self.changes_timer = QTimer(self)
+        self.changes_timer.timeout.connect(self.poll_changes)
+        self.change_signals = ChangeSignals(self)
+        self.change_signals.revision_received.connect(self.on_revision_received)
+        self.change_subscriber = None
         self.init_ui()
+        self.connect_database()
 
     def init_ui(self):
         self.setWindowTitle('Система управления тарифами грузоперевозок')
@@ -41,9 +66,9 @@ class ShippingCompanyGUI(QMainWindow):
         self.price_input.setPrefix('₽ ')
         add_layout.addWidget(self.price_input)
 
-        add_button = QPushButton('Добавить тариф')
-        add_button.clicked.connect(self.add_tariff)
-        add_layout.addWidget(add_button)
+        self.add_button = QPushButton('Добавить тариф')
+        self.add_button.clicked.connect(self.add_tariff)
+        add_layout.addWidget(self.add_button)
 
         left_layout.addWidget(add_group)
 
@@ -55,6 +80,14 @@ class ShippingCompanyGUI(QMainWindow):
         
         self.discount_name_input = QLineEdit()
         self.discount_name_input.setPlaceholderText('Название тарифа')
+        # Подсказки названий: по префиксу, подстроке и с опечатками, поэтому
+        # completer показывает список как есть, без своей фильтрации
+        self.name_completer = QCompleter(self)
+        self.name_completer.setModel(QStringListModel(self.name_completer))
+        self.name_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.name_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.discount_name_input.setCompleter(self.name_completer)
+        self.discount_name_input.textEdited.connect(self.suggest_names)
         discount_layout.addWidget(self.discount_name_input)
 
         self.discount_input = QDoubleSpinBox()
@@ -63,16 +96,16 @@ class ShippingCompanyGUI(QMainWindow):
         self.discount_input.setSuffix(' %')
         discount_layout.addWidget(self.discount_input)
 
-        discount_button = QPushButton('Установить скидку')
-        discount_button.clicked.connect(self.set_discount)
-        discount_layout.addWidget(discount_button)
+        self.discount_button = QPushButton('Установить скидку')
+        self.discount_button.clicked.connect(self.set_discount)
+        discount_layout.addWidget(self.discount_button)
 
         left_layout.addWidget(discount_group)
 
         # Кнопка поиска минимального тарифа
-        find_min_button = QPushButton('Найти минимальный тариф')
-        find_min_button.clicked.connect(self.find_min_tariff)
-        left_layout.addWidget(find_min_button)
+        self.find_min_button = QPushButton('Найти минимальный тариф')
+        self.find_min_button.clicked.connect(self.find_min_tariff)
+        left_layout.addWidget(self.find_min_button)
 
         left_layout.addStretch()
         layout.addWidget(left_panel)
@@ -82,18 +115,96 @@ class ShippingCompanyGUI(QMainWindow):
         right_layout = QVBoxLayout(right_panel)
         
         right_layout.addWidget(QLabel('Список тарифов'))
-        
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(['Название', 'Базовая цена', 'Скидка', 'Итоговая цена'])
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText('Фильтр по названию')
+        right_layout.addWidget(self.filter_input)
+
+        # Строки подгружаются страницами при прокрутке
+        self.model = TariffTableModel(executor=self.executor)
+        self.proxy_model = TariffFilterProxyModel()
+        self.proxy_model.setSourceModel(self.model)
+        self.filter_input.textChanged.connect(self.proxy_model.setFilterFixedString)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy_model)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Без индикатора сортировки сохраняется порядок БД (по базовой цене)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         right_layout.addWidget(self.table)
 
         layout.addWidget(right_panel)
 
+        # Индикатор выполнения запросов к БД
+        self.loading_indicator = QProgressBar()
+        self.loading_indicator.setRange(0, 0)
+        self.loading_indicator.setMaximumWidth(120)
+        self.loading_indicator.hide()
+        self.statusBar().addPermanentWidget(self.loading_indicator)
+        self.executor.busy_changed.connect(self.loading_indicator.setVisible)
+
+        self.set_actions_enabled(False)
+
+    def set_actions_enabled(self, enabled: bool):
+        for button in (self.add_button, self.discount_button, self.find_min_button):
+            button.setEnabled(enabled)
+
+    def connect_database(self):
+        self.statusBar().showMessage('Подключение к базе данных...')
+        self.executor.submit(ShippingCompany, on_result=self.on_connected,
+                             on_error=self.on_connection_error)
+
+    def on_connected(self, company: ShippingCompany):
+        self.company = company
+        self.statusBar().showMessage('Подключено к базе данных', 3000)
+        self.set_actions_enabled(True)
+        # Ревизия читается до первой страницы: изменения между ними придут повторно, а не потеряются
+        self.executor.submit(company.get_revision, on_result=self.start_watching_changes)
         # Загружаем тарифы при запуске
-        self.update_table()
+        self.model.set_company(company)
+        # Индекс названий для подсказок строится отдельным потоком, не занимая очередь executor
+        threading.Thread(target=company.build_name_index, name='name-index', daemon=True).start()
+
+    def start_watching_changes(self, revision: int):
+        """Получать изменения других клиентов: по рассылке через сокет (SHIPPING_CHANGE_FEED) или опросом"""
+        self.revision = revision
+        if get_change_feed_address():
+            self.change_subscriber = ChangeSubscriber(self.change_signals.revision_received.emit)
+            self.change_subscriber.start()
+            self.changes_timer.start(self.CHANGES_FALLBACK_INTERVAL)
+        else:
+            self.changes_timer.start(self.CHANGES_POLL_INTERVAL)
+
+    def on_revision_received(self, revision: int):
+        # Та же ревизия приходит, когда появилось изменение на месте пропущенного номера
+        if revision != self.revision or getattr(self.revision, 'gaps', None):
+            self.poll_changes()
+
+    def poll_changes(self):
+        if self.company is None or self.revision is None:
+            return
+        self.executor.submit(self.company.changes_since, self.revision,
+                             on_result=self.on_changes, coalesce_key='changes')
+
+    def on_changes(self, changes):
+        tariffs, self.revision = changes
+        self.model.apply_changes(tariffs)
+
+    def closeEvent(self, event):
+        self.changes_timer.stop()
+        if self.change_subscriber is not None:
+            self.change_subscriber.stop()
+        super().closeEvent(event)
+
+    def on_connection_error(self, error: Exception):
+        self.statusBar().showMessage('Нет подключения к базе данных')
+        QMessageBox.critical(self, 'Ошибка', f'Не удалось подключиться к базе данных: {error}')
+
+    def show_error(self, error: Exception):
+        QMessageBox.warning(self, 'Ошибка', str(error))
 
     def add_tariff(self):
         try:
@@ -102,66 +213,83 @@ class ShippingCompanyGUI(QMainWindow):
             
             if not name:
                 raise TariffException("Название тарифа не может быть пустым")
-            
-            if self.company.has_tariff(name):
-                raise TariffException(f"Тариф с названием '{name}' уже существует")
 
             tariff = BaseTariff(name, price)
-            self.company.add_tariff(tariff)
-            
-            self.name_input.clear()
-            self.price_input.setValue(100.00)
-            self.update_table()
-            QMessageBox.information(self, 'Успех', 'Тариф успешно добавлен!')
-            
         except TariffException as e:
-            QMessageBox.warning(self, 'Ошибка', str(e))
+            self.show_error(e)
+            return
+
+        def add():
+            self.company.add_tariff(tariff)
+            return self.company.get_tariff(name)
+
+        self.executor.submit(add, on_result=self.on_tariff_added, on_error=self.show_error)
+
+    def on_tariff_added(self, tariff: BaseTariff):
+        self.name_input.clear()
+        self.price_input.setValue(100.00)
+        self.model.upsert_tariff(tariff)
+        QMessageBox.information(self, 'Успех', 'Тариф успешно добавлен!')
 
     def set_discount(self):
-        try:
-            name = self.discount_name_input.text().strip()
-            discount = self.discount_input.value()
+        name = self.discount_name_input.text().strip()
+        discount = self.discount_input.value()
 
-            if not name:
-                raise TariffException("Название тарифа не может быть пустым")
+        if not name:
+            self.show_error(TariffException("Название тарифа не может быть пустым"))
+            return
 
+        def set_discount():
             self.company.set_tariff_discount(name, discount)
-            
-            self.discount_name_input.clear()
-            self.discount_input.setValue(0.00)
-            self.update_table()
-            QMessageBox.information(self, 'Успех', 'Скидка успешно установлена!')
-            
-        except TariffException as e:
-            QMessageBox.warning(self, 'Ошибка', str(e))
+            return self.company.get_tariff(name)
+
+        self.executor.submit(set_discount, on_result=self.on_discount_set, on_error=self.show_error)
+
+    def suggest_names(self, text: str):
+        # Пока индекс названий строится, подсказок нет: поиск ждал бы его в очереди executor
+        if self.company is None or not text.strip() or not self.company.has_name_index():
+            return
+        # Пока идет поиск, из новых запросов выполняется только последний
+        self.executor.submit(self.company.search_tariffs, text,
+                             on_result=lambda names: self.on_names_found(text, names),
+                             coalesce_key='search_names')
+
+    def on_names_found(self, text: str, names: list):
+        # Ответ на устаревший запрос не показываем
+        if text != self.discount_name_input.text():
+            return
+        self.name_completer.model().setStringList(names)
+        if names:
+            self.name_completer.complete()
+
+    def on_discount_set(self, tariff: BaseTariff):
+        self.discount_name_input.clear()
+        self.discount_input.setValue(0.00)
+        self.model.upsert_tariff(tariff)
+        QMessageBox.information(self, 'Успех', 'Скидка успешно установлена!')
 
     def find_min_tariff(self):
-        try:
-            min_tariff = self.company.find_min_price_tariff()
-            message = (f"Тариф с минимальной стоимостью:\n\n"
-                      f"Название: {min_tariff.get_name()}\n"
-                      f"Базовая цена: {min_tariff.get_price():.2f} ₽\n"
-                      f"Скидка: {min_tariff.get_discount():.2f}%\n"
-                      f"Итоговая цена: {min_tariff.calculate_final_price():.2f} ₽")
-            QMessageBox.information(self, 'Минимальный тариф', message)
-        except TariffException as e:
-            QMessageBox.warning(self, 'Ошибка', str(e))
+        self.executor.submit(self.company.find_min_price_tariff,
+                             on_result=self.on_min_tariff_found, on_error=self.show_error)
+
+    def on_min_tariff_found(self, min_tariff: BaseTariff):
+        if min_tariff is None:
+            QMessageBox.information(self, 'Минимальный тариф', 'Список тарифов пуст')
+            return
+        message = (f"Тариф с минимальной стоимостью:\n\n"
+                  f"Название: {min_tariff.get_name()}\n"
+                  f"Базовая цена: {min_tariff.get_price():.2f} ₽\n"
+                  f"Скидка: {min_tariff.get_discount():.2f}%\n"
+                  f"Итоговая цена: {min_tariff.format_final_price()} ₽")
+        QMessageBox.information(self, 'Минимальный тариф', message)
 
     def update_table(self):
-        """Обновление таблицы тарифов"""
-        tariffs = self.company.get_all_tariffs()
-        self.table.setRowCount(len(tariffs))
-        
-        for row, tariff in enumerate(tariffs):
-            name_item = QTableWidgetItem(tariff.get_name())
-            base_price_item = QTableWidgetItem(f"₽ {tariff.get_price():.2f}")
-            discount_item = QTableWidgetItem(f"{tariff.get_discount():.1f}%")
-            final_price_item = QTableWidgetItem(f"₽ {tariff.calculate_final_price():.2f}")
-            
-            self.table.setItem(row, 0, name_item)
-            self.table.setItem(row, 1, base_price_item)
-            self.table.setItem(row, 2, discount_item)
-            self.table.setItem(row, 3, final_price_item)
+        """Перечитать таблицу тарифов с первой страницы.
+
+        Повторные вызовы во время загрузки объединяются в одну загрузку.
+        """
+        if self.company is not None:
+            self.model.reload()
 
 def gui_main():
     app = QApplication(sys.argv)
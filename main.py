@@ -1,4 +1,4 @@
-from gui import gui_main
+from metrics import session
 
 from shipping_company import ShippingCompany
 from shipping_functions import (
@@ -39,5 +39,12 @@ def old_main():
         else:
             print("\nОшибка: Неверный выбор. Пожалуйста, выберите число от 0 до 4.")
 
-if __name__ == "__main__":
+def run_gui():
+    # PyQt6 загружается только при запуске интерфейса, а не при импорте модуля
+    from gui import gui_main
     gui_main()
+
+if __name__ == "__main__":
+    # Профиль и метрики сеанса включаются переменными SHIPPING_PROFILE и SHIPPING_METRICS_DUMP
+    with session():
+        run_gui()
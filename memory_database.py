@@ -0,0 +1,232 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from storage import ITariffStorage, TariffSelector, from_time_ns, to_time_ns
+from tariffs import final_price_kopecks, to_kopecks
+
+
+def _row_key(key: Tuple[float, int, str]) -> Tuple[float, int]:
+    return key[0], key[1]
+
+
+def final_price(base_price: float, discount: float) -> float:
+    """Итоговая цена с округлением до копеек, как в столбце final_price SQL-хранилищ"""
+    return final_price_kopecks(to_kopecks(base_price), discount) / 100
+
+
+class MemoryDatabase(ITariffStorage):
+    """Хранилище тарифов в памяти процесса, без внешней базы данных.
+
+    Подходит для тестов, замеров и узлов без MySQL; данные теряются
+    при завершении процесса. Упорядоченные списки ключей играют роль
+    индексов (base_price, id) и (final_price, id) SQL-хранилищ.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = count(1)
+        # name -> [id, name, base_price, discount]
+        self._rows: Dict[str, list] = {}
+        self._by_price: List[Tuple[float, int, str]] = []
+        self._by_final_price: List[Tuple[float, int, str]] = []
+        # История цен: (id, tariff_id, name, base_price, discount, changed_at), id = позиция + 1
+        self._history: List[Tuple[int, int, str, float, float, int]] = []
+        # name -> [(changed_at, base_price, discount)] для поиска по времени
+        self._history_by_name: Dict[str, List[Tuple[int, float, float]]] = {}
+        # Контрольные точки (as_of, history_id, {tariff_id: (name, base_price, discount)})
+        self._checkpoints: List[Tuple[int, int, Dict[int, Tuple]]] = []
+
+    def _record_history(self, row: list) -> None:
+        row_id, name, base_price, discount = row
+        changed_at = time.time_ns()
+        self._history.append((len(self._history) + 1, row_id, name, base_price, discount, changed_at))
+        self._history_by_name.setdefault(name, []).append((changed_at, base_price, discount))
+
+    def _insert(self, name: str, base_price: float, discount: float) -> None:
+        # Итоговая цена считается до изменения состояния: ошибка не оставит полузаписанный тариф
+        final = final_price(base_price, discount)
+        row_id = next(self._ids)
+        self._rows[name] = [row_id, name, float(base_price), float(discount)]
+        self._record_history(self._rows[name])
+        insort(self._by_price, (float(base_price), row_id, name))
+        insort(self._by_final_price, (final, row_id, name))
+
+    def _update_discount(self, name: str, discount: float) -> bool:
+        row = self._rows.get(name)
+        if row is None:
+            return False
+        row_id, _, base_price, old_discount = row
+        old_key = (final_price(base_price, old_discount), row_id, name)
+        del self._by_final_price[bisect_left(self._by_final_price, old_key)]
+        row[3] = float(discount)
+        insort(self._by_final_price, (final_price(base_price, discount), row_id, name))
+        if old_discount != row[3]:
+            self._record_history(row)
+        return True
+
+    def add_tariff(self, name: str, base_price: float) -> bool:
+        with self._lock:
+            if name in self._rows:
+                print(f"Tariff '{name}' already exists")
+                return False
+            self._insert(name, base_price, 0.0)
+            return True
+
+    def set_tariff_discount(self, name: str, discount: float) -> bool:
+        with self._lock:
+            return self._update_discount(name, discount)
+
+    def bulk_add_tariffs(self, rows: List[Tuple[str, float, float]]) -> List[Tuple[str, str]]:
+        failed = []
+        with self._lock:
+            for name, base_price, discount in rows:
+                if name in self._rows:
+                    failed.append((name, "already exists"))
+                else:
+                    self._insert(name, base_price, discount)
+        return failed
+
+    def bulk_set_discounts(self, rows: List[Tuple[str, float]]) -> bool:
+        with self._lock:
+            for name, discount in rows:
+                self._update_discount(name, discount)
+        return True
+
+    def set_discount_where(self, selector: TariffSelector, discount: float) -> Optional[List[Tuple[str, float]]]:
+        if not 0 <= discount <= 100:
+            print(f"Error setting discounts: discount {discount} is out of range 0-100")
+            return None
+        with self._lock:
+            if selector.names is not None:
+                candidates = [name for name in selector.names if name in self._rows]
+            else:
+                start = 0
+                if selector.min_price is not None:
+                    start = bisect_left(self._by_price, (float(selector.min_price),))
+                end = len(self._by_price)
+                if selector.max_price is not None:
+                    end = bisect_right(self._by_price, (float(selector.max_price), float('inf')))
+                candidates = [name for _, _, name in self._by_price[start:end]]
+
+            previous = []
+            for name in candidates:
+                _, _, base_price, old_discount = self._rows[name]
+                if selector.matches(name, base_price):
+                    previous.append((name, old_discount))
+            for name, _ in previous:
+                self._update_discount(name, discount)
+            return previous
+
+    def get_tariff_by_name(self, name: str) -> Optional[Tuple]:
+        row = self._rows.get(name)
+        return tuple(row[1:]) if row is not None else None
+
+    def tariff_exists(self, name: str) -> bool:
+        return name in self._rows
+
+    def get_all_tariffs(self) -> List[Tuple]:
+        with self._lock:
+            return [tuple(self._rows[name][1:]) for _, _, name in self._by_price]
+
+    def get_tariffs_page(self, limit: int, after: Optional[Tuple] = None,
+                         name_prefix: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None) -> List[Tuple]:
+        """Страница тарифов (id, name, base_price, discount) в порядке (base_price, id)"""
+        with self._lock:
+            start = 0
+            if after is not None:
+                start = bisect_right(self._by_price, (float(after[0]), after[1]), key=_row_key)
+            if min_price is not None:
+                start = max(start, bisect_left(self._by_price, (float(min_price),)))
+            page = []
+            for position in range(start, len(self._by_price)):
+                base_price, _, name = self._by_price[position]
+                if max_price is not None and base_price > max_price:
+                    break
+                if name_prefix and not name.startswith(name_prefix):
+                    continue
+                page.append(tuple(self._rows[name]))
+                if len(page) >= limit:
+                    break
+            return page
+
+    def get_price_as_of(self, name: str, when: datetime) -> Optional[Tuple]:
+        with self._lock:
+            history = self._history_by_name.get(name, [])
+            position = bisect_right(history, to_time_ns(when), key=lambda entry: entry[0])
+            if position == 0:
+                return None
+            _, base_price, discount = history[position - 1]
+            return name, base_price, discount
+
+    def get_price_history(self, name: str) -> List[Tuple]:
+        with self._lock:
+            return [(from_time_ns(changed_at), base_price, discount)
+                    for changed_at, base_price, discount in self._history_by_name.get(name, [])]
+
+    def get_catalogue_as_of(self, when: datetime) -> List[Tuple]:
+        when_ns = to_time_ns(when)
+        with self._lock:
+            position = bisect_right(self._checkpoints, when_ns, key=lambda checkpoint: checkpoint[0])
+            tariffs = {}
+            history_id = 0
+            if position:
+                _, history_id, rows = self._checkpoints[position - 1]
+                tariffs = dict(rows)
+            for _, tariff_id, name, base_price, discount, changed_at in self._history[history_id:]:
+                if changed_at <= when_ns:
+                    tariffs[tariff_id] = (name, base_price, discount)
+            return sorted(tariffs.values(), key=lambda row: row[1])
+
+    def create_price_checkpoint(self) -> Optional[int]:
+        with self._lock:
+            if not self._history:
+                return None
+            if self._checkpoints and self._checkpoints[-1][1] == len(self._history):
+                return len(self._checkpoints)
+            # Новая точка - предыдущая плюс строки истории после нее
+            as_of, start, rows = self._checkpoints[-1] if self._checkpoints else (0, 0, {})
+            rows = dict(rows)
+            for _, tariff_id, name, base_price, discount, changed_at in self._history[start:]:
+                rows[tariff_id] = (name, base_price, discount)
+                as_of = max(as_of, changed_at)
+            self._checkpoints.append((as_of, len(self._history), rows))
+            return len(self._checkpoints)
+
+    def get_revision(self) -> Optional[int]:
+        with self._lock:
+            return len(self._history)
+
+    def get_changes_since(self, revision: int, limit: int) -> List[Tuple]:
+        with self._lock:
+            return [(history_id, name, base_price, discount)
+                    for history_id, _, name, base_price, discount, _ in
+                    self._history[max(revision, 0):max(revision, 0) + limit]]
+
+    def get_changes_at(self, revisions: List[int]) -> List[Tuple]:
+        with self._lock:
+            return [(history_id, name, base_price, discount)
+                    for history_id, _, name, base_price, discount, _ in
+                    (self._history[revision - 1] for revision in sorted(revisions)
+                     if 0 < revision <= len(self._history))]
+
+    def get_min_price_tariff(self) -> Optional[Tuple]:
+        result = self.find_cheapest(1)
+        return result[0] if result else None
+
+    def _with_final_price(self, key: Tuple[float, int, str]) -> Tuple:
+        return tuple(self._rows[key[2]][1:]) + (key[0],)
+
+    def find_cheapest(self, k: int) -> List[Tuple]:
+        with self._lock:
+            return [self._with_final_price(key) for key in self._by_final_price[:max(k, 0)]]
+
+    def find_in_price_range(self, low: float, high: float) -> List[Tuple]:
+        with self._lock:
+            start = bisect_left(self._by_final_price, (float(low),))
+            end = bisect_left(self._by_final_price, (float(high), float('inf')))
+            return [self._with_final_price(key) for key in self._by_final_price[start:end]]
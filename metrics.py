@@ -0,0 +1,305 @@
+"""
+Метрики работы программы: счетчики, гистограммы времени, журнал медленных
+запросов и профилирование сеанса.
+
+Все метрики хранятся в общем реестре REGISTRY и выгружаются в JSON или
+в текстовом формате Prometheus (REGISTRY.dump). Методы хранилищ оборачиваются
+в instrument автоматически (см. ITariffStorage).
+"""
+import json
+import reprlib
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from config import get_metrics_dump_path, get_profile_path, get_slow_query_threshold
+
+# Границы корзин гистограмм времени, в секундах
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Имя логгера журнала медленных запросов
+SLOW_QUERY_LOGGER = 'shipping.slow_queries'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _BufferedMetric:
+    """Основа метрик: значения копятся в очереди без блокировки и учитываются пачками.
+
+    deque.append потокобезопасен, поэтому на горячем пути нет захвата Lock;
+    очередь сворачивается под блокировкой при чтении или раз в FLUSH_EVERY значений.
+    """
+    FLUSH_EVERY = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = deque()
+
+    def _add(self, value) -> None:
+        pending = self._pending
+        pending.append(value)
+        if len(pending) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending = self._pending
+            while pending:
+                self._apply(pending.popleft())
+
+    def _apply(self, value) -> None:
+        raise NotImplementedError
+
+
+class Counter(_BufferedMetric):
+    """Монотонно растущий счетчик"""
+    def __init__(self):
+        super().__init__()
+        self._value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        pending = self._pending
+        pending.append(amount)
+        if len(pending) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def _apply(self, value) -> None:
+        self._value += value
+
+    @property
+    def value(self):
+        self._flush()
+        return self._value
+
+    def snapshot(self):
+        return self.value
+
+    def reset(self) -> None:
+        self._flush()
+        with self._lock:
+            self._value = 0
+
+
+class Histogram(_BufferedMetric):
+    """Распределение значений по корзинам, сумма и число наблюдений"""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__()
+        self.buckets = tuple(buckets)
+        # Последняя корзина - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    observe = _BufferedMetric._add
+
+    def _apply(self, value) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def reset(self) -> None:
+        self._flush()
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+    def snapshot(self) -> dict:
+        self._flush()
+        with self._lock:
+            return {'buckets': dict(zip(map(str, self.buckets + (float('inf'),)), self.counts)),
+                    'sum': self.sum, 'count': self.count}
+
+
+class MetricsRegistry:
+    """Именованные метрики с метками; одна метрика создается один раз и переиспользуется"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[Labels, object]] = {}
+        self._kinds: Dict[str, str] = {}
+        self._help: Dict[str, str] = {}
+
+    def _get(self, kind: str, factory, name: str, help_text: str, labels: dict):
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        with self._lock:
+            if self._kinds.setdefault(name, kind) != kind:
+                raise ValueError(f"Метрика '{name}' уже зарегистрирована как {self._kinds[name]}")
+            if help_text:
+                self._help.setdefault(name, help_text)
+            series = self._metrics.setdefault(name, {})
+            if key not in series:
+                series[key] = factory()
+            return series[key]
+
+    def counter(self, name: str, help_text: str = '', **labels) -> Counter:
+        return self._get('counter', Counter, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = '',
+                  buckets: Sequence[float] = DEFAULT_BUCKETS, **labels) -> Histogram:
+        return self._get('histogram', lambda: Histogram(buckets), name, help_text, labels)
+
+    def _series(self) -> Iterator[Tuple[str, Labels, object]]:
+        with self._lock:
+            items = [(name, labels, metric) for name, series in self._metrics.items()
+                     for labels, metric in series.items()]
+        return iter(sorted(items, key=lambda item: (item[0], item[1])))
+
+    def snapshot(self) -> dict:
+        """Значения всех метрик: {имя: [{'labels': {...}, 'value': ...}]}"""
+        result: Dict[str, list] = {}
+        for name, labels, metric in self._series():
+            result.setdefault(name, []).append({'labels': dict(labels), 'value': metric.snapshot()})
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        def format_labels(labels: Labels, extra: Labels = ()) -> str:
+            pairs = [f'{label}="{value}"' for label, value in labels + extra]
+            return '{' + ','.join(pairs) + '}' if pairs else ''
+
+        lines = []
+        described = set()
+        for name, labels, metric in self._series():
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._kinds[name]}")
+            if isinstance(metric, Histogram):
+                data = metric.snapshot()
+                cumulative = 0
+                for bound, count in data['buckets'].items():
+                    cumulative += count
+                    le = '+Inf' if bound == 'inf' else bound
+                    lines.append(f"{name}_bucket{format_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {data['sum']}")
+                lines.append(f"{name}_count{format_labels(labels)} {data['count']}")
+            else:
+                lines.append(f"{name}{format_labels(labels)} {metric.snapshot()}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str) -> None:
+        """Сохранить метрики в файл: .json - в JSON, иначе в формате Prometheus"""
+        text = self.to_json() if path.endswith('.json') else self.to_prometheus()
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+    def reset(self) -> None:
+        """Обнулить значения; сами метрики остаются зарегистрированными"""
+        for _, _, metric in self._series():
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+# Порог журнала медленных запросов в секундах; None - журнал выключен
+_slow_query_threshold = get_slow_query_threshold()
+
+
+def set_slow_query_threshold(seconds: Optional[float]) -> None:
+    global _slow_query_threshold
+    _slow_query_threshold = seconds
+
+
+def _rows_in(result) -> int:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple):
+        return 1
+    return 0
+
+
+def _log_slow_call(operation: str, elapsed: float, args: tuple) -> None:
+    # logging нужен только при включенном журнале, поэтому импортируется здесь
+    import logging
+    logging.getLogger(SLOW_QUERY_LOGGER).warning("%s: %.1f ms, args=%s", operation, elapsed * 1000,
+                                                 reprlib.repr(args))
+
+
+def instrument(func, count_rows: bool = True, **labels):
+    """Обернуть метод: время вызова, число вызовов, строк в результате и медленные вызовы"""
+    timing = REGISTRY.histogram('shipping_storage_call_seconds',
+                                'Время вызова метода хранилища, с', **labels)
+    rows = None
+    if count_rows:
+        rows = REGISTRY.counter('shipping_storage_rows_total',
+                                'Строк тарифов, возвращенных хранилищем', **labels)
+    operation = '.'.join(str(value) for value in labels.values())
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            timing.observe(elapsed)
+            threshold = _slow_query_threshold
+            if threshold is not None and elapsed >= threshold:
+                _log_slow_call(operation, elapsed, args[1:])
+        if rows is not None:
+            count = _rows_in(result)
+            if count:
+                rows.inc(count)
+        return result
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def record_error(storage: str, error: BaseException) -> None:
+    """Учесть ошибку хранилища по типу ошибки"""
+    REGISTRY.counter('shipping_storage_errors_total', 'Ошибок при обращении к хранилищу',
+                     storage=storage, error=type(error).__name__).inc()
+
+
+@contextmanager
+def profile(path: Optional[str] = None, sort: str = 'cumulative', limit: int = 30):
+    """Профилировать блок кода через cProfile.
+
+    Если указан path, статистика сохраняется в файл (для pstats или snakeviz),
+    иначе первые limit строк выводятся в stderr. Профилируется только
+    текущий поток: фоновые задачи DbExecutor в статистику не попадают.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats(sort).print_stats(limit)
+
+
+@contextmanager
+def session(profile_path: Optional[str] = None, metrics_path: Optional[str] = None):
+    """Сеанс CLI или GUI: профилирование (если задан profile_path) и выгрузка метрик по выходу.
+
+    По умолчанию пути берутся из SHIPPING_PROFILE и SHIPPING_METRICS_DUMP;
+    profile_path '-' выводит статистику профиля в stderr.
+    """
+    profile_path = profile_path or get_profile_path()
+    metrics_path = metrics_path or get_metrics_dump_path()
+    try:
+        if profile_path:
+            with profile(None if profile_path == '-' else profile_path):
+                yield
+        else:
+            yield
+    finally:
+        if metrics_path:
+            REGISTRY.dump(metrics_path)
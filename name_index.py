@@ -0,0 +1,375 @@
+"""Индекс названий тарифов для поиска по префиксу, подстроке и с опечатками.
+
+Префиксы ищутся двоичным поиском по отсортированному списку названий,
+подстроки и опечатки - по индексу триграмм (для каждой триграммы - список
+номеров названий, в которых она встречается). При установленном NumPy
+начальный индекс строится векторно: триграммы всех названий кодируются
+числами и сортируются, а списки номеров становятся срезами одного массива.
+Триграммы в конце названия дополняются нулевыми символами, поэтому
+подстроки из одного-двух символов - это отрезки кодов триграмм.
+Названия, добавленные позже, попадают в словарь триграмм на Python.
+"""
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain, islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Длина n-граммы индекса подстрок
+GRAM = 3
+# Сколько номеров из списков триграмм нечеткий поиск подсчитывает за запрос
+FUZZY_BUDGET = 20000
+# Сколько кандидатов нечеткий поиск проверяет расстоянием редактирования за запрос
+FUZZY_CANDIDATES = 512
+# Самый длинный запрос, расстояния для которого считаются векторно (бит на символ в uint64)
+MAX_VECTOR_QUERY = 64
+
+
+def _fold(text: str) -> str:
+    return text.casefold()
+
+
+def _grams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _char_masks(query: str) -> Dict[str, int]:
+    """Битовые маски позиций каждого символа в query"""
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(query):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def prefix_distance(query: str, name: str, limit: int, masks: Optional[Dict[str, int]] = None) -> int:
+    """Наименьшее расстояние Левенштейна от query до начала name.
+
+    Битово-параллельный алгоритм Майерса (вариант Хююрё для всей строки):
+    столбец таблицы расстояний хранится разностями соседних клеток в битах
+    целого числа, поэтому символ name обрабатывается за несколько операций.
+    Если расстояние больше limit, возвращается limit + 1.
+    """
+    worse = limit + 1
+    length = len(query)
+    if not length:
+        return 0
+    if masks is None:
+        masks = _char_masks(query)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative = full, 0
+    score = best = length
+    for char in name[:length + limit]:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = negative | (~(horizontal | positive) & full)
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+            if score < best:
+                best = score
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & full)
+        negative = horizontal_positive & vertical
+    return min(best, worse)
+
+
+def prefix_distances(query: str, names: Sequence[str], limit: int):
+    """prefix_distance для многих названий сразу, массивом NumPy.
+
+    Тот же алгоритм Майерса: столбцы всех названий обрабатываются одной
+    векторной операцией над uint64, поэтому запрос - не длиннее 64 символов.
+    Названия дополняются нулевыми символами, не совпадающими ни с одним
+    символом запроса, - это не уменьшает расстояние до начала названия.
+    Биты выше длины запроса не маскируются: сложение и сдвиги переносят
+    их только в старшие разряды, а читается один бит последней строки.
+    Изменения последней строки таблицы запоминаются по столбцам, и
+    расстояние считается одной накопленной суммой после цикла.
+    """
+    length = len(query)
+    worse = limit + 1
+    if not length or not names:
+        return np.zeros(len(names), dtype=np.int64)
+    width = length + limit
+    # Строки фиксированной длины NumPy обрезаются и дополняются нулевыми символами
+    chars = np.array(names, dtype=f'<U{width}').view(np.uint32).reshape(len(names), width)
+    # Маски символов запроса по коду символа; последний элемент - для всех остальных
+    masks = _char_masks(query)
+    table = np.zeros(max(map(ord, masks)) + 2, dtype=np.uint64)
+    for char, mask in masks.items():
+        table[ord(char)] = mask
+    equal_columns = table[np.minimum(chars.T, len(table) - 1)]
+
+    one = np.uint64(1)
+    last = np.uint64(1 << (length - 1))
+    positive = np.full(len(names), ~np.uint64(0), dtype=np.uint64)
+    negative = np.zeros(len(names), dtype=np.uint64)
+    increases = np.empty_like(equal_columns)
+    decreases = np.empty_like(equal_columns)
+    for column, equal in enumerate(equal_columns):
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = negative | ~(horizontal | positive)
+        horizontal_negative = positive & horizontal
+        np.bitwise_and(horizontal_positive, last, out=increases[column])
+        np.bitwise_and(horizontal_negative, last, out=decreases[column])
+        horizontal_positive = (horizontal_positive << one) | one
+        positive = (horizontal_negative << one) | ~(vertical | horizontal_positive)
+        negative = horizontal_positive & vertical
+    steps = (increases != 0).view(np.int8) - (decreases != 0).view(np.int8)
+    best = np.minimum(np.cumsum(steps, axis=0, dtype=np.int16).min(axis=0) + length, length)
+    return np.minimum(best, worse)
+
+
+class _PackedGrams:
+    """Неизменяемый индекс триграмм в массивах NumPy.
+
+    Символы кодируются номерами в алфавите названий, триграмма - числом
+    по основанию размера алфавита. Пары (триграмма, номер названия)
+    упаковываются в uint64 и сортируются одним массивом: grams - коды
+    триграмм по возрастанию, ids[starts[i]:starts[i + 1]] - возрастающие
+    номера названий с триграммой grams[i]. Триграммы начинаются с каждого
+    символа названия; после его конца стоит символ с номером 0.
+    """
+    # Код триграммы должен помещаться в старшие 32 бита ключа
+    MAX_ALPHABET = 1625
+
+    def __init__(self, alphabet: Dict[str, int], chars, owners):
+        size = len(alphabet)
+        self.alphabet = alphabet
+        # Разделитель названий имеет номер 0: триграмма с него не начинается,
+        # а после него в триграмме тоже 0, чтобы не захватить следующее название
+        valid = chars[:-2] != 0
+        last = np.where(chars[1:-1] != 0, chars[2:], 0)
+        grams = (chars[:-2] * size + chars[1:-1]) * size + last
+        keys = (grams[valid] << np.uint64(32)) | owners[:-2][valid]
+        keys.sort()
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+        self.ids = (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        self.grams, starts = np.unique(keys >> np.uint64(32), return_index=True)
+        self.starts = np.append(starts, len(self.ids))
+
+    @classmethod
+    def build(cls, folded: Sequence[str]) -> Optional['_PackedGrams']:
+        """Упакованный индекс или None, если алфавит названий слишком велик"""
+        text = np.frombuffer(('\0'.join(folded) + '\0\0').encode('utf-32-le'), dtype=np.uint32)
+        counts = np.bincount(text)
+        counts[0] = 1  # номер 0 занят разделителем, даже если название одно
+        present = np.flatnonzero(counts)
+        if len(present) > cls.MAX_ALPHABET:
+            return None
+        table = np.zeros(int(present[-1]) + 1, dtype=np.uint64)
+        table[present] = np.arange(len(present), dtype=np.uint64)
+        lengths = np.fromiter(map(len, folded), dtype=np.int64, count=len(folded))
+        lengths[-1] += 1  # второй нулевой символ в конце текста
+        owners = np.repeat(np.arange(len(folded), dtype=np.uint64), lengths + 1)[:len(text)]
+        alphabet = {chr(code): number for number, code in enumerate(present.tolist())}
+        return cls(alphabet, table[text], owners)
+
+    def posting(self, gram: str):
+        alphabet, size = self.alphabet, len(self.alphabet)
+        try:
+            code = (alphabet[gram[0]] * size + alphabet[gram[1]]) * size + alphabet[gram[2]]
+        except KeyError:
+            return None
+        position = int(np.searchsorted(self.grams, code))
+        if position == len(self.grams) or int(self.grams[position]) != code:
+            return None
+        return self.ids[self.starts[position]:self.starts[position + 1]]
+
+    def first_containing(self, text: str, limit: int) -> List[int]:
+        """Наименьшие limit номеров названий, содержащих text из одного или двух символов.
+
+        Такие триграммы занимают отрезок кодов; в каждом списке номера
+        возрастают, поэтому достаточно первых limit номеров каждого списка.
+        """
+        alphabet, size = self.alphabet, len(self.alphabet)
+        try:
+            low = alphabet[text[0]] * size * size
+            high = low + size * size
+            if len(text) == 2:
+                low += alphabet[text[1]] * size
+                high = low + size
+        except KeyError:
+            return []
+        first, end = np.searchsorted(self.grams, (low, high))
+        if first == end:
+            return []
+        positions = self.starts[first:end, None] + np.arange(limit)
+        positions = positions[positions < self.starts[first + 1:end + 1, None]]
+        return np.unique(self.ids[positions])[:limit].tolist()
+
+
+class NameIndex:
+    """Индекс названий тарифов; сравнение без учета регистра.
+
+    Добавление названия не перестраивает индекс: оно вставляется
+    в отсортированный список и в словарь триграмм.
+    """
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[str] = list(dict.fromkeys(names))
+        self._folded: List[str] = [_fold(name) for name in self._names]
+        self._ids: Dict[str, int] = {name: name_id for name_id, name in enumerate(self._names)}
+        self._sorted: List[Tuple[str, int]] = sorted(zip(self._folded, range(len(self._folded))))
+        self._grams: Dict[str, array] = {}
+        self._packed: Optional[_PackedGrams] = None
+        if np is not None and self._names:
+            self._packed = _PackedGrams.build(self._folded)
+        # Названия с номерами от packed_count добавлены после построения индекса
+        self._packed_count = len(self._names) if self._packed is not None else 0
+        if self._packed is None:
+            for name_id, folded in enumerate(self._folded):
+                self._add_grams(name_id, folded)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def _add_grams(self, name_id: int, folded: str) -> None:
+        grams = self._grams
+        for gram in _grams(folded):
+            posting = grams.get(gram)
+            if posting is None:
+                posting = grams[gram] = array('I')
+            posting.append(name_id)
+
+    def add(self, name: str) -> None:
+        if name in self._ids:
+            return
+        name_id = len(self._names)
+        folded = _fold(name)
+        self._names.append(name)
+        self._folded.append(folded)
+        self._ids[name] = name_id
+        insort(self._sorted, (folded, name_id))
+        self._add_grams(name_id, folded)
+
+    def _postings(self, gram: str) -> list:
+        """Непустые части списка номеров триграммы: из упакованного индекса и добавленные позже"""
+        parts = []
+        if self._packed is not None:
+            packed = self._packed.posting(gram)
+            if packed is not None:
+                parts.append(packed)
+        added = self._grams.get(gram)
+        if added:
+            parts.append(added)
+        return parts
+
+    def prefix(self, text: str, limit: int = 10) -> List[str]:
+        """Названия, начинающиеся с text, по алфавиту"""
+        text = _fold(text)
+        keys = self._sorted
+        position = bisect_left(keys, (text,))
+        result = []
+        while position < len(keys) and len(result) < limit and keys[position][0].startswith(text):
+            result.append(self._names[keys[position][1]])
+            position += 1
+        return result
+
+    def substring(self, text: str, limit: int = 10) -> List[str]:
+        """Названия, содержащие text, в порядке добавления.
+
+        Запрос короче триграммы ищется по отрезку кодов упакованного индекса
+        (_PackedGrams.first_containing), а названия, добавленные после его
+        построения, и все названия без NumPy просматриваются подряд.
+        """
+        text = _fold(text)
+        if not text:
+            return self._names[:limit]
+        if len(text) < GRAM:
+            found = self._packed.first_containing(text, limit) if self._packed is not None else []
+            folded = self._folded
+            added = (name_id for name_id in range(self._packed_count, len(folded)) if text in folded[name_id])
+            found.extend(islice(added, limit - len(found)))
+            return [self._names[name_id] for name_id in found]
+        postings = [self._postings(gram) for gram in _grams(text)]
+        if not all(postings):
+            return []
+        # Совпадение содержит все триграммы запроса: достаточно проверить самый короткий список
+        rarest = min(postings, key=lambda parts: sum(map(len, parts)))
+        folded = self._folded
+        matches = (name_id for name_id in chain.from_iterable(rarest) if text in folded[name_id])
+        return [self._names[name_id] for name_id in islice(matches, limit)]
+
+    def _most_shared(self, parts: list, required: int, limit: int) -> List[Tuple[int, int]]:
+        """Не больше limit номеров названий, встречающихся в parts не меньше required раз.
+
+        Пары (номер, число триграмм) по убыванию числа триграмм,
+        при равенстве - по номеру.
+        """
+        if np is not None:
+            ids, counts = np.unique(np.concatenate([np.asarray(part, dtype=np.uint32) for part in parts]),
+                                    return_counts=True)
+            keep = counts >= required
+            ids, counts = ids[keep], counts[keep]
+            order = np.lexsort((ids, -counts))[:limit]
+            return list(zip(ids[order].tolist(), counts[order].tolist()))
+        counter = Counter()
+        for part in parts:
+            counter.update(part)
+        return sorted(((name_id, shared) for name_id, shared in counter.items() if shared >= required),
+                      key=lambda item: (-item[1], item[0]))[:limit]
+
+    def fuzzy(self, text: str, limit: int = 10, max_distance: int = 2) -> List[Tuple[int, str]]:
+        """Названия, начало которых отличается от text не больше чем на max_distance правок.
+
+        Возвращает пары (расстояние, название) по возрастанию расстояния.
+        Каждая ошибка портит не больше GRAM триграмм запроса, поэтому название
+        с s общими триграммами из n отличается от запроса хотя бы на
+        ceil((n - s) / GRAM) правок. Подсчитываются самые редкие триграммы
+        в пределах FUZZY_BUDGET номеров (у слишком частой триграммы - первые
+        номера). Проверяются не больше FUZZY_CANDIDATES названий с наибольшим
+        числом общих триграмм: с NumPy - все сразу (prefix_distances), без
+        него - по одному, пока оценка не станет не меньше расстояния limit-го
+        найденного названия. Поиск ограничен по времени, поэтому среди очень
+        похожих названий может пропустить часть ближайших.
+        """
+        text = _fold(text)
+        grams = _grams(text)
+        if not grams:
+            return [(0, name) for name in self.prefix(text, limit)]
+        postings = sorted((parts for parts in map(self._postings, grams) if parts),
+                          key=lambda parts: sum(map(len, parts)))
+        selected, budget = [], FUZZY_BUDGET
+        for parts in postings:
+            size = sum(map(len, parts))
+            if selected and size > budget:
+                break
+            if size > budget:
+                parts = [part[:budget] for part in parts]
+            selected.append(parts)
+            budget -= size
+        if not selected:
+            return []
+        # Подходящее название теряет не больше GRAM * max_distance выбранных триграмм
+        required = len(selected) - GRAM * max_distance
+
+        candidates = self._most_shared(list(chain.from_iterable(selected)), required, FUZZY_CANDIDATES)
+        if np is not None and len(text) <= MAX_VECTOR_QUERY:
+            folded = [self._folded[name_id] for name_id, _ in candidates]
+            distances = prefix_distances(text, folded, max_distance).tolist()
+            return sorted((distance, self._names[name_id])
+                          for (name_id, _), distance in zip(candidates, distances)
+                          if distance <= max_distance)[:limit]
+
+        masks = _char_masks(text)
+        result: List[Tuple[int, str]] = []
+        for name_id, shared in candidates:
+            if len(result) >= limit and -(-(len(selected) - shared) // GRAM) >= result[limit - 1][0]:
+                break  # остальные кандидаты не ближе уже найденных
+            distance = prefix_distance(text, self._folded[name_id], max_distance, masks)
+            if distance <= max_distance:
+                insort(result, (distance, self._names[name_id]))
+        return result[:limit]
@@ -0,0 +1,129 @@
+"""Пакетный расчет итоговых цен для целых каталогов тарифов.
+
+Цены и скидки передаются колонками (списки, array('d') или массивы NumPy),
+а расчет задается цепочкой правил PricePipeline. При установленном NumPy
+каждое правило - одна векторная операция над всей колонкой, без NumPy
+используются колонки array('d') и цикл на Python.
+"""
+import math
+from abc import ABC, abstractmethod
+from array import array
+from typing import Iterable, Optional, Sequence
+
+from tariffs import BaseTariff, IPriceStrategy, TariffException
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Сколько знаков частного цены и шага округления считаются точными
+ROUNDING_DIGITS = 6
+
+
+def to_column(values: Iterable[float]):
+    """Преобразовать значения в колонку float64 (массив NumPy или array('d'))"""
+    if np is not None:
+        return np.asarray(values if hasattr(values, '__len__') else list(values), dtype=np.float64)
+    if isinstance(values, array) and values.typecode == 'd':
+        return values
+    return array('d', values)
+
+
+class IPriceRule(ABC):
+    """Шаг пакетного расчета цены"""
+    @abstractmethod
+    def apply(self, prices, discounts):
+        """Вернуть новую колонку цен; discounts - колонка скидок в процентах"""
+        pass
+
+
+class DiscountRule(IPriceRule):
+    """Скидка каждого тарифа из колонки discounts"""
+    def apply(self, prices, discounts):
+        if np is not None:
+            return prices * (1 - discounts / 100)
+        return array('d', [price * (1 - discount / 100) for price, discount in zip(prices, discounts)])
+
+
+class SurchargeRule(IPriceRule):
+    """Надбавка: процент от цены и/или фиксированная сумма"""
+    def __init__(self, percent: float = 0.0, fixed: float = 0.0):
+        self.percent = percent
+        self.fixed = fixed
+
+    def apply(self, prices, discounts):
+        factor = 1 + self.percent / 100
+        if np is not None:
+            return prices * factor + self.fixed
+        return array('d', [price * factor + self.fixed for price in prices])
+
+
+class RoundingRule(IPriceRule):
+    """Округление цены до шага step (по умолчанию до копеек), половина - вверх"""
+    def __init__(self, step: float = 0.01):
+        if step <= 0:
+            raise ValueError("Шаг округления должен быть положительным")
+        self.step = step
+        # Для шага 0.01 результат - число шагов, деленное на 100: ближайшее к цене
+        # в копейках значение, как в BaseTariff (55480 * 0.01 дает 554.8000000000001)
+        scale = 1 / step
+        self._divisor = scale if scale == round(scale) else None
+
+    def apply(self, prices, discounts):
+        step, divisor = self.step, self._divisor
+        # Частное сначала округляется до ROUNDING_DIGITS знаков: иначе 117.2775 / 0.01,
+        # равное в двоичной записи 11727.7499..., округлилось бы вниз
+        if np is not None:
+            steps = np.floor(np.round(prices / step, ROUNDING_DIGITS) + 0.5)
+            return steps / divisor if divisor else steps * step
+        steps = [math.floor(round(price / step, ROUNDING_DIGITS) + 0.5) for price in prices]
+        return array('d', [count / divisor for count in steps] if divisor else [count * step for count in steps])
+
+
+class StrategyRule(IPriceRule):
+    """Применение одной стратегии IPriceStrategy ко всем ценам"""
+    def __init__(self, strategy: IPriceStrategy):
+        self.strategy = strategy
+
+    def apply(self, prices, discounts):
+        return to_column(self.strategy.calculate_prices(prices))
+
+
+class PricePipeline:
+    """Цепочка правил расчета цены; по умолчанию - только скидка тарифа"""
+    def __init__(self, rules: Optional[Sequence[IPriceRule]] = None):
+        self.rules = list(rules) if rules is not None else [DiscountRule()]
+
+    def calculate(self, base_prices: Iterable[float], discounts: Optional[Iterable[float]] = None):
+        """Итоговые цены для колонок базовых цен и скидок"""
+        prices = to_column(base_prices)
+        if discounts is None:
+            discounts = np.zeros(len(prices)) if np is not None else array('d', bytes(8 * len(prices)))
+        else:
+            discounts = to_column(discounts)
+        if len(discounts) != len(prices):
+            raise TariffException("Число скидок не совпадает с числом цен")
+        self._check_discounts(discounts)
+        for rule in self.rules:
+            prices = rule.apply(prices, discounts)
+        return prices
+
+    @staticmethod
+    def _check_discounts(discounts) -> None:
+        if np is not None:
+            valid = len(discounts) == 0 or (discounts.min() >= 0 and discounts.max() <= 100)
+        else:
+            valid = all(0 <= discount <= 100 for discount in discounts)
+        if not valid:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+
+
+def calculate_final_prices(tariffs: Iterable[BaseTariff], pipeline: Optional[PricePipeline] = None):
+    """Итоговые цены для набора тарифов одним пакетным расчетом"""
+    prices = array('d')
+    discounts = array('d')
+    for tariff in tariffs:
+        prices.append(tariff.get_price())
+        discounts.append(tariff.get_discount())
+    return (pipeline or PricePipeline()).calculate(prices, discounts)
@@ -0,0 +1,59 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def _price_of(key: Tuple[float, str]) -> float:
+    return key[0]
+
+
+class PriceIndex:
+    """Упорядоченный по итоговой цене индекс названий тарифов.
+
+    Ключи (итоговая цена, название) хранятся в отсортированном списке:
+    самые дешевые тарифы и диапазон цен находятся двоичным поиском за
+    O(log n) без пересортировки, а изменение цены одного тарифа - это
+    удаление и вставка ключа.
+    """
+    def __init__(self, items: Iterable[Tuple[str, float]] = ()):
+        self._prices: Dict[str, float] = dict(items)
+        self._keys: List[Tuple[float, str]] = sorted(
+            (price, name) for name, price in self._prices.items())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._prices
+
+    def __iter__(self) -> Iterator[Tuple[float, str]]:
+        """Пары (итоговая цена, название) по возрастанию цены"""
+        return iter(self._keys)
+
+    def update(self, name: str, final_price: float) -> None:
+        """Добавить тариф или изменить его итоговую цену"""
+        old_price = self._prices.get(name)
+        if old_price == final_price:
+            return
+        if old_price is not None:
+            self._remove_key(old_price, name)
+        self._prices[name] = final_price
+        insort(self._keys, (final_price, name))
+
+    def remove(self, name: str) -> None:
+        old_price = self._prices.pop(name, None)
+        if old_price is not None:
+            self._remove_key(old_price, name)
+
+    def _remove_key(self, price: float, name: str) -> None:
+        position = bisect_left(self._keys, (price, name))
+        del self._keys[position]
+
+    def cheapest(self, k: int = 1) -> List[Tuple[float, str]]:
+        """k самых дешевых тарифов: пары (итоговая цена, название)"""
+        return self._keys[:max(k, 0)]
+
+    def in_range(self, low: float, high: float) -> List[Tuple[float, str]]:
+        """Тарифы с итоговой ценой от low до high включительно"""
+        start = bisect_left(self._keys, low, key=_price_of)
+        end = bisect_right(self._keys, high, key=_price_of)
+        return self._keys[start:end]
@@ -0,0 +1,240 @@
+"""
+Пакетный расчет стоимости перевозок: тариф x вес x расстояние со скидками за объем.
+
+Файлы перевозок (CSV с колонками tariff, weight, distance) делятся на части
+по байтовым диапазонам и обрабатываются пулом процессов. Итоговые цены
+тарифов один раз записываются в файл, который каждый процесс отображает
+в память (mmap), - таблица не копируется и не сериализуется в процессы.
+Каждая часть пишет результат в свой файл, затем файлы склеиваются по порядку,
+поэтому ни входные, ни выходные строки не держатся в памяти целиком.
+"""
+import csv
+import io
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from shipping_company import ShippingCompany
+from tariff_table import TariffTable
+from tariffs import TariffException
+
+# Цена тарифа - за килограмм груза на каждые DISTANCE_UNIT километров
+DISTANCE_UNIT = 100.0
+# Наибольший и наименьший размер части входного файла, в байтах
+MAX_SHARD_SIZE = 32 * 1024 * 1024
+MIN_SHARD_SIZE = 256 * 1024
+# Сколько частей приходится на процесс, чтобы процессы загружались равномерно
+SHARDS_PER_WORKER = 4
+
+INPUT_FIELDS = ('tariff', 'weight', 'distance')
+OUTPUT_FIELDS = ('tariff', 'weight', 'distance', 'price', 'error')
+
+
+class DiscountTier:
+    """Скидка за объем: percent процентов для грузов от min_weight кг"""
+    __slots__ = ('min_weight', 'percent')
+
+    def __init__(self, min_weight: float, percent: float):
+        if not 0 <= percent <= 100:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+        self.min_weight = min_weight
+        self.percent = percent
+
+    def __repr__(self):
+        return f"DiscountTier({self.min_weight!r}, {self.percent!r})"
+
+
+DEFAULT_TIERS = (DiscountTier(0, 0), DiscountTier(500, 5), DiscountTier(5000, 10))
+
+
+class QuoteCalculator:
+    """Стоимость перевозки по итоговой цене тарифа, весу и расстоянию"""
+    def __init__(self, tiers: Sequence[DiscountTier] = DEFAULT_TIERS):
+        tiers = sorted(tiers, key=lambda tier: tier.min_weight)
+        self._bounds = [tier.min_weight for tier in tiers]
+        self._factors = [1 - tier.percent / 100 for tier in tiers]
+
+    def quote(self, final_price: float, weight: float, distance: float) -> float:
+        if not (math.isfinite(weight) and math.isfinite(distance)):
+            raise ValueError("Вес и расстояние должны быть конечными числами")
+        if weight <= 0 or distance <= 0:
+            raise ValueError("Вес и расстояние должны быть больше 0")
+        position = bisect_right(self._bounds, weight) - 1
+        factor = self._factors[position] if position >= 0 else 1.0
+        return round(final_price * weight * distance / DISTANCE_UNIT * factor, 2)
+
+
+class SharedPriceTable:
+    """Итоговые цены и названия тарифов в файле, отображаемом в память процессов.
+
+    Формат: заголовок (число тарифов, длина блока имен), колонка итоговых
+    цен float64 и имена в UTF-8, разделенные нулевым байтом.
+    """
+    HEADER = struct.Struct('<qq')
+
+    def __init__(self, path: str, owner: bool = False):
+        self.path = path
+        self.owner = owner
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        count, names_size = self.HEADER.unpack_from(self._map, 0)
+        prices_end = self.HEADER.size + 8 * count
+        self.final_prices = memoryview(self._map)[self.HEADER.size:prices_end].cast('d')
+        names = self._map[prices_end:prices_end + names_size].decode('utf-8')
+        self.rows: Dict[str, int] = {name: row for row, name in enumerate(names.split('\0'))} if count else {}
+
+    @classmethod
+    def create(cls, table: TariffTable, directory: Optional[str] = None) -> 'SharedPriceTable':
+        """Записать итоговые цены таблицы в файл (по умолчанию в /dev/shm, если он есть)"""
+        if directory is None and os.path.isdir('/dev/shm'):
+            directory = '/dev/shm'
+        names = '\0'.join(table.names).encode('utf-8')
+        descriptor, path = tempfile.mkstemp(prefix='tariff-prices-', suffix='.bin', dir=directory)
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(cls.HEADER.pack(len(table), len(names)))
+            if len(table):
+                file.write(table.final_prices().tobytes())
+            file.write(names)
+        return cls(path, owner=True)
+
+    def price_of(self, name: str) -> Optional[float]:
+        row = self.rows.get(name)
+        return self.final_prices[row] if row is not None else None
+
+    def close(self) -> None:
+        self.final_prices.release()
+        self._map.close()
+        if self.owner:
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class QuoteReport:
+    """Итог пакетного расчета"""
+    def __init__(self, quoted: int = 0, failed: int = 0, elapsed: float = 0.0):
+        self.quoted = quoted
+        self.failed = failed
+        self.elapsed = elapsed
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.quoted + self.failed) / self.elapsed if self.elapsed else 0.0
+
+
+# Состояние процесса пула: таблица цен и калькулятор создаются один раз при запуске
+_worker_table: Optional[SharedPriceTable] = None
+_worker_calculator: Optional[QuoteCalculator] = None
+
+
+def _init_worker(table_path: str, tiers: Sequence[DiscountTier]) -> None:
+    global _worker_table, _worker_calculator
+    _worker_table = SharedPriceTable(table_path)
+    _worker_calculator = QuoteCalculator(tiers)
+
+
+def _split_line(line: str) -> List[str]:
+    if '"' in line:
+        return next(csv.reader([line]))
+    return line.split(',')
+
+
+def _quote_shard(task: Tuple[str, int, int, str]) -> Tuple[int, int]:
+    """Рассчитать строки, начинающиеся в диапазоне [start, end) файла, и записать в part_path"""
+    path, start, end, part_path = task
+    table, calculator = _worker_table, _worker_calculator
+    quoted = failed = 0
+    with open(path, 'rb') as source, open(part_path, 'w', newline='', encoding='utf-8') as target:
+        writer = csv.writer(target)
+        if start:
+            # Строка, начатая в предыдущей части, обрабатывается там
+            source.seek(start - 1)
+            source.readline()
+        position = source.tell()
+        while position < end:
+            raw = source.readline()
+            if not raw:
+                break
+            position += len(raw)
+            try:
+                line = raw.decode('utf-8').rstrip('\r\n')
+            except UnicodeDecodeError:
+                fields = _split_line(raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+                writer.writerow((fields + ['', '', ''])[:3] + ['', "Строка не в кодировке UTF-8"])
+                failed += 1
+                continue
+            if not line:
+                continue
+            fields = _split_line(line)
+            if position == len(raw) and fields[0].strip().lower() == INPUT_FIELDS[0]:
+                continue  # заголовок файла
+            try:
+                name, weight_text, distance_text = (field.strip() for field in fields)
+                weight, distance = float(weight_text), float(distance_text)
+            except ValueError:
+                writer.writerow((fields + ['', '', ''])[:3] + ['', "Неверный формат строки"])
+                failed += 1
+                continue
+            final_price = table.price_of(name)
+            try:
+                if final_price is None:
+                    raise ValueError(f"Тариф с названием '{name}' не найден")
+                price = calculator.quote(final_price, weight, distance)
+            except ValueError as e:
+                writer.writerow((name, weight_text, distance_text, '', str(e)))
+                failed += 1
+                continue
+            writer.writerow((name, weight_text, distance_text, f"{price:.2f}", ''))
+            quoted += 1
+    return quoted, failed
+
+
+def _plan_shards(paths: Sequence[str], parts_dir: str, workers: int) -> List[Tuple[str, int, int, str]]:
+    total = sum(os.path.getsize(path) for path in paths)
+    shard_size = max(MIN_SHARD_SIZE, min(MAX_SHARD_SIZE, total // (workers * SHARDS_PER_WORKER) + 1))
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, shard_size):
+            part_path = os.path.join(parts_dir, f"part-{len(tasks):06d}.csv")
+            tasks.append((path, start, min(start + shard_size, size), part_path))
+    return tasks
+
+
+def quote_files(company: ShippingCompany, paths: Sequence[str], output_path: str,
+                workers: Optional[int] = None,
+                tiers: Sequence[DiscountTier] = DEFAULT_TIERS) -> QuoteReport:
+    """Рассчитать стоимость всех перевозок из файлов paths и записать в output_path.
+
+    Строки с ошибками попадают в результат с пустой ценой и текстом ошибки.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    report = QuoteReport()
+    with SharedPriceTable.create(company.get_tariff_table()) as shared, \
+            tempfile.TemporaryDirectory(prefix='quotes-') as parts_dir:
+        tasks = _plan_shards(paths, parts_dir, workers)
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(shared.path, tuple(tiers))) as pool:
+            for quoted, failed in pool.map(_quote_shard, tasks):
+                report.quoted += quoted
+                report.failed += failed
+
+        with open(output_path, 'w', newline='', encoding='utf-8') as output:
+            csv.writer(output).writerow(OUTPUT_FIELDS)
+            for _, _, _, part_path in tasks:
+                with open(part_path, encoding='utf-8', newline='') as part:
+                    shutil.copyfileobj(part, output, io.DEFAULT_BUFFER_SIZE * 64)
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,349 @@
+"""
+HTTP/JSON-сервис для доступа к тарифам ShippingCompany.
+
+Запуск:
+    python service.py --host 127.0.0.1 --port 8080
+
+Маршруты:
+    GET  /tariffs?limit=&cursor=&prefix=&min_price=&max_price=   страница тарифов
+    GET  /tariffs/cheapest?k=5                                    самые дешевые тарифы
+    GET  /tariffs/{name}                                          тариф по названию
+    POST /tariffs             {"name": ..., "base_price": ...}    добавление тарифа
+    PUT  /tariffs/{name}/discount   {"discount": ...}             установка скидки
+    GET  /health
+
+Название cheapest занято маршрутом, поэтому тариф с таким названием через
+сервис добавить нельзя.
+
+Обращения к ShippingCompany блокирующие, поэтому выполняются в пуле потоков,
+а цикл событий только принимает и разбирает запросы. Одновременно в пуле
+выполняется не больше max_concurrency операций; если необработанных запросов
+больше max_pending, сервис сразу отвечает 503, а не копит очередь.
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from shipping_company import ShippingCompany, BaseTariff, TariffException
+
+MAX_BODY_SIZE = 1 << 20
+MAX_PAGE_SIZE = 1000
+# Названия, совпадающие с маршрутами /tariffs/...
+RESERVED_NAMES = {'cheapest'}
+
+
+class HttpError(Exception):
+    """Ошибка, возвращаемая клиенту с заданным HTTP-статусом"""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def tariff_to_dict(tariff: BaseTariff) -> dict:
+    return {
+        'name': tariff.get_name(),
+        'base_price': round(tariff.get_price(), 2),
+        'discount': round(tariff.get_discount(), 2),
+        'final_price': round(tariff.calculate_final_price(), 2),
+    }
+
+
+def encode_cursor(cursor: Optional[Tuple]) -> Optional[str]:
+    return None if cursor is None else f"{cursor[0]}:{cursor[1]}"
+
+
+def decode_cursor(text: Optional[str]) -> Optional[Tuple]:
+    if not text:
+        return None
+    try:
+        price, row_id = text.rsplit(':', 1)
+        return Decimal(price), int(row_id)
+    except (ValueError, InvalidOperation):
+        raise HttpError(400, "Неверный курсор страницы")
+
+
+class LookupBatcher:
+    """Объединяет одновременные запросы тарифов по названию.
+
+    Названия, запрошенные в течение window секунд, ищутся одним вызовом
+    в пуле потоков, а не отдельным переходом в поток на каждый запрос.
+    """
+    def __init__(self, service: 'TariffService', window: float):
+        self.service = service
+        self.window = window
+        self._waiting: Dict[str, List[asyncio.Future]] = {}
+        self._flush_scheduled = False
+
+    async def get(self, name: str) -> Optional[BaseTariff]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.setdefault(name, []).append(future)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        waiting, self._waiting = self._waiting, {}
+        self._flush_scheduled = False
+        task = asyncio.ensure_future(self.service.run_blocking(self._lookup_many, list(waiting)))
+        task.add_done_callback(lambda done: self._resolve(done, waiting))
+
+    def _lookup_many(self, names: List[str]) -> Dict[str, Optional[BaseTariff]]:
+        found = {}
+        for name in names:
+            try:
+                found[name] = self.service.company.get_tariff(name)
+            except TariffException:
+                found[name] = None
+        return found
+
+    @staticmethod
+    def _resolve(done: asyncio.Future, waiting: Dict[str, List[asyncio.Future]]) -> None:
+        error = done.exception()
+        for name, futures in waiting.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[name])
+
+
+class TariffService:
+    """Асинхронный HTTP-сервис поверх ShippingCompany"""
+    def __init__(self, company: ShippingCompany, max_concurrency: int = 8,
+                 max_pending: int = 256, batch_window: float = 0.002):
+        self.company = company
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix='tariff-service')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._max_concurrency = max_concurrency
+        self._pending = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.batcher = LookupBatcher(self, batch_window)
+
+    async def run_blocking(self, func, *args):
+        """Выполнить блокирующий вызов в пуле потоков с ограничением параллелизма"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    self._write_response(writer, 400, {'error': "Неверный запрос"}, False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    self._write_response(writer, 413, {'error': "Слишком большое тело запроса"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.dispatch(method, target, body)
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object]:
+        """Обработать запрос и вернуть (статус, JSON-ответ)"""
+        if self._pending >= self.max_pending:
+            return 503, {'error': "Сервис перегружен, повторите запрос позже"}
+        self._pending += 1
+        try:
+            url = urlsplit(target)
+            parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            return await self._route(method, parts, query, body)
+        except HttpError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            return 500, {'error': str(e)}
+        finally:
+            self._pending -= 1
+
+    async def _route(self, method: str, parts: List[str], query: Dict[str, str],
+                     body: bytes) -> Tuple[int, object]:
+        if parts == ['health'] and method == 'GET':
+            return 200, {'status': 'ok'}
+        if not parts or parts[0] != 'tariffs':
+            raise HttpError(404, "Маршрут не найден")
+
+        if len(parts) == 1 and method == 'GET':
+            return 200, await self.list_tariffs(query)
+        if len(parts) == 1 and method == 'POST':
+            return 201, await self.add_tariff(self._parse_body(body))
+        if parts == ['tariffs', 'cheapest'] and method == 'GET':
+            return 200, await self.cheapest(query)
+        if len(parts) == 2 and method == 'GET':
+            tariff = await self.batcher.get(parts[1])
+            if tariff is None:
+                raise HttpError(404, f"Тариф с названием '{parts[1]}' не найден")
+            return 200, tariff_to_dict(tariff)
+        if len(parts) == 3 and parts[2] == 'discount' and method == 'PUT':
+            return 200, await self.set_discount(parts[1], self._parse_body(body))
+        raise HttpError(405 if len(parts) <= 3 else 404, "Метод не поддерживается")
+
+    @staticmethod
+    def _parse_body(body: bytes) -> dict:
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HttpError(400, "Тело запроса должно быть JSON-объектом")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Тело запроса должно быть JSON-объектом")
+        return data
+
+    @staticmethod
+    def _number(query: Dict[str, str], key: str, convert=float, default=None):
+        if key not in query:
+            return default
+        try:
+            return convert(query[key])
+        except ValueError:
+            raise HttpError(400, f"Параметр {key} должен быть числом")
+
+    async def list_tariffs(self, query: Dict[str, str]) -> dict:
+        limit = min(self._number(query, 'limit', int, ShippingCompany.PAGE_SIZE), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise HttpError(400, "Параметр limit должен быть положительным")
+        tariffs, cursor = await self.run_blocking(
+            self.company.get_tariffs_page, limit, decode_cursor(query.get('cursor')),
+            query.get('prefix'), self._number(query, 'min_price'), self._number(query, 'max_price'))
+        return {'tariffs': [tariff_to_dict(tariff) for tariff in tariffs],
+                'next_cursor': encode_cursor(cursor)}
+
+    async def cheapest(self, query: Dict[str, str]) -> dict:
+        k = min(self._number(query, 'k', int, 1), MAX_PAGE_SIZE)
+        if k < 1:
+            raise HttpError(400, "Параметр k должен быть положительным")
+        tariffs = await self.run_blocking(self.company.find_cheapest, k)
+        return {'tariffs': [tariff_to_dict(tariff) for tariff in tariffs]}
+
+    async def add_tariff(self, data: dict) -> dict:
+        def add():
+            try:
+                tariff = BaseTariff(str(data.get('name') or '').strip(), float(data.get('base_price')))
+            except (TypeError, ValueError):
+                raise HttpError(400, "Цена должна быть числом")
+            except TariffException as e:
+                raise HttpError(400, str(e))
+            if tariff.get_name() in RESERVED_NAMES:
+                raise HttpError(400, f"Название '{tariff.get_name()}' зарезервировано")
+            try:
+                self.company.add_tariff(tariff)
+            except TariffException as e:
+                raise HttpError(409 if self.company.has_tariff(tariff.get_name()) else 500, str(e))
+            return tariff_to_dict(self.company.get_tariff(tariff.get_name()))
+
+        return await self.run_blocking(add)
+
+    async def set_discount(self, name: str, data: dict) -> dict:
+        def set_discount():
+            try:
+                discount = float(data.get('discount'))
+            except (TypeError, ValueError):
+                raise HttpError(400, "Скидка должна быть числом")
+            if not self.company.has_tariff(name):
+                raise HttpError(404, f"Тариф с названием '{name}' не найден")
+            if not 0 <= discount <= 100:
+                raise HttpError(400, "Процент скидки должен быть от 0 до 100")
+            try:
+                self.company.set_tariff_discount(name, discount)
+            except TariffException as e:
+                raise HttpError(500, str(e))
+            return tariff_to_dict(self.company.get_tariff(name))
+
+        return await self.run_blocking(set_discount)
+
+
+async def serve(company: ShippingCompany, host: str, port: int, **options) -> None:
+    service = TariffService(company, **options)
+    await service.start(host, port)
+    print(f"Сервис тарифов запущен на http://{host}:{service.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help='сколько операций с БД выполняется одновременно')
+    parser.add_argument('--max-pending', type=int, default=256,
+                        help='сколько запросов может ожидать обработки, прежде чем сервис ответит 503')
+    args = parser.parse_args()
+    company = ShippingCompany()
+    try:
+        asyncio.run(serve(company, args.host, args.port, max_concurrency=args.max_concurrency,
+                          max_pending=args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
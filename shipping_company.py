@@ -1,136 +1,664 @@
-from abc import ABC, abstractmethod
-from typing import List, Optional
-from database import Database
-
-class TariffException(Exception):
-    """Пользовательское исключение для обработки ошибок, связанных с тарифами"""
-    pass
-
-class IPriceStrategy(ABC):
-    """Интерфейс для стратегии расчета цены"""
-    @abstractmethod
-    def calculate_price(self, price: float) -> float:
-        pass
-
-class RegularPriceStrategy(IPriceStrategy):
-    """Стратегия расчета обычной цены без скидки"""
-    def calculate_price(self, price: float) -> float:
-        return price
-
-class DiscountPriceStrategy(IPriceStrategy):
-    """Стратегия расчета цены со скидкой"""
-    def __init__(self, discount_percent: float):
-        if not 0 <= discount_percent <= 100:
-            raise TariffException("Процент скидки должен быть от 0 до 100")
-        self.discount_percent = discount_percent
-
-    def calculate_price(self, price: float) -> float:
-        return price * (1 - self.discount_percent / 100)
-
-class ITariff(ABC):
-    """Интерфейс для тарифов"""
-    @abstractmethod
-    def get_name(self) -> str:
-        pass
-
-    @abstractmethod
-    def get_price(self) -> float:
-        pass
-
-    @abstractmethod
-    def calculate_final_price(self) -> float:
-        pass
-
-class BaseTariff(ITariff):
-    """Базовый класс тарифа"""
-    def __init__(self, name: str, price: float, discount_percent: float = 0):
-        if price <= 0:
-            raise TariffException("Цена не может быть отрицательной или нулевой")
-        if not name:
-            raise TariffException("Название тарифа не может быть пустым")
-    
-        self.name = name
-        self.price = price
-        self.discount_percent = discount_percent
-        self._update_price_strategy()
-
-    def _update_price_strategy(self):
-        if self.discount_percent > 0:
-            self.price_strategy = DiscountPriceStrategy(self.discount_percent)
-        else:
-            self.price_strategy = RegularPriceStrategy()
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from config import get_backend, get_snapshot_path
+from storage import ITariffStorage, TariffSelector, create_storage
+from tariffs import (
+    TariffException, IPriceStrategy, RegularPriceStrategy, DiscountPriceStrategy,
+    ITariff, BaseTariff
+)
+from tariff_table import TariffTable
+from price_index import PriceIndex
+from snapshot import CatalogueSnapshot
+from metrics import REGISTRY
 
-    def set_discount(self, discount_percent: float):
-        """Установить скидку для тарифа"""
-        if not 0 <= discount_percent <= 100:
-            raise TariffException("Процент скидки должен быть от 0 до 100")
-        self.discount_percent = discount_percent
-        self._update_price_strategy()
+if TYPE_CHECKING:
+    from name_index import NameIndex
 
-    def get_discount(self) -> float:
-        """Получить текущую скидку"""
-        return self.discount_percent
+CACHE_HITS = REGISTRY.counter('shipping_cache_lookups_total', 'Поиск тарифа по имени в кэше',
+                              result='hit')
+CACHE_MISSES = REGISTRY.counter('shipping_cache_lookups_total', result='miss')
+CACHE_RELOADS = REGISTRY.counter('shipping_cache_reloads_total', 'Полных загрузок кэша тарифов')
+CACHE_CHANGES = REGISTRY.counter('shipping_cache_changes_total', 'Измененных тарифов, примененных к кэшу')
+CACHE_SNAPSHOT_LOADS = REGISTRY.counter('shipping_cache_snapshot_loads_total',
+                                        'Загрузок кэша тарифов из снимка каталога')
 
-    def get_name(self) -> str:
-        return self.name
+class Revision(int):
+    """Ревизия изменений тарифов вместе с пропущенными номерами истории.
+
+    Номер строки истории выдается при вставке, а видна строка после фиксации
+    транзакции, поэтому при одновременной записи в MySQL строка с меньшим
+    номером может появиться позже большей. Номера ниже ревизии, которых не
+    было при чтении (gaps: номер -> момент обнаружения пропуска),
+    changes_since запрашивает снова. Везде, где нужен номер ревизии,
+    Revision - обычное целое число.
+    """
+    def __new__(cls, value: int, gaps: Optional[Dict[int, float]] = None):
+        revision = super().__new__(cls, value)
+        revision.gaps = gaps or {}
+        return revision
+
+    @property
+    def complete(self) -> int:
+        """Ревизия, до которой прочитаны все изменения, без пропусков"""
+        return min(self.gaps) - 1 if self.gaps else int(self)
+
+
+class BulkResult:
+    """Итог пакетной операции: число успешных строк и ошибки по строкам"""
+    def __init__(self):
+        self.succeeded = 0
+        self.errors: List[Tuple[int, str]] = []
 
-    def get_price(self) -> float:
-        return self.price
+    def add_error(self, row_number: int, message: str) -> None:
+        self.errors.append((row_number, message))
 
-    def calculate_final_price(self) -> float:
-        return self.price_strategy.calculate_price(self.price)
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
 
 class ShippingCompany:
     """Класс компании грузоперевозок"""
-    def __init__(self):
-        self.db = Database()
+    # Как часто (в секундах) сверять кэш тарифов с версией таблицы в БД
+    CACHE_TTL = 5.0
+    # Сколько строк пакетной операции записывается одной транзакцией
+    BULK_CHUNK_SIZE = 1000
+    # Размер страницы при постраничном чтении тарифов
+    PAGE_SIZE = 500
+    # Сколько названий возвращает поиск по умолчанию
+    SEARCH_LIMIT = 10
+    # После скольких изменений, догруженных к снимку при запуске, снимок перезаписывается
+    SNAPSHOT_STALE_CHANGES = 10000
+    # Сколько секунд ждать строку истории на месте пропущенного номера:
+    # номер мог пропасть навсегда, например при откате транзакции
+    CHANGE_GAP_TIMEOUT = 60.0
+    # Сколько пропущенных номеров запоминать (самые старые забываются)
+    MAX_CHANGE_GAPS = 500
+
+    def __init__(self, cache_ttl: float = CACHE_TTL, db: Optional[ITariffStorage] = None,
+                 snapshot_path: Optional[str] = None):
+        # Хранилище выбирается настройкой SHIPPING_DB_BACKEND, если не передано явно
+        self.db = db if db is not None else create_storage()
+        self.cache_ttl = cache_ttl
+        # Снимок из SHIPPING_SNAPSHOT относится к хранилищу из настроек, а не к переданному;
+        # хранилище в памяти у каждого процесса свое, снимок ему не нужен
+        self.snapshot_path = snapshot_path
+        if snapshot_path is None and db is None and get_backend() != 'memory':
+            self.snapshot_path = get_snapshot_path()
+        # Защищает кэш и индекс цен при обращении из нескольких потоков
+        self._lock = threading.RLock()
+        self._tariffs: Optional[Dict[str, BaseTariff]] = None
+        # Тарифы кэша, упорядоченные по итоговой цене
+        self._price_index = PriceIndex()
+        # Индекс названий для поиска; строится при первом поиске без блокировки кэша
+        self._name_index: Optional['NameIndex'] = None
+        self._name_index_lock = threading.Lock()
+        # Названия, добавленные в кэш, пока индекс строится
+        self._pending_names: Optional[List[str]] = None
+        # Ревизия хранилища, до которой изменения учтены в кэше
+        self._cache_revision: Optional[int] = None
+        self._cache_checked_at = 0.0
+
+    @staticmethod
+    def _copy_tariff(tariff: BaseTariff) -> BaseTariff:
+        return BaseTariff(tariff.get_name(), tariff.get_price(), tariff.get_discount())
+
+    def _get_cache(self) -> Dict[str, BaseTariff]:
+        """Кэш тарифов по имени; загружается при первом обращении"""
+        if self._tariffs is None or time.monotonic() - self._cache_checked_at >= self.cache_ttl:
+            with self._lock:
+                # Пока ждали блокировку, кэш мог обновить другой поток
+                if self._tariffs is None:
+                    self._load_cache()
+                elif time.monotonic() - self._cache_checked_at >= self.cache_ttl:
+                    self.refresh_cache()
+        return self._tariffs
+
+    def reload_cache(self) -> None:
+        """Полностью перечитать тарифы из базы данных"""
+        with self._lock:
+            CACHE_RELOADS.inc()
+            # Ревизия читается до тарифов: изменения между запросами просто применятся повторно
+            revision = self._read_revision()
+            tariffs_data = self.db.get_all_tariffs()
+            tariffs = {name: BaseTariff(name, float(price), float(discount))
+                       for name, price, discount in tariffs_data}
+            self._price_index = PriceIndex((name, tariff.calculate_final_price())
+                                           for name, tariff in tariffs.items())
+            if self._name_index is not None:
+                # Названия не меняются: достаточно добавить новые, удаленные отсеет поиск
+                for name in tariffs:
+                    self._name_index.add(name)
+            self._tariffs = tariffs
+            self._cache_revision = revision
+            self._cache_checked_at = time.monotonic()
+            if self.snapshot_path and revision is not None:
+                self._write_snapshot()
+
+    def _load_cache(self) -> None:
+        """Первая загрузка кэша: из снимка каталога с догрузкой изменений, иначе из хранилища"""
+        if not (self.snapshot_path and self._load_snapshot()):
+            self.reload_cache()
+
+    def _load_snapshot(self) -> bool:
+        """Загрузить кэш из снимка и применить изменения после его ревизии.
+
+        Возвращает False, если снимка нет или он не подходит к хранилищу.
+        """
+        try:
+            snapshot = CatalogueSnapshot(self.snapshot_path)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, TariffException) as e:
+            print(f"Снимок каталога не загружен: {e}")
+            return False
+        with snapshot:
+            revision = self.db.get_revision()
+            if revision is None or snapshot.revision > revision:
+                # Снимок другой базы или базы, пересозданной после его записи
+                return False
+            tariffs = {name: BaseTariff(name, price, discount)
+                       for name, price, discount in zip(snapshot.names, snapshot.prices, snapshot.discounts)}
+            final_prices = dict(zip(snapshot.names, snapshot.final_prices))
+            # Изменения применяются до построения индекса цен: он строится один раз
+            changed, revision = self.changes_since(snapshot.revision)
+        for tariff in changed:
+            tariffs[tariff.get_name()] = tariff
+            final_prices[tariff.get_name()] = tariff.calculate_final_price()
+        CACHE_SNAPSHOT_LOADS.inc()
+        CACHE_CHANGES.inc(len(changed))
+        self._price_index = PriceIndex(final_prices.items())
+        self._tariffs = tariffs
+        self._cache_revision = revision
+        self._cache_checked_at = time.monotonic()
+        if len(changed) >= self.SNAPSHOT_STALE_CHANGES:
+            self._write_snapshot()
+        return True
+
+    def _write_snapshot(self) -> None:
+        """Перезаписать снимок после загрузки кэша; ошибка записи не мешает работе"""
+        try:
+            self.save_snapshot()
+        except TariffException as e:
+            print(e)
+
+    def save_snapshot(self, path: Optional[str] = None) -> int:
+        """Записать кэш тарифов в снимок каталога (по умолчанию в snapshot_path).
+
+        Возвращает ревизию снимка: при запуске из него догружаются только
+        тарифы, измененные после нее.
+        """
+        path = path or self.snapshot_path
+        if not path:
+            raise TariffException("Не задан файл снимка каталога (SHIPPING_SNAPSHOT)")
+        with self._lock:
+            cache = self._get_cache()
+            if self._cache_revision is None:
+                raise TariffException("Ошибка при чтении ревизии тарифов из базы данных")
+            # Изменения на месте пропусков догрузит процесс, запущенный из снимка
+            revision = getattr(self._cache_revision, 'complete', self._cache_revision)
+            keys = list(self._price_index)
+            tariffs = [cache[name] for _, name in keys]
+            try:
+                CatalogueSnapshot.write(path, revision, [tariff.get_name() for tariff in tariffs],
+                                        [tariff.get_price() for tariff in tariffs],
+                                        [tariff.get_discount() for tariff in tariffs],
+                                        [final_price for final_price, _ in keys])
+            except OSError as e:
+                raise TariffException(f"Ошибка записи снимка каталога '{path}': {e}")
+            return revision
+
+    def refresh_cache(self) -> None:
+        """Применить к кэшу только тарифы, измененные с момента загрузки"""
+        with self._lock:
+            if self._tariffs is None or self._cache_revision is None:
+                self.reload_cache()
+                return
+            self._cache_checked_at = time.monotonic()
+            tariffs, revision = self.changes_since(self._cache_revision)
+            for tariff in tariffs:
+                self._store_in_cache(tariff)
+            CACHE_CHANGES.inc(len(tariffs))
+            self._cache_revision = revision
+
+    def invalidate_cache(self) -> None:
+        """Сбросить кэш; следующее обращение загрузит тарифы заново"""
+        with self._lock:
+            self._tariffs = None
+            self._price_index = PriceIndex()
+            self._name_index = None
+            self._cache_revision = None
+
+    def _loaded_cache(self) -> Optional[Dict[str, BaseTariff]]:
+        """Кэш тарифов, если он уже загружен; загрузку не запускает"""
+        return self._get_cache() if self._tariffs is not None else None
+
+    def _store_in_cache(self, tariff: BaseTariff) -> None:
+        self._tariffs[tariff.get_name()] = tariff
+        self._price_index.update(tariff.get_name(), tariff.calculate_final_price())
+        if self._name_index is not None:
+            self._name_index.add(tariff.get_name())
+        elif self._pending_names is not None:
+            self._pending_names.append(tariff.get_name())
+
+    def _cache_put(self, tariff: BaseTariff) -> None:
+        """Записать тариф в кэш и индекс цен (незагруженный кэш прочитает его из БД)"""
+        with self._lock:
+            if self._loaded_cache() is not None:
+                self._store_in_cache(tariff)
+
+    def _cache_set_discount(self, name: str, discount_percent: float) -> None:
+        with self._lock:
+            cache = self._loaded_cache()
+            tariff = cache.get(name) if cache is not None else None
+            if tariff is not None:
+                tariff.set_discount(discount_percent)
+                self._price_index.update(name, tariff.calculate_final_price())
+
+    def _lookup_tariff(self, name: str) -> Optional[BaseTariff]:
+        """Найти тариф в кэше, а при промахе - точечным запросом к БД"""
+        cache = self._get_cache()
+        tariff = cache.get(name)
+        if tariff is not None:
+            CACHE_HITS.inc()
+        else:
+            CACHE_MISSES.inc()
+            tariff_data = self.db.get_tariff_by_name(name)
+            if tariff_data:
+                # Тариф добавлен другим клиентом после загрузки кэша
+                tariff = BaseTariff(tariff_data[0], float(tariff_data[1]), float(tariff_data[2]))
+                self._cache_put(tariff)
+        return tariff
 
     def has_tariff(self, name: str) -> bool:
         """Проверка существования тарифа с таким именем"""
-        tariffs = self.db.get_all_tariffs()
-        return any(tariff[0] == name for tariff in tariffs)
+        return self._lookup_tariff(name) is not None
 
     def get_tariff(self, name: str) -> Optional[BaseTariff]:
         """Получить тариф по имени"""
-        tariffs = self.db.get_all_tariffs()
-        for tariff_data in tariffs:
-            if tariff_data[0] == name:
-                return BaseTariff(tariff_data[0], float(tariff_data[1]), float(tariff_data[2]))
-        raise TariffException(f"Тариф с названием '{name}' не найден")
+        tariff = self._lookup_tariff(name)
+        if tariff is None:
+            raise TariffException(f"Тариф с названием '{name}' не найден")
+        return self._copy_tariff(tariff)
 
     def add_tariff(self, tariff: BaseTariff) -> None:
         """Добавление нового тарифа"""
         if not isinstance(tariff, BaseTariff):
             raise TariffException("Неверный тип тарифа")
         
-        if self.has_tariff(tariff.get_name()):
+        # Полный кэш ради одной проверки не загружаем: дубликат отклонит и индекс БД
+        cache = self._loaded_cache()
+        if cache is not None and tariff.get_name() in cache:
             raise TariffException(f"Тариф с названием '{tariff.get_name()}' уже существует")
-        
+
+        # Дубликат, добавленный другим клиентом, отклонит уникальный индекс в БД
         success = self.db.add_tariff(tariff.get_name(), tariff.get_price())
         if not success:
+            # Точечный запрос: кэш из-за ошибки вставки не загружается
+            if self.db.tariff_exists(tariff.get_name()):
+                raise TariffException(f"Тариф с названием '{tariff.get_name()}' уже существует")
             raise TariffException("Ошибка при добавлении тарифа в базу данных")
 
+        # В БД тариф создается без скидки, кэш должен совпадать с ней
+        self._cache_put(BaseTariff(tariff.get_name(), tariff.get_price()))
+
     def set_tariff_discount(self, name: str, discount_percent: float) -> None:
         """Установка скидки для тарифа"""
-        if not self.has_tariff(name):
-            raise TariffException(f"Тариф с названием '{name}' не найден")
-        
         if not 0 <= discount_percent <= 100:
             raise TariffException("Процент скидки должен быть от 0 до 100")
-        
+
+        # Существование проверяется только при неудаче: UPDATE по имени идет по индексу
         success = self.db.set_tariff_discount(name, discount_percent)
         if not success:
+            if not self.db.tariff_exists(name):
+                raise TariffException(f"Тариф с названием '{name}' не найден")
+            raise TariffException("Ошибка при установке скидки в базе данных")
+
+        self._cache_set_discount(name, discount_percent)
+
+    def set_discount_where(self, selector: TariffSelector, discount_percent: float) -> List[Tuple[str, float]]:
+        """Установить скидку всем тарифам, отобранным селектором, одной транзакцией.
+
+        Возвращает прежние скидки (название, скидка) измененных тарифов:
+        их число - количество затронутых тарифов, а по ним скидки можно вернуть.
+        """
+        if not 0 <= discount_percent <= 100:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+
+        previous = self.db.set_discount_where(selector, discount_percent)
+        if previous is None:
             raise TariffException("Ошибка при установке скидки в базе данных")
 
+        with self._lock:
+            for name, _ in previous:
+                self._cache_set_discount(name, discount_percent)
+        return previous
+
+    @staticmethod
+    def _chunks(rows: Iterable[Sequence], chunk_size: int):
+        """Нумерованные строки (с 1) порциями по chunk_size, без чтения всего источника"""
+        numbered = enumerate(rows, 1)
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def bulk_add_tariffs(self, rows: Iterable[Sequence],
+                         chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Пакетное добавление тарифов из строк (название, цена[, скидка]).
+
+        Строки проверяются по правилам BaseTariff; ошибочные строки попадают
+        в отчет и не мешают добавлению остальных.
+        """
+        result = BulkResult()
+        cache = self._get_cache()
+        seen = set()
+        for chunk in self._chunks(rows, chunk_size):
+            valid = {}
+            for row_number, row in chunk:
+                try:
+                    name, price, *rest = row
+                except (TypeError, ValueError):
+                    result.add_error(row_number, "Неверный формат строки")
+                    continue
+                try:
+                    name = str(name).strip() if name is not None else ""
+                    discount = float(rest[0]) if rest and rest[0] not in (None, "") else 0.0
+                    tariff = BaseTariff(name, float(price), discount)
+                    tariff.set_discount(discount)
+                except (TypeError, ValueError):
+                    result.add_error(row_number, "Цена и скидка должны быть числами")
+                    continue
+                except TariffException as e:
+                    result.add_error(row_number, str(e))
+                    continue
+                if name in seen or name in cache:
+                    result.add_error(row_number, f"Тариф с названием '{name}' уже существует")
+                    continue
+                seen.add(name)
+                valid[name] = (row_number, tariff)
+
+            failed = self.db.bulk_add_tariffs(
+                [(name, tariff.get_price(), tariff.get_discount()) for name, (_, tariff) in valid.items()])
+            for name, message in failed:
+                row_number, _ = valid.pop(name)
+                if message == "already exists":
+                    message = f"Тариф с названием '{name}' уже существует"
+                result.add_error(row_number, message)
+            for _, tariff in valid.values():
+                self._cache_put(tariff)
+            result.succeeded += len(valid)
+
+        result.errors.sort()
+        return result
+
+    def bulk_set_discounts(self, rows: Iterable[Sequence],
+                           chunk_size: int = BULK_CHUNK_SIZE) -> BulkResult:
+        """Пакетная установка скидок из строк (название, скидка)"""
+        result = BulkResult()
+        for chunk in self._chunks(rows, chunk_size):
+            valid = []
+            for row_number, row in chunk:
+                try:
+                    name, discount = row
+                    name = str(name).strip() if name is not None else ""
+                    discount = float(discount)
+                except (TypeError, ValueError):
+                    result.add_error(row_number, "Неверный формат строки")
+                    continue
+                if not 0 <= discount <= 100:
+                    result.add_error(row_number, "Процент скидки должен быть от 0 до 100")
+                    continue
+                if self._lookup_tariff(name) is None:
+                    result.add_error(row_number, f"Тариф с названием '{name}' не найден")
+                    continue
+                valid.append((row_number, name, discount))
+
+            # При повторе имени действует последняя скидка: UPDATE выполняются по порядку
+            if not self.db.bulk_set_discounts([(name, discount) for _, name, discount in valid]):
+                for row_number, _, _ in valid:
+                    result.add_error(row_number, "Ошибка при установке скидки в базе данных")
+                continue
+            for _, name, discount in valid:
+                self._cache_set_discount(name, discount)
+            result.succeeded += len(valid)
+
+        result.errors.sort()
+        return result
+
     def get_all_tariffs(self) -> List[BaseTariff]:
         """Получить список всех тарифов"""
-        tariffs_data = self.db.get_all_tariffs()
-        return [BaseTariff(name, float(price), float(discount)) 
-                for name, price, discount in tariffs_data]
+        tariffs = sorted(self._get_cache().values(), key=lambda tariff: tariff.get_price())
+        return [self._copy_tariff(tariff) for tariff in tariffs]
+
+    def get_tariff_table(self, page_size: int = PAGE_SIZE,
+                         name_prefix: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None) -> TariffTable:
+        """Все (или отобранные фильтром) тарифы в компактной колоночной таблице.
+
+        Строки читаются постранично и сразу раскладываются по колонкам,
+        без создания объекта BaseTariff на каждый тариф.
+        """
+        table = TariffTable()
+        cursor = None
+        while True:
+            rows = self.db.get_tariffs_page(page_size, cursor, name_prefix, min_price, max_price)
+            for _, name, price, discount in rows:
+                table.append(name, float(price), float(discount))
+            if len(rows) < page_size:
+                return table
+            cursor = (rows[-1][2], rows[-1][0])
+
+    def get_tariffs_page(self, limit: int = PAGE_SIZE, cursor: Optional[Tuple] = None,
+                         name_prefix: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None) -> Tuple[List[BaseTariff], Optional[Tuple]]:
+        """Страница тарифов по возрастанию цены и курсор следующей страницы.
+
+        Курсор равен None, если страница последняя.
+        """
+        rows = self.db.get_tariffs_page(limit, cursor, name_prefix, min_price, max_price)
+        tariffs = [BaseTariff(name, float(price), float(discount)) for _, name, price, discount in rows]
+        next_cursor = (rows[-1][2], rows[-1][0]) if len(rows) == limit else None
+        return tariffs, next_cursor
+
+    def iter_tariffs(self, page_size: int = PAGE_SIZE,
+                     name_prefix: Optional[str] = None,
+                     min_price: Optional[float] = None,
+                     max_price: Optional[float] = None) -> Iterator[BaseTariff]:
+        """Перебрать тарифы по возрастанию цены, загружая их постранично"""
+        cursor = None
+        while True:
+            tariffs, cursor = self.get_tariffs_page(page_size, cursor, name_prefix, min_price, max_price)
+            yield from tariffs
+            if cursor is None:
+                return
+
+    def build_name_index(self) -> 'NameIndex':
+        """Индекс названий для search_tariffs; при первом вызове строится.
+
+        Построение на 1 млн названий занимает секунды, поэтому кэш на это
+        время не блокируется: индекс строится по списку названий, а тарифы,
+        добавленные тем временем, дописываются в него после построения.
+        Можно вызвать заранее в фоновом потоке (has_name_index).
+        """
+        index = self._name_index
+        if index is not None:
+            return index
+        with self._name_index_lock:
+            if self._name_index is not None:
+                return self._name_index
+            with self._lock:
+                cache = self._get_cache()
+                names = list(cache)
+                self._pending_names = []
+            # name_index загружает NumPy, поэтому импортируется при первом поиске
+            from name_index import NameIndex
+            index = NameIndex(names)
+            with self._lock:
+                # После полной перезагрузки кэша за время построения дописываются все названия
+                added = self._pending_names if self._tariffs is cache else list(self._tariffs or ())
+                self._pending_names = None
+                for name in added:
+                    index.add(name)
+                self._name_index = index
+            return index
+
+    def has_name_index(self) -> bool:
+        """Построен ли индекс названий: тогда search_tariffs не ждет построения"""
+        return self._name_index is not None
+
+    def search_tariffs(self, query: str, limit: int = SEARCH_LIMIT, fuzzy: bool = True) -> List[str]:
+        """Названия тарифов для строки поиска, без учета регистра.
+
+        Сначала идут названия, начинающиеся с query, затем содержащие его,
+        а если совпадений меньше limit и fuzzy - похожие названия с опечатками.
+        """
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+        index = self.build_name_index()
+        with self._lock:
+            cache = self._get_cache()
+            result = []
+            seen = set()
+
+            def extend(names: Iterable[str]) -> None:
+                for name in names:
+                    if len(result) < limit and name not in seen and name in cache:
+                        seen.add(name)
+                        result.append(name)
+
+            extend(index.prefix(query, limit))
+            if len(result) < limit:
+                extend(index.substring(query, limit + len(result)))
+            if len(result) < limit and fuzzy:
+                extend(name for _, name in index.fuzzy(query, limit))
+            return result
+
+    def _read_revision(self) -> Optional[Revision]:
+        """Текущая ревизия хранилища вместе с еще не видимыми номерами ниже нее.
+
+        Среди последних MAX_CHANGE_GAPS номеров истории могут быть изменения
+        транзакций, еще не зафиксированных к моменту чтения: они становятся
+        пропусками ревизии, и changes_since запросит их снова.
+        """
+        revision = self.db.get_revision()
+        if revision is None:
+            return None
+        low = max(revision - self.MAX_CHANGE_GAPS, 0)
+        visible = {row[0] for row in self.db.get_changes_since(low, revision - low)}
+        now = time.monotonic()
+        return Revision(revision, {number: now for number in range(low + 1, revision + 1)
+                                   if number not in visible})
+
+    def get_revision(self) -> int:
+        """Текущая ревизия тарифов: растет с каждым добавлением тарифа и изменением цены или скидки"""
+        revision = self._read_revision()
+        if revision is None:
+            raise TariffException("Ошибка при чтении ревизии тарифов из базы данных")
+        return revision
+
+    def changes_since(self, revision: int) -> Tuple[List[BaseTariff], Revision]:
+        """Тарифы, измененные после revision, и ревизия, до которой они прочитаны.
+
+        Каждый тариф возвращается один раз, в последнем состоянии, в порядке
+        последнего изменения. Полученную ревизию (Revision) передают
+        в следующий вызов: она помнит номера истории, пропущенные при чтении,
+        и строки, появившиеся на их месте позже, вернутся в следующих вызовах.
+        Пропуск перестает запрашиваться через CHANGE_GAP_TIMEOUT секунд.
+        """
+        now = time.monotonic()
+        gaps = {number: since for number, since in getattr(revision, 'gaps', {}).items()
+                if now - since < self.CHANGE_GAP_TIMEOUT}
+        changed: Dict[str, BaseTariff] = {}
+        # Строки на месте пропусков старше строк после ревизии, поэтому применяются первыми
+        for row_revision, name, price, discount in self.db.get_changes_at(sorted(gaps)):
+            del gaps[row_revision]
+            changed[name] = BaseTariff(name, float(price), float(discount))
+        revision = int(revision)
+        while True:
+            rows = self.db.get_changes_since(revision, self.PAGE_SIZE)
+            for row_revision, name, price, discount in rows:
+                gaps.update(dict.fromkeys(range(max(revision + 1, row_revision - self.MAX_CHANGE_GAPS),
+                                                row_revision), now))
+                changed.pop(name, None)
+                changed[name] = BaseTariff(name, float(price), float(discount))
+                revision = row_revision
+            if len(rows) < self.PAGE_SIZE:
+                break
+        if len(gaps) > self.MAX_CHANGE_GAPS:
+            gaps = dict(sorted(gaps.items())[-self.MAX_CHANGE_GAPS:])
+        return list(changed.values()), Revision(revision, gaps)
+
+    def price_as_of(self, name: str, when: datetime) -> BaseTariff:
+        """Тариф с ценой и скидкой, действовавшими в момент when"""
+        tariff_data = self.db.get_price_as_of(name, when)
+        if tariff_data is None:
+            raise TariffException(f"Тариф с названием '{name}' на {when:%Y-%m-%d %H:%M:%S} не найден")
+        return BaseTariff(tariff_data[0], float(tariff_data[1]), float(tariff_data[2]))
+
+    def get_price_history(self, name: str) -> List[Tuple[datetime, float, float]]:
+        """Изменения тарифа по времени: (момент, базовая цена, скидка)"""
+        return [(changed_at, float(price), float(discount))
+                for changed_at, price, discount in self.db.get_price_history(name)]
+
+    def catalogue_as_of(self, when: datetime) -> List[BaseTariff]:
+        """Все тарифы в том виде, в каком они были в момент when, по возрастанию цены"""
+        return [BaseTariff(name, float(price), float(discount))
+                for name, price, discount in self.db.get_catalogue_as_of(when)]
+
+    def create_price_checkpoint(self) -> Optional[int]:
+        """Сохранить контрольную точку истории цен.
+
+        Каталог на прошлый момент собирается из ближайшей предыдущей точки
+        и изменений после нее, поэтому точки стоит создавать регулярно.
+        """
+        return self.db.create_price_checkpoint()
+
+    def find_cheapest(self, k: int = 1) -> List[BaseTariff]:
+        """k тарифов с минимальной итоговой ценой.
+
+        При загруженном кэше ответ дает индекс цен в памяти, иначе - индекс
+        final_price хранилища, без загрузки всех тарифов. Равные цены в обоих
+        случаях упорядочены по названию.
+        """
+        if k < 1:
+            raise TariffException("Число тарифов должно быть положительным")
+        with self._lock:
+            cache = self._loaded_cache()
+            if cache is not None:
+                return [self._copy_tariff(cache[name]) for _, name in self._price_index.cheapest(k)]
+        rows = self.db.find_cheapest(k)
+        if len(rows) == k:
+            # Хранилище упорядочивает равные цены по id: тарифы с ценой последнего
+            # места дочитываются, чтобы выбрать из них первые по названию, как индекс цен
+            boundary = rows[-1][3]
+            rows = [row for row in rows if row[3] != boundary] + self.db.find_in_price_range(boundary, boundary)
+        return self._tariffs_from_rows(sorted(rows, key=self._price_order)[:k])
+
+    def find_in_price_range(self, low: float, high: float) -> List[BaseTariff]:
+        """Тарифы с итоговой ценой от low до high по возрастанию цены"""
+        with self._lock:
+            cache = self._loaded_cache()
+            if cache is not None:
+                return [self._copy_tariff(cache[name]) for _, name in self._price_index.in_range(low, high)]
+        return self._tariffs_from_rows(sorted(self.db.find_in_price_range(low, high), key=self._price_order))
+
+    @staticmethod
+    def _price_order(row: Tuple) -> Tuple[float, str]:
+        """Порядок строк (name, base_price, discount, final_price) как в PriceIndex"""
+        return float(row[3]), row[0]
+
+    @staticmethod
+    def _tariffs_from_rows(rows: List[Tuple]) -> List[BaseTariff]:
+        return [BaseTariff(name, float(price), float(discount)) for name, price, discount, *_ in rows]
 
     def find_min_price_tariff(self) -> Optional[BaseTariff]:
         """Найти тариф с минимальной стоимостью"""
-        min_tariff = self.db.get_min_price_tariff()
-        if min_tariff:
-            return BaseTariff(min_tariff[0], float(min_tariff[1]), float(min_tariff[2]))
-        return None
+        cheapest = self.find_cheapest(1)
+        return cheapest[0] if cheapest else None
@@ -1,3 +1,5 @@
+from itertools import chain
+
 from shipping_company import ShippingCompany, BaseTariff, TariffException
 
 
@@ -44,13 +46,14 @@ def set_tariff_discount(company: ShippingCompany):
     print("\n--- Установка скидки на существующий тариф ---")
     
     # Показываем список существующих тарифов
-    tariffs = company.get_all_tariffs()
-    if not tariffs:
+    tariffs = company.iter_tariffs()
+    first = next(tariffs, None)
+    if first is None:
         print("Ошибка: Нет доступных тарифов.")
         return
 
     print("\nСписок доступных тарифов:")
-    for i, tariff in enumerate(tariffs, 1):
+    for i, tariff in enumerate(chain([first], tariffs), 1):
         print(f"{i}. {tariff.get_name()} (текущая скидка: {round(tariff.get_discount(), 2)}%)")
 
     while True:
@@ -73,16 +76,17 @@ def set_tariff_discount(company: ShippingCompany):
 
 def show_all_tariffs(company: ShippingCompany):
     print("\n--- Список всех тарифов ---")
-    tariffs = company.get_all_tariffs()
-    if not tariffs:
+    tariffs = company.iter_tariffs()
+    first = next(tariffs, None)
+    if first is None:
         print("Список тарифов пуст.")
         return
     
-    for i, tariff in enumerate(tariffs, 1):
+    for i, tariff in enumerate(chain([first], tariffs), 1):
         print(f"{i}. Название: {tariff.get_name()}")
         print(f"   Базовая цена: {tariff.get_price():.2f} руб.")
         print(f"   Скидка: {tariff.get_discount():.2f}%")
-        print(f"   Итоговая цена: {tariff.calculate_final_price():.2f} руб.")
+        print(f"   Итоговая цена: {tariff.format_final_price()} руб.")
         print("   ----------------------")
 
 def find_min_price_tariff(company: ShippingCompany):
@@ -93,6 +97,6 @@ def find_min_price_tariff(company: ShippingCompany):
         print(f"Название: {min_tariff.get_name()}")
         print(f"Базовая цена: {min_tariff.get_price():.2f} руб.")
         print(f"Скидка: {min_tariff.get_discount():.2f}%")
-        print(f"Итоговая цена: {min_tariff.calculate_final_price():.2f} руб.")
+        print(f"Итоговая цена: {min_tariff.format_final_price()} руб.")
     except TariffException as e:
         print(f"Ошибка: {e}")
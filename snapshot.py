@@ -0,0 +1,95 @@
+"""
+Снимок каталога тарифов в файле для быстрого запуска процессов.
+
+ShippingCompany записывает в снимок весь кэш тарифов вместе с ревизией
+хранилища, до которой он учтен. Новый процесс отображает файл в память
+(mmap) и читает колонки цен прямо из него вместо запроса ко всем тарифам
+хранилища, а затем догружает только тарифы, измененные после ревизии
+снимка (ShippingCompany.changes_since). Снимок экономит только чтение
+из хранилища: объекты тарифов и индекс цен кэша процесс строит сам.
+
+Формат: заголовок (сигнатура, версия формата, ревизия, число тарифов,
+длина блока имен), колонки float64 итоговых цен, базовых цен и скидок
+и имена в UTF-8, разделенные нулевым байтом. Строки упорядочены
+по итоговой цене, как индекс цен ShippingCompany.
+"""
+import mmap
+import os
+from contextlib import suppress
+import struct
+from array import array
+from typing import Iterator, List, Sequence, Tuple
+
+from tariffs import TariffException
+
+SIGNATURE = b'TARIFFS\0'
+FORMAT_VERSION = 1
+
+
+class CatalogueSnapshot:
+    """Снимок каталога, отображенный в память только для чтения.
+
+    Колонки final_prices, prices и discounts - представления memoryview
+    над отображенным файлом; их можно передавать в NumPy без копирования.
+    """
+    HEADER = struct.Struct('<8sqqqq')
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            signature, version, self.revision, count, names_size = self.HEADER.unpack_from(self._map, 0)
+            if signature != SIGNATURE or version != FORMAT_VERSION:
+                raise TariffException(f"Файл '{path}' не является снимком каталога версии {FORMAT_VERSION}")
+            columns_end = self.HEADER.size + 3 * 8 * count
+            if len(self._map) != columns_end + names_size:
+                raise TariffException(f"Снимок каталога '{path}' поврежден")
+        except struct.error:
+            self._map.close()
+            raise TariffException(f"Снимок каталога '{path}' поврежден")
+        except TariffException:
+            self._map.close()
+            raise
+        size = 8 * count
+        with memoryview(self._map) as view:
+            self.final_prices, self.prices, self.discounts = (
+                view[start:start + size].cast('d')
+                for start in (self.HEADER.size, self.HEADER.size + size, self.HEADER.size + 2 * size))
+        self.names: List[str] = self._map[columns_end:].decode('utf-8').split('\0') if count else []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def rows(self) -> Iterator[Tuple[str, float, float, float]]:
+        """Строки снимка (название, базовая цена, скидка, итоговая цена) по возрастанию итоговой цены"""
+        return zip(self.names, self.prices, self.discounts, self.final_prices)
+
+    @classmethod
+    def write(cls, path: str, revision: int, names: Sequence[str], prices: Sequence[float],
+              discounts: Sequence[float], final_prices: Sequence[float]) -> None:
+        """Записать снимок; файл заменяется целиком, читатели видят старый или новый снимок"""
+        blob = '\0'.join(names).encode('utf-8')
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'wb') as file:
+                file.write(cls.HEADER.pack(SIGNATURE, FORMAT_VERSION, revision, len(names), len(blob)))
+                for column in (final_prices, prices, discounts):
+                    file.write(array('d', column).tobytes())
+                file.write(blob)
+            os.replace(temporary, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temporary)
+            raise
+
+    def close(self) -> None:
+        for column in (self.final_prices, self.prices, self.discounts):
+            column.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,572 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from config import get_sqlite_path, get_pool_size
+from connection_pool import ConnectionPool, PoolError
+from metrics import record_error
+from storage import ITariffStorage, TariffSelector, from_time_ns, to_time_ns
+
+# Ошибки, после которых методы SQLiteDatabase возвращают пустой результат
+DB_ERRORS = (sqlite3.Error, PoolError)
+
+
+def is_duplicate_name(error: Exception) -> bool:
+    """Нарушена уникальность имени тарифа, а не другое ограничение таблицы"""
+    return isinstance(error, sqlite3.IntegrityError) and 'tariffs.name' in str(error)
+
+# История цен и контрольные точки, как в Database; время - наносекунды time.time_ns()
+HISTORY_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS tariff_price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tariff_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        base_price REAL NOT NULL,
+        discount REAL NOT NULL,
+        changed_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_price_history_name ON tariff_price_history (name, changed_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_price_history_tariff ON tariff_price_history (tariff_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_price_history_changed_at ON tariff_price_history (changed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS tariff_price_checkpoints (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        history_id INTEGER NOT NULL,
+        as_of INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_price_checkpoints_as_of ON tariff_price_checkpoints (as_of)",
+    """
+    CREATE TABLE IF NOT EXISTS tariff_price_checkpoint_rows (
+        checkpoint_id INTEGER NOT NULL,
+        tariff_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        base_price REAL NOT NULL,
+        discount REAL NOT NULL,
+        PRIMARY KEY (checkpoint_id, tariff_id)
+    )
+    """,
+    """
+    INSERT INTO tariff_price_history (tariff_id, name, base_price, discount, changed_at)
+    SELECT id, name, base_price, discount, updated_at FROM tariffs
+    WHERE NOT EXISTS (SELECT 1 FROM tariff_price_history)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tariffs_history_insert AFTER INSERT ON tariffs
+    BEGIN
+        INSERT INTO tariff_price_history (tariff_id, name, base_price, discount, changed_at)
+        VALUES (NEW.id, NEW.name, NEW.base_price, NEW.discount, NEW.updated_at);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tariffs_history_update AFTER UPDATE OF base_price, discount ON tariffs
+    WHEN OLD.base_price IS NOT NEW.base_price OR OLD.discount IS NOT NEW.discount
+    BEGIN
+        INSERT INTO tariff_price_history (tariff_id, name, base_price, discount, changed_at)
+        VALUES (NEW.id, NEW.name, NEW.base_price, NEW.discount, NEW.updated_at);
+    END
+    """,
+]
+
+# Итоговая цена точно в целых копейках и сотых долях процента, с округлением
+# половины вверх - как ROUND над DECIMAL в MySQL и BaseTariff; ROUND над REAL
+# изредка ошибается на копейку из-за двоичного представления цены
+FINAL_PRICE_SQL = """
+((CAST(ROUND(base_price * 100) AS INTEGER) * (10000 - CAST(ROUND(discount * 100) AS INTEGER)) + 5000)
+    / 10000 / 100.0)
+"""
+
+LATEST_HISTORY_ROWS = """
+SELECT h.tariff_id, h.name, h.base_price, h.discount
+FROM tariff_price_history h
+JOIN (
+    SELECT tariff_id, MAX(id) AS id
+    FROM tariff_price_history
+    WHERE id > ? AND changed_at <= ?
+    GROUP BY tariff_id
+) latest ON h.id = latest.id
+"""
+
+
+class SQLiteDatabase(ITariffStorage):
+    """Хранилище тарифов в файле SQLite.
+
+    База работает в режиме WAL (читатели не блокируются записью), запросы -
+    постоянные строки с параметрами, поэтому sqlite3 берет их из кэша
+    подготовленных выражений соединения.
+    """
+    STATEMENT_CACHE_SIZE = 256
+    # Версия схемы в PRAGMA user_version; увеличивается при каждом изменении схемы
+    SCHEMA_VERSION = 2
+    # Версия, в которой final_price стал считаться в целых копейках
+    EXACT_FINAL_PRICE_VERSION = 2
+    # Сколько имен селектора подставляется в одно условие IN
+    NAMES_PER_STATEMENT = 500
+
+    def __init__(self, path: Optional[str] = None, pool_size: Optional[int] = None):
+        self.path = path or get_sqlite_path()
+        # Каждое соединение с ':memory:' - отдельная база, поэтому пул из одного
+        self.pool_size = 1 if self.path == ':memory:' else (pool_size or get_pool_size())
+        self.pool = None
+        self.connect()
+        if not self.schema_is_current():
+            self.create_tables()
+
+    def _open_connection(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                     cached_statements=self.STATEMENT_CACHE_SIZE)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @staticmethod
+    def _ping(connection):
+        connection.execute("SELECT 1")
+
+    def connect(self):
+        self.pool = ConnectionPool(self._open_connection, self.pool_size, ping=self._ping)
+
+    def schema_version(self) -> int:
+        """Версия схемы из PRAGMA user_version; 0 - новая база"""
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("PRAGMA user_version")
+                return cursor.fetchone()[0]
+        except DB_ERRORS:
+            return 0
+
+    def schema_is_current(self) -> bool:
+        return self.schema_version() >= self.SCHEMA_VERSION
+
+    @contextmanager
+    def cursor(self):
+        """Курсор на соединении из пула; по выходу транзакция фиксируется или откатывается"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    yield cursor
+                    connection.commit()
+                except BaseException:
+                    connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+        except DB_ERRORS as e:
+            record_error(type(self).__name__, e)
+            raise
+
+    def _tariffs_table_sql(self, table: str) -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            base_price REAL NOT NULL,
+            discount REAL NOT NULL DEFAULT 0 CHECK (discount BETWEEN 0 AND 100),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at INTEGER NOT NULL DEFAULT 0,
+            final_price REAL GENERATED ALWAYS AS {FINAL_PRICE_SQL.strip()} STORED
+        )
+        """
+
+    def _rebuild_tariffs_table(self, cursor) -> None:
+        """Пересоздать tariffs с новым выражением final_price.
+
+        Генерируемый столбец нельзя изменить через ALTER TABLE, поэтому строки
+        копируются в новую таблицу; индексы и триггеры истории, удаленные
+        вместе со старой таблицей, создаются заново в create_tables.
+        """
+        cursor.execute(self._tariffs_table_sql('tariffs_rebuilt'))
+        cursor.execute("""
+        INSERT INTO tariffs_rebuilt (id, name, base_price, discount, created_at, updated_at)
+        SELECT id, name, base_price, discount, created_at, updated_at FROM tariffs
+        """)
+        cursor.execute("DROP TABLE tariffs")
+        cursor.execute("ALTER TABLE tariffs_rebuilt RENAME TO tariffs")
+
+    def create_tables(self):
+        version = self.schema_version()
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("BEGIN IMMEDIATE")
+                if 0 < version < self.EXACT_FINAL_PRICE_VERSION:
+                    self._rebuild_tariffs_table(cursor)
+                cursor.execute(self._tariffs_table_sql('tariffs'))
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_tariffs_updated_at ON tariffs (updated_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_tariffs_price ON tariffs (base_price, id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_tariffs_final_price ON tariffs (final_price, id)")
+                for statement in HISTORY_SCHEMA:
+                    cursor.execute(statement)
+                cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        except DB_ERRORS as e:
+            print(f"Error creating table: {e}")
+
+    def add_tariff(self, name: str, base_price: float) -> bool:
+        query = "INSERT INTO tariffs (name, base_price, updated_at) VALUES (?, ?, ?)"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name, base_price, time.time_ns()))
+            return True
+        except DB_ERRORS as e:
+            if is_duplicate_name(e):
+                print(f"Tariff '{name}' already exists")
+            else:
+                print(f"Error adding tariff: {e}")
+            return False
+
+    def set_tariff_discount(self, name: str, discount: float) -> bool:
+        query = "UPDATE tariffs SET discount = ?, updated_at = ? WHERE name = ?"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (discount, time.time_ns(), name))
+                return cursor.rowcount > 0
+        except DB_ERRORS as e:
+            print(f"Error setting discount: {e}")
+            return False
+
+    def bulk_add_tariffs(self, rows: List[Tuple[str, float, float]]) -> List[Tuple[str, str]]:
+        """Добавить пачку тарифов (name, base_price, discount) одной транзакцией"""
+        if not rows:
+            return []
+
+        query = "INSERT INTO tariffs (name, base_price, discount, updated_at) VALUES (?, ?, ?, ?)"
+        updated_at = time.time_ns()
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany(query, [(*row, updated_at) for row in rows])
+            return []
+        except DB_ERRORS as e:
+            if not is_duplicate_name(e):
+                print(f"Error adding tariffs: {e}")
+                return [(row[0], str(e)) for row in rows]
+
+        # В пачке есть дубликат: вставляем построчно в одной транзакции
+        failed = []
+        try:
+            with self.cursor() as cursor:
+                for row in rows:
+                    try:
+                        cursor.execute(query, (*row, updated_at))
+                    except sqlite3.IntegrityError as e:
+                        if not is_duplicate_name(e):
+                            raise
+                        failed.append((row[0], "already exists"))
+            return failed
+        except DB_ERRORS as e:
+            print(f"Error adding tariffs: {e}")
+            return [(row[0], str(e)) for row in rows]
+
+    def bulk_set_discounts(self, rows: List[Tuple[str, float]]) -> bool:
+        if not rows:
+            return True
+
+        query = "UPDATE tariffs SET discount = ?, updated_at = ? WHERE name = ?"
+        updated_at = time.time_ns()
+        try:
+            with self.cursor() as cursor:
+                cursor.executemany(query, [(discount, updated_at, name) for name, discount in rows])
+            return True
+        except DB_ERRORS as e:
+            print(f"Error setting discounts: {e}")
+            return False
+
+    @staticmethod
+    def _filter_conditions(name_prefix: Optional[str] = None,
+                           min_price: Optional[float] = None,
+                           max_price: Optional[float] = None) -> Tuple[List[str], list]:
+        """Условия WHERE и параметры для отбора по префиксу имени и диапазону цены"""
+        conditions = []
+        params = []
+        if name_prefix:
+            escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append(escaped + '%')
+        if min_price is not None:
+            conditions.append("base_price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append("base_price <= ?")
+            params.append(max_price)
+        return conditions, params
+
+    def set_discount_where(self, selector: TariffSelector, discount: float) -> Optional[List[Tuple[str, float]]]:
+        """Установить скидку тарифам селектора одной транзакцией.
+
+        BEGIN IMMEDIATE сразу берет блокировку записи, поэтому между чтением
+        прежних скидок и UPDATE таблицу не изменит другой клиент.
+        """
+        if not 0 <= discount <= 100:
+            # Пустой список означал бы "ничего не отобрано", а это ошибка вызова
+            print(f"Error setting discounts: discount {discount} is out of range 0-100")
+            return None
+        conditions, params = self._filter_conditions(selector.name_prefix, selector.min_price,
+                                                     selector.max_price)
+        conditions.append("? BETWEEN 0 AND 100")
+        params.append(discount)
+        if selector.names is None:
+            name_groups = [None]
+        else:
+            name_groups = [selector.names[start:start + self.NAMES_PER_STATEMENT]
+                           for start in range(0, len(selector.names), self.NAMES_PER_STATEMENT)]
+
+        previous = []
+        updated_at = time.time_ns()
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("BEGIN IMMEDIATE")
+                for names in name_groups:
+                    group_conditions, group_params = list(conditions), list(params)
+                    if names is not None:
+                        group_conditions.append(f"name IN ({', '.join(['?'] * len(names))})")
+                        group_params.extend(names)
+                    where = " WHERE " + " AND ".join(group_conditions)
+                    cursor.execute(f"SELECT name, discount FROM tariffs{where}", group_params)
+                    rows = cursor.fetchall()
+                    if rows:
+                        cursor.execute(f"UPDATE tariffs SET discount = ?, updated_at = ?{where}",
+                                       [discount, updated_at] + group_params)
+                    previous.extend(rows)
+            return previous
+        except DB_ERRORS as e:
+            print(f"Error setting discounts: {e}")
+            return None
+
+    def get_tariff_by_name(self, name: str) -> Optional[Tuple]:
+        query = "SELECT name, base_price, discount FROM tariffs WHERE name = ?"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name,))
+                return cursor.fetchone()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff: {e}")
+            return None
+
+    def tariff_exists(self, name: str) -> bool:
+        query = "SELECT 1 FROM tariffs WHERE name = ? LIMIT 1"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name,))
+                return cursor.fetchone() is not None
+        except DB_ERRORS as e:
+            print(f"Error checking tariff: {e}")
+            return False
+
+    def get_all_tariffs(self) -> List[Tuple]:
+        query = "SELECT name, base_price, discount FROM tariffs ORDER BY base_price ASC"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariffs: {e}")
+            return []
+
+    def get_tariffs_page(self, limit: int, after: Optional[Tuple] = None,
+                         name_prefix: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None) -> List[Tuple]:
+        """Страница тарифов (id, name, base_price, discount) в порядке (base_price, id)"""
+        conditions, params = self._filter_conditions(name_prefix, min_price, max_price)
+        if after is not None:
+            conditions.append("(base_price > ? OR (base_price = ? AND id > ?))")
+            params.extend((float(after[0]), float(after[0]), after[1]))
+
+        query = "SELECT id, name, base_price, discount FROM tariffs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY base_price ASC, id ASC LIMIT ?"
+        params.append(limit)
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariffs page: {e}")
+            return []
+
+    def get_price_as_of(self, name: str, when: datetime) -> Optional[Tuple]:
+        query = """
+        SELECT name, base_price, discount
+        FROM tariff_price_history
+        WHERE name = ? AND changed_at <= ?
+        ORDER BY changed_at DESC, id DESC
+        LIMIT 1
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name, to_time_ns(when)))
+                return cursor.fetchone()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff price history: {e}")
+            return None
+
+    def get_price_history(self, name: str) -> List[Tuple]:
+        query = """
+        SELECT changed_at, base_price, discount
+        FROM tariff_price_history
+        WHERE name = ?
+        ORDER BY changed_at ASC, id ASC
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (name,))
+                return [(from_time_ns(changed_at), base_price, discount)
+                        for changed_at, base_price, discount in cursor.fetchall()]
+        except DB_ERRORS as e:
+            print(f"Error getting tariff price history: {e}")
+            return []
+
+    def get_catalogue_as_of(self, when: datetime) -> List[Tuple]:
+        """Все тарифы на момент when: последняя контрольная точка и строки истории после нее"""
+        checkpoint_query = """
+        SELECT id, history_id FROM tariff_price_checkpoints
+        WHERE as_of <= ?
+        ORDER BY as_of DESC, id DESC
+        LIMIT 1
+        """
+        rows_query = """
+        SELECT tariff_id, name, base_price, discount
+        FROM tariff_price_checkpoint_rows
+        WHERE checkpoint_id = ?
+        """
+        when_ns = to_time_ns(when)
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(checkpoint_query, (when_ns,))
+                checkpoint = cursor.fetchone()
+                tariffs = {}
+                history_id = 0
+                if checkpoint is not None:
+                    checkpoint_id, history_id = checkpoint
+                    cursor.execute(rows_query, (checkpoint_id,))
+                    tariffs = {row[0]: row[1:] for row in cursor.fetchall()}
+                cursor.execute(LATEST_HISTORY_ROWS, (history_id, when_ns))
+                tariffs.update((row[0], row[1:]) for row in cursor.fetchall())
+            return sorted(tariffs.values(), key=lambda row: row[1])
+        except DB_ERRORS as e:
+            print(f"Error getting catalogue history: {e}")
+            return []
+
+    def create_price_checkpoint(self) -> Optional[int]:
+        insert_rows = """
+        INSERT INTO tariff_price_checkpoint_rows (checkpoint_id, tariff_id, name, base_price, discount)
+        SELECT ?, h.tariff_id, h.name, h.base_price, h.discount
+        FROM tariff_price_history h
+        JOIN (
+            SELECT tariff_id, MAX(id) AS id
+            FROM tariff_price_history
+            WHERE id <= ?
+            GROUP BY tariff_id
+        ) latest ON h.id = latest.id
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT MAX(id), MAX(changed_at) FROM tariff_price_history")
+                history_id, as_of = cursor.fetchone()
+                if history_id is None:
+                    return None
+                cursor.execute("SELECT id FROM tariff_price_checkpoints WHERE history_id = ?", (history_id,))
+                existing = cursor.fetchone()
+                if existing is not None:
+                    return existing[0]
+                cursor.execute("INSERT INTO tariff_price_checkpoints (history_id, as_of) VALUES (?, ?)",
+                               (history_id, as_of))
+                checkpoint_id = cursor.lastrowid
+                cursor.execute(insert_rows, (checkpoint_id, history_id))
+            return checkpoint_id
+        except DB_ERRORS as e:
+            print(f"Error creating price checkpoint: {e}")
+            return None
+
+    def get_revision(self) -> Optional[int]:
+        """Номер последнего изменения тарифов - id последней строки истории цен (0 - изменений нет)"""
+        query = "SELECT COALESCE(MAX(id), 0) FROM tariff_price_history"
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchone()[0]
+        except DB_ERRORS as e:
+            print(f"Error getting tariffs revision: {e}")
+            return None
+
+    def get_changes_since(self, revision: int, limit: int) -> List[Tuple]:
+        query = """
+        SELECT id, name, base_price, discount
+        FROM tariff_price_history
+        WHERE id > ?
+        ORDER BY id ASC
+        LIMIT ?
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (revision, limit))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff changes: {e}")
+            return []
+
+    def get_changes_at(self, revisions: List[int]) -> List[Tuple]:
+        if not revisions:
+            return []
+        query = f"""
+        SELECT id, name, base_price, discount
+        FROM tariff_price_history
+        WHERE id IN ({', '.join(['?'] * len(revisions))})
+        ORDER BY id ASC
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, tuple(revisions))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error getting tariff changes: {e}")
+            return []
+
+    def get_min_price_tariff(self) -> Optional[Tuple]:
+        result = self.find_cheapest(1)
+        return result[0] if result else None
+
+    def find_cheapest(self, k: int) -> List[Tuple]:
+        if k < 1:
+            # LIMIT с отрицательным числом в SQLite снимает ограничение, в MySQL - ошибка
+            return []
+        query = """
+        SELECT name, base_price, discount, final_price
+        FROM tariffs
+        ORDER BY final_price ASC, id ASC
+        LIMIT ?
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (k,))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error finding cheapest tariffs: {e}")
+            return []
+
+    def find_in_price_range(self, low: float, high: float) -> List[Tuple]:
+        query = """
+        SELECT name, base_price, discount, final_price
+        FROM tariffs
+        WHERE final_price BETWEEN ? AND ?
+        ORDER BY final_price ASC, id ASC
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(query, (low, high))
+                return cursor.fetchall()
+        except DB_ERRORS as e:
+            print(f"Error finding tariffs in price range: {e}")
+            return []
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+
+    def __del__(self):
+        self.close()
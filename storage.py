@@ -0,0 +1,175 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from config import get_backend, metrics_enabled
+from metrics import instrument
+
+
+def to_time_ns(when: datetime) -> int:
+    """Момент времени в наносекундах time.time_ns() - так время хранят SQLite и память"""
+    return round(when.timestamp() * 1_000_000) * 1000
+
+
+def from_time_ns(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1_000_000_000)
+
+
+class TariffSelector:
+    """Отбор тарифов для пакетных изменений: по списку имен, префиксу имени
+    и диапазону базовой цены. Условия объединяются через И; селектор без
+    условий отбирает все тарифы.
+    """
+    def __init__(self, names: Optional[Iterable[str]] = None,
+                 name_prefix: Optional[str] = None,
+                 min_price: Optional[float] = None,
+                 max_price: Optional[float] = None):
+        self.names = list(dict.fromkeys(names)) if names is not None else None
+        self._name_set = frozenset(self.names) if self.names is not None else None
+        self.name_prefix = name_prefix or None
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def matches(self, name: str, base_price: float) -> bool:
+        if self._name_set is not None and name not in self._name_set:
+            return False
+        if self.name_prefix and not name.startswith(self.name_prefix):
+            return False
+        if self.min_price is not None and base_price < self.min_price:
+            return False
+        if self.max_price is not None and base_price > self.max_price:
+            return False
+        return True
+
+    def __repr__(self):
+        return (f"TariffSelector(names={self.names!r}, name_prefix={self.name_prefix!r}, "
+                f"min_price={self.min_price!r}, max_price={self.max_price!r})")
+
+
+class ITariffStorage(ABC):
+    """Интерфейс хранилища тарифов.
+
+    Строки тарифов - кортежи (name, base_price, discount); страницы
+    дополнительно начинаются с id, а выборки по итоговой цене
+    заканчиваются final_price. Ошибки хранилища не выбрасываются:
+    методы возвращают False, None или пустой список, как Database.
+
+    Методы интерфейса в наследниках автоматически оборачиваются в
+    metrics.instrument (отключается через SHIPPING_METRICS=0).
+    """
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not metrics_enabled():
+            return
+        for name in ITariffStorage.__abstractmethods__:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, 'instrumented', False):
+                # Строки считаются только у чтений: запись возвращает флаг или список ошибок
+                count_rows = name.startswith(('get_', 'find_'))
+                setattr(cls, name, instrument(method, count_rows,
+                                              storage=cls.__name__, method=name))
+
+    @abstractmethod
+    def add_tariff(self, name: str, base_price: float) -> bool:
+        pass
+
+    @abstractmethod
+    def set_tariff_discount(self, name: str, discount: float) -> bool:
+        pass
+
+    @abstractmethod
+    def bulk_add_tariffs(self, rows: List[Tuple[str, float, float]]) -> List[Tuple[str, str]]:
+        pass
+
+    @abstractmethod
+    def bulk_set_discounts(self, rows: List[Tuple[str, float]]) -> bool:
+        pass
+
+    @abstractmethod
+    def set_discount_where(self, selector: TariffSelector, discount: float) -> Optional[List[Tuple[str, float]]]:
+        """Установить скидку всем тарифам селектора одной транзакцией.
+
+        Возвращает прежние скидки (name, discount) измененных тарифов или None при ошибке.
+        """
+        pass
+
+    @abstractmethod
+    def get_tariff_by_name(self, name: str) -> Optional[Tuple]:
+        pass
+
+    @abstractmethod
+    def tariff_exists(self, name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_all_tariffs(self) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def get_tariffs_page(self, limit: int, after: Optional[Tuple] = None,
+                         name_prefix: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def get_price_as_of(self, name: str, when: datetime) -> Optional[Tuple]:
+        pass
+
+    @abstractmethod
+    def get_price_history(self, name: str) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def get_catalogue_as_of(self, when: datetime) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def create_price_checkpoint(self) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def get_revision(self) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def get_changes_since(self, revision: int, limit: int) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def get_changes_at(self, revisions: List[int]) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def get_min_price_tariff(self) -> Optional[Tuple]:
+        pass
+
+    @abstractmethod
+    def find_cheapest(self, k: int) -> List[Tuple]:
+        pass
+
+    @abstractmethod
+    def find_in_price_range(self, low: float, high: float) -> List[Tuple]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def create_storage(backend: Optional[str] = None) -> ITariffStorage:
+    """Создать хранилище заданного типа (по умолчанию - из SHIPPING_DB_BACKEND).
+
+    Модули хранилищ импортируются здесь, чтобы для SQLite и памяти
+    не требовался драйвер MySQL.
+    """
+    backend = backend or get_backend()
+    if backend == 'mysql':
+        from database import Database
+        return Database()
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDatabase
+        return SQLiteDatabase()
+    if backend == 'memory':
+        from memory_database import MemoryDatabase
+        return MemoryDatabase()
+    raise ValueError(f"Неизвестное хранилище '{backend}'")
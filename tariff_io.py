@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+from tariffs import BaseTariff
+
+TARIFF_FIELDS = ('name', 'base_price', 'discount')
+DISCOUNT_FIELDS = ('name', 'discount')
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(path: str, file_format: Optional[str] = None) -> str:
+    """Определить формат файла по явному указанию или расширению"""
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower().lstrip('.')
+        file_format = 'jsonl' if extension in ('jsonl', 'ndjson') else extension
+    if file_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат файла '{file_format}', ожидается csv или jsonl")
+    return file_format
+
+
+def read_rows(path: str, fields: Sequence[str] = TARIFF_FIELDS,
+              file_format: Optional[str] = None) -> Iterator[Tuple]:
+    """Построчно читать значения полей fields из CSV (с заголовком) или JSON Lines.
+
+    Файл не загружается в память целиком. Нечитаемая строка JSON Lines
+    выдается как пустой кортеж, чтобы ее номер попал в отчет об ошибках.
+    """
+    file_format = detect_format(path, file_format)
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            for record in csv.DictReader(file):
+                yield tuple(record.get(field) for field in fields)
+            return
+
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield ()
+                continue
+            if not isinstance(record, dict):
+                yield ()
+                continue
+            yield tuple(record.get(field) for field in fields)
+
+
+def write_tariffs(path: str, tariffs: Iterable[BaseTariff],
+                  file_format: Optional[str] = None) -> int:
+    """Записать тарифы в CSV или JSON Lines по мере их получения; вернуть их число"""
+    file_format = detect_format(path, file_format)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(TARIFF_FIELDS)
+        for tariff in tariffs:
+            values = (tariff.get_name(), round(tariff.get_price(), 2), round(tariff.get_discount(), 2))
+            if file_format == 'csv':
+                writer.writerow(values)
+            else:
+                file.write(json.dumps(dict(zip(TARIFF_FIELDS, values)), ensure_ascii=False) + '\n')
+            count += 1
+    return count
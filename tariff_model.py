@@ -0,0 +1,175 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+from shipping_company import ShippingCompany, BaseTariff
+
+
+class TariffTableModel(QAbstractTableModel):
+    """Модель таблицы тарифов.
+
+    Строки подгружаются страницами по мере прокрутки (canFetchMore/fetchMore),
+    а изменения отдельных тарифов применяются к уже загруженным строкам
+    без перечитывания всей таблицы. Если задан executor (DbExecutor),
+    страницы загружаются в фоновом потоке.
+
+    Строки упорядочены по цене, поэтому строка тарифа находится двоичным
+    поиском по цене из _prices, а вставка не требует перенумерации строк.
+    """
+    HEADERS = ['Название', 'Базовая цена', 'Скидка', 'Итоговая цена']
+    # Роль с "сырым" значением ячейки для сортировки в прокси-модели
+    SORT_ROLE = Qt.ItemDataRole.UserRole
+
+    def __init__(self, company: Optional[ShippingCompany] = None,
+                 page_size: int = ShippingCompany.PAGE_SIZE, executor=None, parent=None):
+        super().__init__(parent)
+        self.company = company
+        self.page_size = page_size
+        self.executor = executor
+        self._tariffs: List[BaseTariff] = []
+        # Базовая цена загруженных тарифов по названию
+        self._prices: Dict[str, float] = {}
+        self._cursor: Optional[Tuple] = None
+        self._exhausted = False
+        self._loading = False
+        # Номер загрузки: страницы, запрошенные до reload(), отбрасываются
+        self._generation = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._tariffs)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        tariff = self._tariffs[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return tariff.get_name()
+            if column == 1:
+                return f"₽ {tariff.get_price():.2f}"
+            if column == 2:
+                return f"{tariff.get_discount():.1f}%"
+            return f"₽ {tariff.format_final_price()}"
+        if role == self.SORT_ROLE:
+            return (tariff.get_name(), tariff.get_price(),
+                    tariff.get_discount(), tariff.calculate_final_price())[column]
+        if role == Qt.ItemDataRole.TextAlignmentRole and column > 0:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return (not parent.isValid() and self.company is not None
+                and not self._exhausted and not self._loading)
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        if self.executor is None:
+            tariffs, cursor = self.company.get_tariffs_page(self.page_size, self._cursor)
+            self.append_page(tariffs, cursor)
+            return
+
+        self._loading = True
+        generation = self._generation
+
+        def on_page(page):
+            if generation == self._generation:
+                self._loading = False
+                self.append_page(*page)
+
+        def on_error(error):
+            if generation == self._generation:
+                self._loading = False
+
+        self.executor.submit(self.company.get_tariffs_page, self.page_size, self._cursor,
+                             on_result=on_page, on_error=on_error, coalesce_key='tariffs-page')
+
+    def append_page(self, tariffs: List[BaseTariff], cursor: Optional[Tuple]) -> None:
+        """Добавить в конец загруженную страницу; cursor=None означает последнюю страницу"""
+        self._cursor = cursor
+        self._exhausted = cursor is None
+        # Тариф, уже вставленный через upsert_tariff, может прийти и со страницей
+        tariffs = [tariff for tariff in tariffs if tariff.get_name() not in self._prices]
+        if not tariffs:
+            return
+        first = len(self._tariffs)
+        self.beginInsertRows(QModelIndex(), first, first + len(tariffs) - 1)
+        for tariff in tariffs:
+            self._tariffs.append(tariff)
+            self._prices[tariff.get_name()] = tariff.get_price()
+        self.endInsertRows()
+
+    def set_company(self, company: ShippingCompany) -> None:
+        self.company = company
+        self.reload()
+
+    def reload(self) -> None:
+        """Сбросить загруженные строки и запросить первую страницу"""
+        self.beginResetModel()
+        self._tariffs = []
+        self._prices = {}
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        self._generation += 1
+        self.endResetModel()
+        self.fetchMore()
+
+    def _find_row(self, name: str) -> Optional[int]:
+        """Номер строки загруженного тарифа: двоичный поиск по цене, затем по тарифам с той же ценой"""
+        price = self._prices.get(name)
+        if price is None:
+            return None
+        row = bisect_left(self._tariffs, price, key=BaseTariff.get_price)
+        while self._tariffs[row].get_name() != name:
+            row += 1
+        return row
+
+    def upsert_tariff(self, tariff: BaseTariff) -> None:
+        """Обновить строку тарифа или вставить ее на место по цене"""
+        row = self._find_row(tariff.get_name())
+        if row is not None:
+            old_price = self._tariffs[row].get_price()
+            if old_price == tariff.get_price():
+                self._tariffs[row] = tariff
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+                return
+            self._remove_row(row)
+
+        row = bisect_right(self._tariffs, tariff.get_price(), key=BaseTariff.get_price)
+        if row == len(self._tariffs) and not self._exhausted:
+            # Строка за пределами загруженных страниц придет с одной из следующих
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tariffs.insert(row, tariff)
+        self._prices[tariff.get_name()] = tariff.get_price()
+        self.endInsertRows()
+
+    def apply_changes(self, tariffs: List[BaseTariff]) -> None:
+        """Применить изменения из ShippingCompany.changes_since к загруженным строкам"""
+        for tariff in tariffs:
+            self.upsert_tariff(tariff)
+
+    def _remove_row(self, row: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._prices[self._tariffs.pop(row).get_name()]
+        self.endRemoveRows()
+
+
+class TariffFilterProxyModel(QSortFilterProxyModel):
+    """Сортировка по значениям ячеек и фильтр по названию тарифа"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(TariffTableModel.SORT_ROLE)
+        self.setFilterKeyColumn(0)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
@@ -0,0 +1,113 @@
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from tariffs import ITariff, BaseTariff, TariffException, final_price_kopecks, to_kopecks
+
+if TYPE_CHECKING:
+    from price_engine import PricePipeline
+
+
+class TariffView(ITariff):
+    """Легковесное представление строки TariffTable.
+
+    Хранит только ссылку на таблицу и номер строки; значения читаются
+    из колонок при обращении.
+    """
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: 'TariffTable', row: int):
+        self._table = table
+        self._row = row
+
+    def get_name(self) -> str:
+        return self._table.names[self._row]
+
+    def get_price(self) -> float:
+        return self._table.prices[self._row]
+
+    def get_discount(self) -> float:
+        return self._table.discounts[self._row]
+
+    def calculate_final_price(self) -> float:
+        return final_price_kopecks(to_kopecks(self.get_price()), self.get_discount()) / 100
+
+    def to_tariff(self) -> BaseTariff:
+        """Полноценный (изменяемый) тариф с теми же значениями"""
+        return BaseTariff(self.get_name(), self.get_price(), self.get_discount())
+
+
+class TariffTable:
+    """Каталог тарифов в параллельных колонках: названия, цены и скидки.
+
+    Цены и скидки лежат в array('d') по 8 байт на значение, без отдельного
+    объекта на каждый тариф. Объекты TariffView создаются только по запросу.
+    """
+    def __init__(self):
+        self.names: List[str] = []
+        self.prices = array('d')
+        self.discounts = array('d')
+        self._rows: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> 'TariffTable':
+        """Таблица из строк (название, цена, скидка), например из БД"""
+        table = cls()
+        for name, price, discount in rows:
+            table.append(name, float(price), float(discount))
+        return table
+
+    @classmethod
+    def from_tariffs(cls, tariffs: Iterable[BaseTariff]) -> 'TariffTable':
+        table = cls()
+        for tariff in tariffs:
+            table.append(tariff.get_name(), tariff.get_price(), tariff.get_discount())
+        return table
+
+    def append(self, name: str, price: float, discount: float = 0.0) -> None:
+        if self._rows is not None:
+            if name in self._rows:
+                raise TariffException(f"Тариф с названием '{name}' уже существует")
+            self._rows[name] = len(self.names)
+        self.names.append(name)
+        self.prices.append(price)
+        self.discounts.append(discount)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, row: int) -> TariffView:
+        if row < 0:
+            row += len(self.names)
+        if not 0 <= row < len(self.names):
+            raise IndexError("Номер строки вне таблицы")
+        return TariffView(self, row)
+
+    def __iter__(self) -> Iterator[TariffView]:
+        for row in range(len(self.names)):
+            yield TariffView(self, row)
+
+    def find(self, name: str) -> Optional[TariffView]:
+        """Тариф по названию; индекс по именам строится при первом поиске"""
+        if self._rows is None:
+            self._rows = {name: row for row, name in enumerate(self.names)}
+        row = self._rows.get(name)
+        return TariffView(self, row) if row is not None else None
+
+    def set_discount(self, name: str, discount_percent: float) -> None:
+        if not 0 <= discount_percent <= 100:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+        tariff = self.find(name)
+        if tariff is None:
+            raise TariffException(f"Тариф с названием '{name}' не найден")
+        self.discounts[tariff._row] = discount_percent
+
+    def final_prices(self, pipeline: Optional['PricePipeline'] = None):
+        """Итоговые цены всех тарифов одним пакетным расчетом.
+
+        По умолчанию цены округляются до копеек, как в calculate_final_price.
+        """
+        if pipeline is None:
+            # price_engine загружает NumPy, поэтому импортируется при первом расчете
+            from price_engine import PricePipeline, DiscountRule, RoundingRule
+            pipeline = PricePipeline([DiscountRule(), RoundingRule()])
+        return pipeline.calculate(self.prices, self.discounts)
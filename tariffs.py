@@ -0,0 +1,180 @@
+import math
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional, Sequence
+
+class TariffException(Exception):
+    """Пользовательское исключение для обработки ошибок, связанных с тарифами"""
+    pass
+
+def to_kopecks(price: float) -> int:
+    """Цена в целых копейках; цены хранятся с двумя знаками после запятой"""
+    return round(price * 100)
+
+
+def final_price_kopecks(price_kopecks: int, discount_percent: float) -> int:
+    """Цена со скидкой в копейках с округлением половины копейки вверх.
+
+    Скидка хранится с двумя знаками, поэтому расчет ведется в сотых долях
+    процента - точно так же, как ROUND над DECIMAL в MySQL.
+    """
+    hundredths = round(discount_percent * 100)
+    return (price_kopecks * (10000 - hundredths) + 5000) // 10000
+
+
+def format_kopecks(kopecks: int) -> str:
+    """Сумма в копейках в виде '1234.50' без перевода в float"""
+    return f"{kopecks // 100}.{kopecks % 100:02d}"
+
+
+class IPriceStrategy(ABC):
+    """Интерфейс для стратегии расчета цены"""
+    __slots__ = ()
+
+    @abstractmethod
+    def calculate_price(self, price: float) -> float:
+        pass
+
+    def calculate_prices(self, prices: Sequence[float]) -> Sequence[float]:
+        """Расчет для набора цен; массив NumPy обрабатывается без цикла в Python"""
+        return [self.calculate_price(price) for price in prices]
+
+    def calculate_price_kopecks(self, price_kopecks: int) -> int:
+        """Точный расчет в целых копейках с округлением половины копейки вверх"""
+        return to_kopecks(self.calculate_price(price_kopecks / 100))
+
+class RegularPriceStrategy(IPriceStrategy):
+    """Стратегия расчета обычной цены без скидки"""
+    __slots__ = ()
+
+    def calculate_price(self, price: float) -> float:
+        return price
+
+    def calculate_prices(self, prices: Sequence[float]) -> Sequence[float]:
+        return prices.copy() if hasattr(prices, 'dtype') else list(prices)
+
+    def calculate_price_kopecks(self, price_kopecks: int) -> int:
+        return price_kopecks
+
+class DiscountPriceStrategy(IPriceStrategy):
+    """Стратегия расчета цены со скидкой"""
+    __slots__ = ('discount_percent',)
+
+    def __init__(self, discount_percent: float):
+        if not 0 <= discount_percent <= 100:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+        self.discount_percent = discount_percent
+
+    def calculate_price(self, price: float) -> float:
+        return price * (1 - self.discount_percent / 100)
+
+    def calculate_prices(self, prices: Sequence[float]) -> Sequence[float]:
+        factor = 1 - self.discount_percent / 100
+        if hasattr(prices, 'dtype'):
+            return prices * factor
+        return [price * factor for price in prices]
+
+    def calculate_price_kopecks(self, price_kopecks: int) -> int:
+        return final_price_kopecks(price_kopecks, self.discount_percent)
+
+REGULAR_PRICE_STRATEGY = RegularPriceStrategy()
+
+@lru_cache(maxsize=1024)
+def get_price_strategy(discount_percent: float) -> IPriceStrategy:
+    """Общий (разделяемый тарифами) экземпляр стратегии для заданной скидки.
+
+    Стратегии не хранят состояния кроме процента скидки, поэтому тарифы
+    с одинаковой скидкой используют один объект вместо собственной копии.
+    """
+    if discount_percent > 0:
+        return DiscountPriceStrategy(discount_percent)
+    return REGULAR_PRICE_STRATEGY
+
+class ITariff(ABC):
+    """Интерфейс для тарифов"""
+    __slots__ = ()
+
+    @abstractmethod
+    def get_name(self) -> str:
+        pass
+
+    @abstractmethod
+    def get_price(self) -> float:
+        pass
+
+    @abstractmethod
+    def calculate_final_price(self) -> float:
+        pass
+
+    def format_final_price(self) -> str:
+        """Итоговая цена для вывода: '1234.50'"""
+        return format_kopecks(to_kopecks(self.calculate_final_price()))
+
+class BaseTariff(ITariff):
+    """Базовый класс тарифа.
+
+    Итоговая цена считается точно в копейках, как столбец final_price в БД,
+    один раз после создания тарифа или изменения скидки; повторные вызовы
+    calculate_final_price и format_final_price берут готовое значение.
+    """
+    __slots__ = ('name', 'price', 'discount_percent', 'price_strategy',
+                 '_final_kopecks', '_final_price', '_final_price_text')
+
+    def __init__(self, name: str, price: float, discount_percent: float = 0):
+        # Бесконечность и NaN не переводятся в копейки и сломали бы индекс цен
+        if not (math.isfinite(price) and math.isfinite(discount_percent)):
+            raise TariffException("Цена и скидка должны быть конечными числами")
+        if price <= 0:
+            raise TariffException("Цена не может быть отрицательной или нулевой")
+        if not name:
+            raise TariffException("Название тарифа не может быть пустым")
+    
+        self.name = name
+        self.price = price
+        self.discount_percent = discount_percent
+        self._update_price_strategy()
+
+    def _update_price_strategy(self):
+        self.price_strategy = get_price_strategy(self.discount_percent)
+        self._final_kopecks: Optional[int] = None
+        self._final_price: Optional[float] = None
+        self._final_price_text: Optional[str] = None
+
+    def set_discount(self, discount_percent: float):
+        """Установить скидку для тарифа"""
+        if not 0 <= discount_percent <= 100:
+            raise TariffException("Процент скидки должен быть от 0 до 100")
+        self.discount_percent = discount_percent
+        self._update_price_strategy()
+
+    def get_discount(self) -> float:
+        """Получить текущую скидку"""
+        return self.discount_percent
+
+    def get_name(self) -> str:
+        return self.name
+
+    def get_price(self) -> float:
+        return self.price
+
+    def calculate_final_price_kopecks(self) -> int:
+        """Итоговая цена в целых копейках"""
+        if self._final_kopecks is None:
+            self._final_kopecks = self.price_strategy.calculate_price_kopecks(to_kopecks(self.price))
+        return self._final_kopecks
+
+    def calculate_final_price(self) -> float:
+        """Итоговая цена, округленная до копеек"""
+        if self._final_price is None:
+            self._final_price = self.calculate_final_price_kopecks() / 100
+        return self._final_price
+
+    def calculate_final_price_decimal(self) -> Decimal:
+        return Decimal(self.calculate_final_price_kopecks()).scaleb(-2)
+
+    def format_final_price(self) -> str:
+        """Итоговая цена для вывода: '1234.50'"""
+        if self._final_price_text is None:
+            self._final_price_text = format_kopecks(self.calculate_final_price_kopecks())
+        return self._final_price_text
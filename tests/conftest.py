@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+# База MySQL для тестов; тесты с MySQL запускаются, только если задан SHIPPING_TEST_MYSQL=1
+MYSQL_TEST_DATABASE = 'shipping_company_test'
+BACKENDS = ('memory', 'sqlite', 'mysql')
+
+
+def make_test_storage(backend: str, directory):
+    if backend == 'memory':
+        from memory_database import MemoryDatabase
+        return MemoryDatabase()
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDatabase
+        return SQLiteDatabase(os.path.join(directory, 'tariffs.db'))
+    if not os.environ.get('SHIPPING_TEST_MYSQL'):
+        pytest.skip("MySQL: задайте SHIPPING_TEST_MYSQL=1 и параметры SHIPPING_DB_*")
+    pytest.importorskip('mysql.connector')
+    from database import Database
+    try:
+        db = Database(database=MYSQL_TEST_DATABASE)
+        with db.cursor() as cursor:
+            for table in ('tariff_price_checkpoint_rows', 'tariff_price_checkpoints',
+                          'tariff_price_history', 'tariffs'):
+                cursor.execute(f"DELETE FROM {table}")
+    except Exception as e:
+        pytest.skip(f"MySQL недоступен: {e}")
+    return db
+
+
+@pytest.fixture(params=BACKENDS)
+def storage(request, tmp_path):
+    """Пустое хранилище каждого типа; тест выполняется для всех трех"""
+    db = make_test_storage(request.param, str(tmp_path))
+    yield db
+    db.close()
+
+
+@pytest.fixture(autouse=True)
+def no_snapshot(monkeypatch):
+    monkeypatch.delenv('SHIPPING_SNAPSHOT', raising=False)
@@ -0,0 +1,41 @@
+import argparse
+import json
+
+from benchmarks import suite
+
+
+def write_report(path, median_s):
+    report = {'meta': {'revision': str(path)},
+              'results': [{'name': 'op', 'size': 10, 'backend': 'memory', 'median_s': median_s}]}
+    path.write_text(json.dumps(report), encoding='utf-8')
+    return str(path)
+
+
+def test_measure_reports_per_call_time():
+    calls = []
+    timing = suite.measure(lambda: calls.append(1), rounds=3, min_time=0)
+    assert timing['rounds'] == 3 and timing['calls_per_round'] == 1
+    assert len(calls) == 4
+    assert 0 <= timing['min_s'] <= timing['median_s']
+
+
+def test_run_writes_selected_results(tmp_path, capsys):
+    output = tmp_path / 'report.json'
+    args = argparse.Namespace(sizes=[50], backend='memory', rounds=1, min_time=0,
+                              only=['has_tariff', 'calculate_prices'], output=str(output))
+    assert suite.run(args) == 0
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert {result['name'] for result in report['results']} == {
+        'ShippingCompany.has_tariff (hit)', 'ShippingCompany.has_tariff (miss)',
+        'DiscountPriceStrategy.calculate_prices (catalogue)'}
+    assert all(result['size'] == 50 and result['median_s'] >= 0 for result in report['results'])
+
+
+def test_compare_fails_on_regression(tmp_path, capsys):
+    base = write_report(tmp_path / 'base.json', 1.0)
+    slower = write_report(tmp_path / 'slower.json', 1.5)
+    faster = write_report(tmp_path / 'faster.json', 0.5)
+    assert suite.compare(argparse.Namespace(base=base, new=slower, threshold=0.1)) == 1
+    assert 'REGRESSION' in capsys.readouterr().out
+    assert suite.compare(argparse.Namespace(base=base, new=faster, threshold=0.1)) == 0
+    assert 'faster' in capsys.readouterr().out
@@ -0,0 +1,63 @@
+import pytest
+
+from shipping_company import ShippingCompany
+from tariffs import BaseTariff
+
+ROWS = [('sea', 30.0, 0), ('air', 10.0, 0), ('road', 20.0, 10)]
+
+
+@pytest.fixture
+def company(storage):
+    storage.bulk_add_tariffs(ROWS)
+    company = ShippingCompany(cache_ttl=3600, db=storage)
+    company.get_all_tariffs()
+    return company
+
+
+def forbid_full_reads(monkeypatch, storage):
+    def fail(*args):
+        raise AssertionError("кэш не должен перечитывать все тарифы")
+    monkeypatch.setattr(storage, 'get_all_tariffs', fail)
+
+
+def names(tariffs):
+    return [tariff.get_name() for tariff in tariffs]
+
+
+def test_lookups_are_served_from_cache(company, storage, monkeypatch):
+    monkeypatch.setattr(storage, 'get_tariff_by_name', lambda name: pytest.fail("запрос к хранилищу"))
+    assert company.get_tariff('road').calculate_final_price() == 18.0
+    assert company.has_tariff('sea')
+
+
+def test_writes_go_through_to_cache(company, storage, monkeypatch):
+    forbid_full_reads(monkeypatch, storage)
+    company.add_tariff(BaseTariff('rail', 5.0))
+    company.set_tariff_discount('sea', 90)
+    assert names(company.get_all_tariffs()) == ['rail', 'air', 'road', 'sea']
+    assert names(company.find_cheapest(2)) == ['sea', 'rail']
+    assert storage.get_tariff_by_name('rail') is not None
+
+
+def test_returned_tariff_does_not_change_cache(company):
+    company.get_tariff('sea').set_discount(50)
+    assert company.get_tariff('sea').get_discount() == 0
+
+
+def test_tariff_added_by_other_client_is_found(company, storage):
+    ShippingCompany(db=storage).add_tariff(BaseTariff('rail', 5.0))
+    assert company.has_tariff('rail')
+    assert 'rail' in names(company.get_all_tariffs())
+
+
+def test_expired_cache_picks_up_other_client_changes(company, storage):
+    ShippingCompany(db=storage).set_tariff_discount('sea', 50)
+    assert company.get_tariff('sea').get_discount() == 0
+    company.cache_ttl = 0
+    assert company.get_tariff('sea').get_discount() == 50
+
+
+def test_invalidate_cache_reloads_from_storage(company, storage):
+    storage.set_tariff_discount('air', 20)
+    company.invalidate_cache()
+    assert company.get_tariff('air').get_discount() == 20
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from campaigns import ACTIVE, CANCELLED, FINISHED, CampaignScheduler, DiscountCampaign
+from shipping_company import ShippingCompany
+from storage import TariffSelector
+from tariffs import TariffException
+
+
+@pytest.fixture
+def company(storage):
+    storage.bulk_add_tariffs([('sea', 30.0, 5), ('air', 10.0, 0), ('sea-express', 60.0, 0)])
+    return ShippingCompany(db=storage)
+
+
+def discount(company, name):
+    return company.get_tariff(name).get_discount()
+
+
+def overlapping(company):
+    scheduler = CampaignScheduler(company)
+    first = DiscountCampaign('first', TariffSelector(names=['sea']), 10, starts_at=100, ends_at=300)
+    second = DiscountCampaign('second', TariffSelector(names=['sea', 'air']), 20, starts_at=200, ends_at=400)
+    scheduler.schedule(first)
+    scheduler.schedule(second)
+    scheduler.run_pending(now=250)
+    assert discount(company, 'sea') == 20
+    return scheduler, first, second
+
+
+def test_campaign_restores_previous_discount(company):
+    scheduler = CampaignScheduler(company)
+    scheduler.schedule(DiscountCampaign('sale', TariffSelector(names=['sea']), 10, starts_at=100, ends_at=200))
+    scheduler.run_pending(now=150)
+    assert discount(company, 'sea') == 10
+    scheduler.run_pending(now=250)
+    assert discount(company, 'sea') == 5
+
+
+def test_overlapping_campaign_ending_first_does_not_leak_its_discount(company):
+    scheduler, first, second = overlapping(company)
+    scheduler.run_pending(now=350)
+    assert discount(company, 'sea') == 20
+    scheduler.run_pending(now=450)
+    assert discount(company, 'sea') == 5
+    assert discount(company, 'air') == 0
+
+
+def test_overlapping_campaign_ending_last_restores_earlier_campaign(company):
+    scheduler, first, second = overlapping(company)
+    scheduler.cancel(second)
+    assert second.state == CANCELLED and first.state == ACTIVE
+    assert discount(company, 'sea') == 10
+    scheduler.run_pending(now=350)
+    assert discount(company, 'sea') == 5
+
+
+def test_manual_discount_during_campaign_is_kept(company):
+    scheduler, first, second = overlapping(company)
+    company.set_tariff_discount('sea', 50)
+    scheduler.run_pending(now=450)
+    assert discount(company, 'sea') == 50
+
+
+def test_selector_by_prefix_and_price_range(company):
+    campaign = DiscountCampaign('sale', TariffSelector(name_prefix='sea', min_price=20, max_price=40), 15)
+    assert campaign.apply(company) == 1
+    assert [discount(company, name) for name in ('sea', 'air', 'sea-express')] == [15, 0, 0]
+    assert campaign.revert(company) == 1 and campaign.state == FINISHED
+    assert discount(company, 'sea') == 5
+
+
+def test_cancelled_pending_campaign_never_starts(company):
+    scheduler = CampaignScheduler(company)
+    campaign = DiscountCampaign('sale', TariffSelector(names=['air']), 10, starts_at=100)
+    scheduler.schedule(campaign)
+    scheduler.cancel(campaign)
+    assert scheduler.run_pending(now=200) == []
+    assert discount(company, 'air') == 0
+
+
+def test_invalid_campaigns_are_rejected():
+    with pytest.raises(TariffException):
+        DiscountCampaign('sale', TariffSelector(), 150)
+    with pytest.raises(TariffException):
+        DiscountCampaign('sale', TariffSelector(), 10, starts_at=200, ends_at=100)
+
+
+def test_background_thread_runs_due_campaigns(company):
+    scheduler = CampaignScheduler(company)
+    campaign = DiscountCampaign('sale', TariffSelector(names=['air']), 10, ends_at=time.time() + 0.2)
+    scheduler.start()
+    try:
+        scheduler.schedule(campaign)
+        deadline = time.monotonic() + 5
+        while campaign.state != FINISHED and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    assert campaign.state == FINISHED
+    assert discount(company, 'air') == 0
@@ -0,0 +1,101 @@
+from contextlib import ExitStack, contextmanager
+
+import pytest
+
+from memory_database import MemoryDatabase
+from shipping_company import ShippingCompany
+
+ROWS = [('sea', 30.0, 0), ('air', 10.0, 0)]
+
+
+@contextmanager
+def transaction(storage, history_id, name, discount):
+    """Изменение скидки, которое становится видно только по выходу из with.
+
+    В MySQL это настоящая транзакция: номер истории выдается при UPDATE.
+    SQLite не пускает двух писателей сразу, поэтому строка истории с заранее
+    выбранным номером history_id записывается при фиксации.
+    """
+    if type(storage).__name__ == 'Database':
+        with storage.cursor() as cursor:
+            cursor.execute("UPDATE tariffs SET discount = %s WHERE name = %s", (discount, name))
+            yield
+        return
+    yield
+    with storage.cursor() as cursor:
+        cursor.execute("""
+        INSERT INTO tariff_price_history (id, tariff_id, name, base_price, discount, changed_at)
+        SELECT ?, id, name, base_price, ?, updated_at FROM tariffs WHERE name = ?
+        """, (history_id, discount, name))
+
+
+def changed(company, revision):
+    tariffs, revision = company.changes_since(revision)
+    return [(tariff.get_name(), tariff.get_discount()) for tariff in tariffs], revision
+
+
+@pytest.fixture
+def company(storage):
+    if isinstance(storage, MemoryDatabase):
+        pytest.skip("в памяти изменения фиксируются по порядку номеров")
+    storage.bulk_add_tariffs(ROWS)
+    return ShippingCompany(db=storage)
+
+
+def interleave(company, revision):
+    """Две транзакции: меньший номер истории фиксируется после большего"""
+    first, second = ExitStack(), ExitStack()
+    first.enter_context(transaction(company.db, revision + 1, 'sea', 10))
+    second.enter_context(transaction(company.db, revision + 2, 'air', 20))
+    second.close()
+    return first
+
+
+def test_changes_since_returns_change_committed_out_of_order(company):
+    revision = company.get_revision()
+    first = interleave(company, revision)
+    tariffs, late = changed(company, revision)
+    assert tariffs == [('air', 20.0)]
+    assert late == revision + 2 and late.complete == revision
+    first.close()
+    tariffs, late = changed(company, late)
+    assert tariffs == [('sea', 10.0)]
+    assert late == revision + 2 and late.complete == revision + 2
+    assert changed(company, late)[0] == []
+
+
+def test_refresh_cache_applies_change_committed_out_of_order(company):
+    company.reload_cache()
+    first = interleave(company, company.get_revision())
+    company.refresh_cache()
+    first.close()
+    company.refresh_cache()
+    assert company.get_tariff('sea').get_discount() == 10.0
+    assert company.get_tariff('air').get_discount() == 20.0
+
+
+def test_gap_is_forgotten_after_timeout(company, monkeypatch):
+    revision = company.get_revision()
+    first = interleave(company, revision)
+    _, late = changed(company, revision)
+    monkeypatch.setattr(ShippingCompany, 'CHANGE_GAP_TIMEOUT', 0.0)
+    first.close()
+    tariffs, late = changed(company, late)
+    assert tariffs == [] and late.gaps == {}
+
+
+def test_reload_cache_rereads_change_committed_after_reload(company):
+    first = interleave(company, company.get_revision())
+    company.reload_cache()
+    first.close()
+    company.refresh_cache()
+    assert company.get_tariff('sea').get_discount() == 10.0
+
+
+def test_get_revision_remembers_uncommitted_lower_number(company):
+    revision = company.get_revision()
+    first = interleave(company, revision)
+    current = company.get_revision()
+    assert current == revision + 2 and current.complete == revision
+    first.close()
+    assert changed(company, current)[0] == [('sea', 10.0)]
@@ -0,0 +1,54 @@
+import pytest
+
+import cli
+
+
+@pytest.fixture(autouse=True)
+def memory_backend(monkeypatch):
+    monkeypatch.setenv('SHIPPING_DB_BACKEND', 'memory')
+
+
+@pytest.mark.parametrize('command', ['import', 'import-discounts'])
+def test_import_unknown_format_is_reported(tmp_path, capsys, command):
+    path = tmp_path / 'tariffs.xlsx'
+    path.write_text('name,base_price\n', encoding='utf-8')
+    assert cli.main([command, str(path)]) == 1
+    assert 'Неизвестный формат файла' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('command', ['import', 'import-discounts'])
+def test_import_missing_file_is_reported(tmp_path, capsys, command):
+    assert cli.main([command, str(tmp_path / 'missing.csv')]) == 1
+    assert 'missing.csv' in capsys.readouterr().err
+
+
+def test_export_unwritable_path_is_reported(tmp_path, capsys):
+    assert cli.main(['export', str(tmp_path / 'no-such-dir' / 'tariffs.csv')]) == 1
+    assert 'Ошибка' in capsys.readouterr().err
+
+
+def test_import_valid_file(tmp_path, capsys):
+    path = tmp_path / 'tariffs.csv'
+    path.write_text('name,base_price,discount\nМорской,120,5\n', encoding='utf-8')
+    assert cli.main(['import', str(path)]) == 0
+    assert 'Успешно: 1' in capsys.readouterr().out
+
+
+def test_cheapest_non_positive_k_is_reported(capsys):
+    assert cli.main(['cheapest', '-k', '-1']) == 1
+    assert 'положительным' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('price', ['inf', 'nan'])
+def test_add_non_finite_price_is_rejected(capsys, price):
+    assert cli.main(['add', 'sea', price]) == 1
+    assert 'конечными' in capsys.readouterr().err
+
+
+def test_import_non_finite_rows_are_reported_per_row(tmp_path, capsys):
+    path = tmp_path / 'tariffs.csv'
+    path.write_text('name,base_price,discount\nМорской,nan,0\nАвиа,inf,0\nЖ/д,50,5\n', encoding='utf-8')
+    assert cli.main(['import', str(path)]) == 1
+    output = capsys.readouterr()
+    assert 'Успешно: 1, с ошибками: 2' in output.out
+    assert output.err.count('конечными') == 2
@@ -0,0 +1,114 @@
+import itertools
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool, PoolError
+
+
+class FakeConnection:
+    def __init__(self, number: int):
+        self.number = number
+        self.closed = False
+        self.broken = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    """Соединения-заглушки: пулу важны только connect, ping и close"""
+    def __init__(self):
+        self._numbers = itertools.count(1)
+        self.opened = []
+        self.pinged = []
+
+    def connect(self):
+        connection = FakeConnection(next(self._numbers))
+        self.opened.append(connection)
+        return connection
+
+    def ping(self, connection):
+        self.pinged.append(connection.number)
+        if connection.broken:
+            raise ConnectionError("соединение разорвано")
+
+
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+
+def test_released_connection_is_reused(driver):
+    pool = ConnectionPool(driver.connect, size=2, ping=driver.ping)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert len(driver.opened) == 1
+    assert driver.pinged == []
+
+
+def test_pool_opens_up_to_size_connections(driver):
+    pool = ConnectionPool(driver.connect, size=2, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    with pytest.raises(PoolError):
+        pool.acquire()
+    assert len(driver.opened) == 2
+
+
+def test_waiting_acquire_gets_released_connection(driver):
+    pool = ConnectionPool(driver.connect, size=1, timeout=5)
+    connection = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(connection,)).start()
+    assert pool.acquire() is connection
+
+
+def test_idle_connection_is_pinged(driver):
+    pool = ConnectionPool(driver.connect, size=1, ping=driver.ping, ping_interval=0)
+    pool.release(pool.acquire())
+    connection = pool.acquire()
+    assert driver.pinged == [connection.number]
+
+
+def test_connection_after_error_is_pinged(driver):
+    pool = ConnectionPool(driver.connect, size=1, ping=driver.ping)
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("ошибка запроса")
+    pool.acquire()
+    assert driver.pinged == [1]
+
+
+def test_broken_connection_is_replaced(driver):
+    pool = ConnectionPool(driver.connect, size=1, ping=driver.ping, ping_interval=0)
+    broken = pool.acquire()
+    broken.broken = True
+    pool.release(broken)
+    connection = pool.acquire()
+    assert connection is not broken and broken.closed
+    pool.release(connection)
+    # Замена не занимает лишнее место в пуле
+    assert pool.acquire() is connection
+
+
+def test_closed_pool_rejects_acquire(driver):
+    pool = ConnectionPool(driver.connect, size=1)
+    connection = pool.acquire()
+    pool.close()
+    pool.release(connection)
+    assert connection.closed
+    with pytest.raises(PoolError):
+        pool.acquire()
+
+
+def test_storage_reconnects_after_idle_connection_breaks(storage):
+    if getattr(storage, 'pool', None) is None:
+        pytest.skip("хранилище без пула соединений")
+    storage.add_tariff('sea', 30.0)
+    storage.pool.ping_interval = 0
+    connection = storage.pool.acquire()
+    storage.pool.release(connection)
+    connection.close()
+    assert storage.get_tariff_by_name('sea')[0] == 'sea'
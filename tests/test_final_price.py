@@ -0,0 +1,27 @@
+import random
+
+from tariffs import BaseTariff, to_kopecks
+
+# Цены и скидки, при которых итог попадает ровно на половину копейки
+BOUNDARY = [(0.01, 50), (0.03, 50), (0.05, 10), (1.05, 50), (2.5, 99.8), (10.01, 50),
+            (100.07, 50), (999.99, 0.05), (0.15, 10), (12.35, 10), (0.45, 10), (99999.99, 50)]
+
+
+def catalogue(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    rows = [(f"tariff-{i:05d}", rng.randrange(1, 10000000) / 100, rng.randrange(0, 10001) / 100)
+            for i in range(count)]
+    return rows + [(f"boundary-{i:02d}", price, discount) for i, (price, discount) in enumerate(BOUNDARY)]
+
+
+def test_stored_final_price_matches_base_tariff(storage):
+    rows = catalogue(2000)
+    assert storage.bulk_add_tariffs(rows) == []
+    stored = storage.find_in_price_range(0, float('inf'))
+    assert len(stored) == len(rows)
+    mismatches = [(name, base_price, discount, final_price)
+                  for name, base_price, discount, final_price in stored
+                  if to_kopecks(float(final_price)) !=
+                  BaseTariff(name, float(base_price), float(discount)).calculate_final_price_kopecks()]
+    assert mismatches == []
+
@@ -0,0 +1,54 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from shipping_company import ShippingCompany
+from tariffs import BaseTariff, TariffException
+
+
+def moment() -> datetime:
+    """Момент строго между соседними изменениями"""
+    time.sleep(0.01)
+    when = datetime.now()
+    time.sleep(0.01)
+    return when
+
+
+@pytest.fixture
+def company(storage):
+    return ShippingCompany(db=storage)
+
+
+def state(tariffs):
+    return [(tariff.get_name(), tariff.get_price(), tariff.get_discount()) for tariff in tariffs]
+
+
+def test_price_history_and_as_of(company):
+    before = moment()
+    company.add_tariff(BaseTariff('sea', 30.0))
+    added = moment()
+    company.set_tariff_discount('sea', 10)
+    company.set_tariff_discount('sea', 10)
+    assert [(price, discount) for _, price, discount in company.get_price_history('sea')] == \
+        [(30.0, 0.0), (30.0, 10.0)]
+    assert company.price_as_of('sea', added).get_discount() == 0
+    assert company.price_as_of('sea', datetime.now()).get_discount() == 10
+    with pytest.raises(TariffException):
+        company.price_as_of('sea', before)
+
+
+@pytest.mark.parametrize('checkpoint', [False, True])
+def test_catalogue_as_of(company, checkpoint):
+    company.bulk_add_tariffs([('sea', 30.0), ('air', 10.0)])
+    first = moment()
+    company.set_tariff_discount('sea', 50)
+    if checkpoint:
+        assert company.create_price_checkpoint() is not None
+    second = moment()
+    company.add_tariff(BaseTariff('road', 5.0))
+    company.set_tariff_discount('air', 20)
+    assert state(company.catalogue_as_of(first)) == [('air', 10.0, 0.0), ('sea', 30.0, 0.0)]
+    assert state(company.catalogue_as_of(second)) == [('air', 10.0, 0.0), ('sea', 30.0, 50.0)]
+    assert state(company.catalogue_as_of(datetime.now())) == \
+        [('road', 5.0, 0.0), ('air', 10.0, 20.0), ('sea', 30.0, 50.0)]
@@ -0,0 +1,75 @@
+import json
+import logging
+
+import pytest
+
+import metrics
+from memory_database import MemoryDatabase
+from metrics import Counter, Histogram, MetricsRegistry, REGISTRY
+
+
+@pytest.fixture
+def slow_query_log(caplog):
+    previous = metrics._slow_query_threshold
+    metrics.set_slow_query_threshold(0)
+    with caplog.at_level(logging.WARNING, logger=metrics.SLOW_QUERY_LOGGER):
+        yield caplog
+    metrics.set_slow_query_threshold(previous)
+
+
+def storage_metrics(method):
+    labels = {'storage': 'MemoryDatabase', 'method': method}
+    return (REGISTRY.histogram('shipping_storage_call_seconds', **labels).snapshot()['count'],
+            REGISTRY.counter('shipping_storage_rows_total', **labels).value)
+
+
+def test_counter_and_histogram_flush_buffered_values():
+    counter = Counter()
+    for _ in range(Counter.FLUSH_EVERY + 5):
+        counter.inc()
+    assert counter.value == Counter.FLUSH_EVERY + 5
+
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.snapshot() == {'buckets': {'0.1': 1, '1.0': 2, 'inf': 1}, 'sum': 6.05, 'count': 4}
+
+
+def test_registry_reuses_series_and_rejects_kind_change():
+    registry = MetricsRegistry()
+    assert registry.counter('calls', method='a') is registry.counter('calls', method='a')
+    assert registry.counter('calls', method='a') is not registry.counter('calls', method='b')
+    with pytest.raises(ValueError):
+        registry.histogram('calls')
+
+
+def test_prometheus_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.counter('calls', 'Вызовы', method='a').inc(3)
+    registry.histogram('latency', buckets=(0.1, 1.0)).observe(0.5)
+    text = registry.to_prometheus()
+    assert '# HELP calls Вызовы\n# TYPE calls counter\ncalls{method="a"} 3\n' in text
+    assert 'latency_bucket{le="0.1"} 0\nlatency_bucket{le="1.0"} 1\nlatency_bucket{le="+Inf"} 1\n' in text
+    assert 'latency_count 1\n' in text
+
+
+def test_storage_calls_are_instrumented():
+    db = MemoryDatabase()
+    db.bulk_add_tariffs([('sea', 30.0, 0), ('air', 10.0, 0)])
+    calls, rows = storage_metrics('get_all_tariffs')
+    db.get_all_tariffs()
+    assert storage_metrics('get_all_tariffs') == (calls + 1, rows + 2)
+
+
+def test_slow_calls_are_logged(slow_query_log):
+    MemoryDatabase().get_tariff_by_name('sea')
+    assert any('MemoryDatabase.get_tariff_by_name' in record.getMessage()
+               for record in slow_query_log.records)
+
+
+def test_session_dumps_metrics(tmp_path):
+    path = tmp_path / 'metrics.json'
+    with metrics.session(metrics_path=str(path)):
+        metrics.record_error('TestStorage', OSError())
+    errors = json.loads(path.read_text(encoding='utf-8'))['shipping_storage_errors_total']
+    assert {'storage': 'TestStorage', 'error': 'OSError'} in [series['labels'] for series in errors]
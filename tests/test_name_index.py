@@ -0,0 +1,61 @@
+import pytest
+
+import name_index
+from name_index import NameIndex, prefix_distance
+
+# Тысячи названий с одинаковым числом общих триграмм с запросом
+TIED = [f"tariff-{i:05d}" for i in range(20000)]
+
+
+def brute_force(names, text, limit, max_distance):
+    scored = sorted((prefix_distance(text.casefold(), name.casefold(), max_distance), name) for name in names)
+    return [pair for pair in scored if pair[0] <= max_distance][:limit]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(name_index, 'np', None)
+    return request.param
+
+
+@pytest.mark.parametrize('query', ['tarif-12345', 'tariff-1234', 'tarriff-00077', 'taiff-19999'])
+def test_fuzzy_finds_nearest_among_trigram_ties(backend, query):
+    index = NameIndex(TIED)
+    result = index.fuzzy(query, limit=3)
+    expected = brute_force(TIED, query, 3, 2)
+    assert [distance for distance, _ in result] == [distance for distance, _ in expected]
+    assert result[0][0] == expected[0][0] <= 1
+
+
+def test_fuzzy_matches_brute_force(backend):
+    names = [f"{city} {kind} {number}" for city in ('Москва', 'Омск', 'Томск', 'Тверь')
+             for kind in ('экспресс', 'эконом', 'авиа') for number in range(50)]
+    index = NameIndex(names)
+    for query in ('Омск экпресс 1', 'Тмск авиа 4', 'москва эконом 3', 'Тверь експрес'):
+        assert index.fuzzy(query, limit=10) == brute_force(names, query, 10, 2)
+
+
+def test_short_substring_finds_middle_of_name(backend):
+    index = NameIndex(['Морской экспресс', 'Авиа', 'Ж/д эконом'])
+    assert index.substring('ко') == ['Морской экспресс', 'Ж/д эконом']
+    assert index.substring('а') == ['Авиа']
+    assert index.substring('ко', limit=1) == ['Морской экспресс']
+
+
+def test_short_substring_matches_end_of_name_and_added_names(backend):
+    index = NameIndex(['Морской экспресс', 'Я', 'Авиа'])
+    index.add('Касса')
+    index.add('я')
+    assert index.substring('сс') == ['Морской экспресс', 'Касса']
+    assert index.substring('я') == ['Я', 'я']
+    assert index.substring('ъ') == []
+
+
+def test_short_substring_returns_first_names_in_order(backend):
+    names = [f"{kind}-{i}" for i in range(500) for kind in ('авиа', 'море')]
+    index = NameIndex(names)
+    assert index.substring('ре', limit=3) == ['море-0', 'море-1', 'море-2']
+    assert index.substring('9', limit=4) == ['авиа-9', 'море-9', 'авиа-19', 'море-19']
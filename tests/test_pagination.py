@@ -0,0 +1,49 @@
+import pytest
+
+from shipping_company import ShippingCompany
+
+# Равные цены проверяют, что курсор различает строки по id
+ROWS = [('sea-1', 30.0, 0), ('air-1', 10.0, 0), ('road-1', 20.0, 0), ('sea-2', 20.0, 5),
+        ('air-2', 20.0, 0), ('road-2', 40.0, 0), ('sea-3', 10.0, 0)]
+
+
+@pytest.fixture
+def company(storage):
+    storage.bulk_add_tariffs(ROWS)
+    return ShippingCompany(db=storage)
+
+
+def all_pages(company, page_size, **filters):
+    pages, cursor = [], None
+    while True:
+        tariffs, cursor = company.get_tariffs_page(page_size, cursor, **filters)
+        pages.append([tariff.get_name() for tariff in tariffs])
+        if cursor is None:
+            return pages
+
+
+def test_pages_follow_price_then_insertion_order(company):
+    assert all_pages(company, 2) == [['air-1', 'sea-3'], ['road-1', 'sea-2'],
+                                     ['air-2', 'sea-1'], ['road-2']]
+
+
+def test_full_last_page_is_followed_by_empty_page(company):
+    assert all_pages(company, 7) == [[tariff[0] for tariff in sorted(ROWS, key=lambda row: row[1])], []]
+
+
+def test_page_filters(company):
+    assert all_pages(company, 2, name_prefix='sea') == [['sea-3', 'sea-2'], ['sea-1']]
+    assert all_pages(company, 2, min_price=15, max_price=30) == [['road-1', 'sea-2'], ['air-2', 'sea-1'], []]
+
+
+def test_iter_tariffs_reads_page_by_page(company, monkeypatch):
+    monkeypatch.setattr(company.db, 'get_all_tariffs', lambda: pytest.fail("полная загрузка тарифов"))
+    tariffs = list(company.iter_tariffs(page_size=3))
+    assert [tariff.get_name() for tariff in tariffs] == ['air-1', 'sea-3', 'road-1', 'sea-2',
+                                                          'air-2', 'sea-1', 'road-2']
+    assert tariffs[3].calculate_final_price() == 19.0
+
+
+def test_tariff_table_matches_iteration(company):
+    table = company.get_tariff_table(page_size=2, name_prefix='air')
+    assert [tariff.get_name() for tariff in table] == ['air-1', 'air-2']
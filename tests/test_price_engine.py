@@ -0,0 +1,60 @@
+import pytest
+
+import price_engine
+from price_engine import (DiscountRule, PricePipeline, RoundingRule, StrategyRule, SurchargeRule,
+                          calculate_final_prices)
+from tariffs import BaseTariff, DiscountPriceStrategy, TariffException
+
+# Цены и скидки с итогом на половине копейки и с неточным двоичным частным
+ROWS = [(100.0, 0), (30.0, 10), (0.05, 10), (1.05, 50), (117.2775, 0), (554.8, 0), (12.35, 10),
+        (99999.99, 50), (2.5, 99.8)]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(price_engine, 'np', None)
+    return request.param
+
+
+def columns(rows):
+    return [price for price, _ in rows], [discount for _, discount in rows]
+
+
+def test_default_pipeline_applies_discounts(backend):
+    prices, discounts = columns(ROWS)
+    result = PricePipeline().calculate(prices, discounts)
+    assert list(result) == pytest.approx([price * (1 - discount / 100) for price, discount in ROWS])
+
+
+def test_rounding_matches_base_tariff(backend):
+    prices, discounts = columns(ROWS)
+    result = PricePipeline([DiscountRule(), RoundingRule()]).calculate(prices, discounts)
+    assert list(result) == [BaseTariff('t', price, discount).calculate_final_price()
+                            for price, discount in ROWS]
+
+
+def test_surcharge_and_coarse_rounding(backend):
+    pipeline = PricePipeline([SurchargeRule(percent=10, fixed=5), RoundingRule(step=0.5)])
+    assert list(pipeline.calculate([10.0, 20.0, 1.0])) == [16.0, 27.0, 6.0]
+
+
+def test_strategy_rule(backend):
+    pipeline = PricePipeline([StrategyRule(DiscountPriceStrategy(25))])
+    assert list(pipeline.calculate([100.0, 40.0])) == [75.0, 30.0]
+
+
+def test_calculate_final_prices_for_tariffs(backend):
+    tariffs = [BaseTariff('sea', 30.0, 10), BaseTariff('air', 10.0)]
+    assert list(calculate_final_prices(tariffs)) == [27.0, 10.0]
+
+
+def test_invalid_columns_are_rejected(backend):
+    with pytest.raises(TariffException):
+        PricePipeline().calculate([10.0, 20.0], [5.0])
+    with pytest.raises(TariffException):
+        PricePipeline().calculate([10.0], [150.0])
+    with pytest.raises(ValueError):
+        RoundingRule(step=0)
@@ -0,0 +1,72 @@
+import csv
+
+import pytest
+
+import quoting
+from memory_database import MemoryDatabase
+from quoting import DiscountTier, QuoteCalculator, quote_files
+from shipping_company import ShippingCompany
+
+
+@pytest.fixture
+def company():
+    db = MemoryDatabase()
+    db.bulk_add_tariffs([('A', 10.0, 0), ('B', 20.0, 50)])
+    return ShippingCompany(db=db)
+
+
+def run_quotes(company, tmp_path, *contents: bytes, workers: int = 1):
+    sources = []
+    for number, content in enumerate(contents):
+        sources.append(tmp_path / f'shipments-{number}.csv')
+        sources[-1].write_bytes(content)
+    output = tmp_path / 'quotes.csv'
+    report = quote_files(company, [str(source) for source in sources], str(output), workers=workers)
+    with open(output, encoding='utf-8', newline='') as file:
+        return report, list(csv.DictReader(file))
+
+
+def test_quotes_valid_rows(company, tmp_path):
+    report, rows = run_quotes(company, tmp_path, b'tariff,weight,distance\nA,10,200\nB,1,100\n')
+    assert (report.quoted, report.failed) == (2, 0)
+    assert [row['price'] for row in rows] == ['200.00', '10.00']
+
+
+def test_invalid_utf8_line_is_error_row(company, tmp_path):
+    report, rows = run_quotes(company, tmp_path, b'tariff,weight,distance\nA,\xff,100\nA,1,100\n')
+    assert (report.quoted, report.failed) == (1, 1)
+    assert rows[0]['price'] == '' and 'UTF-8' in rows[0]['error']
+    assert rows[1]['price'] == '10.00'
+
+
+@pytest.mark.parametrize('weight, distance', [('nan', '100'), ('inf', '100'), ('10', 'inf'), ('10', '-inf')])
+def test_non_finite_weight_or_distance_is_error_row(company, tmp_path, weight, distance):
+    report, rows = run_quotes(company, tmp_path, f'A,{weight},{distance}\n'.encode())
+    assert (report.quoted, report.failed) == (0, 1)
+    assert rows[0]['price'] == '' and 'конечными' in rows[0]['error']
+
+
+def test_volume_tiers():
+    calculator = QuoteCalculator([DiscountTier(100, 10), DiscountTier(0, 0)])
+    assert calculator.quote(10.0, 50, 100) == 500.0
+    assert calculator.quote(10.0, 100, 200) == 1800.0
+    with pytest.raises(ValueError):
+        calculator.quote(10.0, 0, 100)
+
+
+def test_unknown_tariff_is_error_row(company, tmp_path):
+    report, rows = run_quotes(company, tmp_path, b'C,1,100\n')
+    assert (report.quoted, report.failed) == (0, 1)
+    assert "'C'" in rows[0]['error']
+
+
+def test_shards_across_processes_keep_every_row_in_order(company, tmp_path, monkeypatch):
+    # Мелкие части делят файлы посреди строк
+    monkeypatch.setattr(quoting, 'MIN_SHARD_SIZE', 64)
+    first = b'tariff,weight,distance\n' + b''.join(f'A,{i},100\n'.encode() for i in range(1, 301))
+    second = b''.join(f'B,{i},100\r\n'.encode() for i in range(1, 101))
+    report, rows = run_quotes(company, tmp_path, first, second, workers=2)
+    assert (report.quoted, report.failed) == (400, 0)
+    assert [(row['tariff'], row['weight']) for row in rows] == \
+        [('A', str(i)) for i in range(1, 301)] + [('B', str(i)) for i in range(1, 101)]
+    assert rows[299]['price'] == '3000.00' and rows[-1]['price'] == '1000.00'
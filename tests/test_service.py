@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from memory_database import MemoryDatabase
+from service import TariffService
+from shipping_company import ShippingCompany
+
+
+@pytest.fixture
+def service():
+    db = MemoryDatabase()
+    db.bulk_add_tariffs([('sea', 30.0, 0), ('air', 10.0, 0)])
+    return TariffService(ShippingCompany(db=db))
+
+
+def request(service, method, target, body=b''):
+    return asyncio.run(service.dispatch(method, target, body))
+
+
+def raw_request(service, data: bytes) -> bytes:
+    async def exchange():
+        await service.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+            writer.write(data)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            await service.close()
+    return asyncio.run(exchange())
+
+
+def test_add_and_get_tariff(service):
+    status, payload = request(service, 'POST', '/tariffs', b'{"name": "road", "base_price": 20}')
+    assert status == 201 and payload['final_price'] == 20.0
+    assert request(service, 'GET', '/tariffs/road')[1]['name'] == 'road'
+
+
+@pytest.mark.parametrize('price', ['NaN', 'Infinity', '-Infinity'])
+def test_add_non_finite_price_is_bad_request(service, price):
+    body = f'{{"name": "road", "base_price": {price}}}'.encode()
+    assert request(service, 'POST', '/tariffs', body)[0] == 400
+    assert not service.company.has_tariff('road')
+
+
+def test_cheapest_name_is_reserved(service):
+    assert request(service, 'POST', '/tariffs', b'{"name": "cheapest", "base_price": 1}')[0] == 400
+    status, payload = request(service, 'GET', '/tariffs/cheapest?k=1')
+    assert status == 200 and [tariff['name'] for tariff in payload['tariffs']] == ['air']
+
+
+def test_negative_content_length_is_bad_request(service):
+    response = raw_request(service, b"POST /tariffs HTTP/1.1\r\nContent-Length: -1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 ")
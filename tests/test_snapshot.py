@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from shipping_company import ShippingCompany
+from snapshot import CatalogueSnapshot
+from tariffs import BaseTariff
+
+
+@pytest.fixture
+def snapshot_path(storage, tmp_path):
+    """Снимок хранилища с двумя тарифами, записанный при загрузке кэша"""
+    path = str(tmp_path / 'tariffs.snapshot')
+    storage.bulk_add_tariffs([('air', 10.0, 0), ('road', 20.0, 10)])
+    ShippingCompany(db=storage, snapshot_path=path).get_all_tariffs()
+    return path
+
+
+def catalogue(company):
+    return [(tariff.get_name(), tariff.get_price(), tariff.get_discount())
+            for tariff in company.get_all_tariffs()]
+
+
+def test_write_and_read_roundtrip(tmp_path):
+    path = str(tmp_path / 'tariffs.snapshot')
+    CatalogueSnapshot.write(path, 7, ['air', 'road'], [10.0, 20.0], [0.0, 10.0], [10.0, 18.0])
+    with CatalogueSnapshot(path) as snapshot:
+        assert snapshot.revision == 7
+        assert list(snapshot.rows()) == [('air', 10.0, 0.0, 10.0), ('road', 20.0, 10.0, 18.0)]
+
+
+def test_failed_write_removes_temporary_file(tmp_path):
+    path = str(tmp_path / 'tariffs.snapshot')
+    with pytest.raises(TypeError):
+        CatalogueSnapshot.write(path, 1, ['air'], ['not a price'], [0.0], [10.0])
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_open_reports_original_error(tmp_path):
+    path = str(tmp_path / 'missing' / 'tariffs.snapshot')
+    with pytest.raises(FileNotFoundError) as error:
+        CatalogueSnapshot.write(path, 1, ['air'], [10.0], [0.0], [10.0])
+    # Временный файл не создан, и удалять его нечего
+    assert error.value.__context__ is None
+
+
+def test_warm_start_applies_changes_after_snapshot(storage, snapshot_path, monkeypatch):
+    other = ShippingCompany(db=storage)
+    other.add_tariff(BaseTariff('sea', 5.0))
+    other.set_tariff_discount('air', 60)
+    monkeypatch.setattr(storage, 'get_all_tariffs', lambda: pytest.fail("полная загрузка тарифов"))
+    company = ShippingCompany(db=storage, snapshot_path=snapshot_path)
+    assert catalogue(company) == [('sea', 5.0, 0.0), ('air', 10.0, 60.0), ('road', 20.0, 10.0)]
+    assert [tariff.get_name() for tariff in company.find_cheapest(2)] == ['air', 'sea']
+
+
+def test_snapshot_newer_than_storage_is_ignored(storage, snapshot_path, tmp_path):
+    CatalogueSnapshot.write(snapshot_path, 10 ** 9, ['stale'], [1.0], [0.0], [1.0])
+    company = ShippingCompany(db=storage, snapshot_path=snapshot_path)
+    assert [name for name, _, _ in catalogue(company)] == ['air', 'road']
+
+
+def test_damaged_snapshot_falls_back_to_storage(storage, snapshot_path, capsys):
+    with open(snapshot_path, 'r+b') as file:
+        file.truncate(os.path.getsize(snapshot_path) - 1)
+    company = ShippingCompany(db=storage, snapshot_path=snapshot_path)
+    assert [name for name, _, _ in catalogue(company)] == ['air', 'road']
+    assert 'поврежден' in capsys.readouterr().out
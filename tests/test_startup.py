@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+from sqlite_database import SQLiteDatabase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Модули, которые нужны не каждому запуску и должны загружаться по требованию
+LAZY_MODULES = ('PyQt6', 'gui', 'numpy', 'price_engine', 'name_index', 'cProfile', 'pstats', 'logging')
+
+
+@pytest.mark.parametrize('entry_point', ['cli', 'main'])
+def test_entry_points_import_lazily(entry_point):
+    code = (f"import sys, {entry_point}; "
+            f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout.split()
+    assert loaded == []
+
+
+def test_sqlite_schema_is_created_once(tmp_path, monkeypatch):
+    path = str(tmp_path / 'tariffs.db')
+    SQLiteDatabase(path).close()
+    monkeypatch.setattr(SQLiteDatabase, 'create_tables', lambda self: pytest.fail("схема создается повторно"))
+    db = SQLiteDatabase(path)
+    assert db.schema_is_current()
+    db.close()
+
+
+def test_one_shot_commands_do_not_load_catalogue(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('SHIPPING_DB_BACKEND', 'sqlite')
+    monkeypatch.setenv('SHIPPING_DB_PATH', str(tmp_path / 'tariffs.db'))
+    monkeypatch.setattr(SQLiteDatabase, 'get_all_tariffs', lambda self: pytest.fail("загрузка всех тарифов"))
+    assert cli.main(['add', 'sea', '30']) == 0
+    assert cli.main(['add', 'air', '10']) == 0
+    assert cli.main(['discount', 'sea', '90']) == 0
+    assert cli.main(['cheapest', '-k', '1']) == 0
+    assert capsys.readouterr().out.splitlines()[-1].startswith('sea\t30.00\t90%\t3.00')
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from memory_database import MemoryDatabase
+from service import HttpError, TariffService
+from shipping_company import ShippingCompany
+from storage import TariffSelector
+from tariffs import BaseTariff, TariffException
+
+ROWS = [('sea', 30.0, 0), ('air', 10.0, 0), ('road', 20.0, 10)]
+
+
+@pytest.fixture
+def company(storage):
+    storage.bulk_add_tariffs(ROWS)
+    return ShippingCompany(db=storage)
+
+
+def test_point_lookups(storage):
+    storage.bulk_add_tariffs(ROWS)
+    name, base_price, discount = storage.get_tariff_by_name('road')
+    assert (name, float(base_price), float(discount)) == ('road', 20.0, 10.0)
+    assert storage.get_tariff_by_name('missing') is None
+    assert storage.tariff_exists('sea')
+    assert not storage.tariff_exists('missing')
+
+
+def test_add_duplicate_of_other_client_without_loading_cache(company, monkeypatch):
+    ShippingCompany(db=company.db).add_tariff(BaseTariff('rail', 15.0))
+    monkeypatch.setattr(company.db, 'get_all_tariffs', lambda: pytest.fail("полная загрузка тарифов"))
+    with pytest.raises(TariffException, match="уже существует"):
+        company.add_tariff(BaseTariff('rail', 25.0))
+    assert float(company.db.get_tariff_by_name('rail')[1]) == 15.0
+    with pytest.raises(TariffException, match="не найден"):
+        company.set_tariff_discount('missing', 10)
+
+
+@pytest.mark.parametrize('k', [0, -1])
+def test_storage_find_cheapest_non_positive_k_is_empty(storage, k):
+    storage.bulk_add_tariffs(ROWS)
+    assert storage.find_cheapest(k) == []
+
+
+@pytest.mark.parametrize('k', [0, -1])
+@pytest.mark.parametrize('warm_cache', [False, True])
+def test_company_find_cheapest_rejects_non_positive_k(company, k, warm_cache):
+    if warm_cache:
+        company.get_all_tariffs()
+    with pytest.raises(TariffException):
+        company.find_cheapest(k)
+
+
+@pytest.mark.parametrize('warm_cache', [False, True])
+def test_company_find_cheapest_same_on_cold_and_warm_cache(company, warm_cache):
+    if warm_cache:
+        company.get_all_tariffs()
+    assert [tariff.get_name() for tariff in company.find_cheapest(2)] == ['air', 'road']
+
+
+@pytest.mark.parametrize('warm_cache', [False, True])
+def test_company_price_ties_are_ordered_by_name_on_cold_and_warm_cache(storage, warm_cache):
+    # Добавлены в обратном порядке: по id равные цены шли бы иначе, чем по названию
+    storage.bulk_add_tariffs([('tie-d', 10.0, 0), ('tie-c', 20.0, 50), ('tie-b', 10.0, 0),
+                              ('tie-a', 12.5, 20), ('cheap', 5.0, 0), ('dear', 50.0, 0)])
+    company = ShippingCompany(db=storage)
+    if warm_cache:
+        company.get_all_tariffs()
+    assert [tariff.get_name() for tariff in company.find_cheapest(3)] == ['cheap', 'tie-a', 'tie-b']
+    assert [tariff.get_name() for tariff in company.find_cheapest(10)] == \
+        ['cheap', 'tie-a', 'tie-b', 'tie-c', 'tie-d', 'dear']
+    assert [tariff.get_name() for tariff in company.find_in_price_range(10, 10)] == \
+        ['tie-a', 'tie-b', 'tie-c', 'tie-d']
+
+
+@pytest.mark.parametrize('k', ['0', '-1'])
+def test_service_cheapest_rejects_non_positive_k(company, k):
+    service = TariffService(company)
+    with pytest.raises(HttpError) as error:
+        asyncio.run(service.cheapest({'k': k}))
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize('discount', [-1, 100.5])
+def test_set_discount_where_invalid_discount_is_error(storage, discount):
+    storage.bulk_add_tariffs(ROWS)
+    assert storage.set_discount_where(TariffSelector(names=['sea']), discount) is None
+    assert storage.get_tariff_by_name('sea')[2] == 0
+
+
+def test_set_discount_where_empty_selection_is_empty_list(storage):
+    storage.bulk_add_tariffs(ROWS)
+    assert storage.set_discount_where(TariffSelector(names=['missing']), 10) == []
+
+
+def test_set_discount_where_returns_previous_discounts(storage):
+    storage.bulk_add_tariffs(ROWS)
+    previous = storage.set_discount_where(TariffSelector(name_prefix='r'), 25)
+    assert [(name, float(discount)) for name, discount in previous] == [('road', 10.0)]
+    assert float(storage.get_tariff_by_name('road')[2]) == 25
+
+
+def test_bulk_add_reports_non_finite_rows(company):
+    result = company.bulk_add_tariffs([('nan-price', 'nan'), ('inf-price', 'inf'),
+                                       ('inf-discount', 10, 'inf'), ('rail', 15, 5)])
+    assert result.succeeded == 1
+    assert [row_number for row_number, _ in result.errors] == [1, 2, 3]
+    assert all('конечными' in message for _, message in result.errors)
+    company.invalidate_cache()
+    assert [tariff.get_name() for tariff in company.get_all_tariffs()] == ['air', 'rail', 'road', 'sea']
+
+
+def test_bulk_add_reports_duplicates_as_already_exists(storage):
+    storage.bulk_add_tariffs(ROWS)
+    assert storage.bulk_add_tariffs([('sea', 5.0, 0), ('rail', 15.0, 0)]) == [('sea', "already exists")]
+    assert storage.add_tariff('air', 5.0) is False
+    assert storage.get_tariff_by_name('rail') is not None
+
+
+def test_bulk_add_constraint_error_is_not_reported_as_duplicate(storage):
+    if isinstance(storage, MemoryDatabase):
+        pytest.skip("в памяти нет ограничения CHECK на скидку")
+    failed = storage.bulk_add_tariffs([('rail', 15.0, 0), ('ferry', 25.0, 150)])
+    assert [name for name, _ in failed] == ['rail', 'ferry']
+    assert all(message != "already exists" for _, message in failed)
+    assert storage.get_tariff_by_name('rail') is None
+
+
+def test_memory_insert_error_leaves_no_partial_row():
+    db = MemoryDatabase()
+    db.bulk_add_tariffs(ROWS)
+    changes = db.get_changes_since(0, 100)
+    with pytest.raises(ValueError):
+        db.bulk_add_tariffs([('rail', 15.0, float('nan'))])
+    assert db.get_tariff_by_name('rail') is None
+    assert [row[0] for row in db.find_cheapest(10)] == ['air', 'road', 'sea']
+    assert db.get_changes_since(0, 100) == changes
+
+
+def test_name_index_is_built_without_blocking_cache(company, monkeypatch):
+    import threading
+
+    import name_index
+
+    build = name_index.NameIndex.__init__
+    looked_up = []
+
+    def slow_build(index, names):
+        # Другой поток читает кэш, а этот добавляет тариф, пока индекс строится
+        reader = threading.Thread(target=lambda: looked_up.append(company.get_tariff('sea')))
+        reader.start()
+        reader.join(5)
+        company.add_tariff(BaseTariff('river', 40.0))
+        build(index, names)
+
+    monkeypatch.setattr(name_index.NameIndex, '__init__', slow_build)
+    assert company.search_tariffs('riv') == ['river']
+    assert [tariff.get_name() for tariff in looked_up] == ['sea']
+    assert company.has_name_index()
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+pytest.importorskip('PyQt6')
+
+from tariff_model import TariffTableModel
+from tariffs import BaseTariff
+
+
+def loaded_model(tariffs):
+    model = TariffTableModel()
+    model.append_page(sorted(tariffs, key=BaseTariff.get_price), None)
+    return model
+
+
+def rows(model):
+    return [(tariff.get_name(), tariff.get_price(), tariff.get_discount()) for tariff in model._tariffs]
+
+
+def test_upsert_keeps_rows_ordered_by_price():
+    model = loaded_model([BaseTariff(f"t{i}", 10 + i % 5) for i in range(20)])
+    model.upsert_tariff(BaseTariff('t3', 1))
+    model.upsert_tariff(BaseTariff('new', 12))
+    model.upsert_tariff(BaseTariff('t7', 12, 50))
+    prices = [price for _, price, _ in rows(model)]
+    assert prices == sorted(prices)
+    assert rows(model)[0] == ('t3', 1, 0)
+    assert ('t7', 12, 50) in rows(model)
+    assert len(model._tariffs) == 21
+
+
+def test_apply_changes_matches_rebuilt_table():
+    rng = random.Random(0)
+    tariffs = {f"t{i}": BaseTariff(f"t{i}", rng.randrange(1, 50)) for i in range(300)}
+    model = loaded_model(tariffs.values())
+    changes = []
+    for number in range(500):
+        name = f"t{rng.randrange(400)}"
+        changes.append(BaseTariff(name, rng.randrange(1, 50), rng.choice((0, 10))))
+        tariffs[name] = changes[-1]
+    model.apply_changes(changes)
+    assert sorted(rows(model)) == sorted((t.get_name(), t.get_price(), t.get_discount()) for t in tariffs.values())
+    prices = [price for _, price, _ in rows(model)]
+    assert prices == sorted(prices)
+
+
+def test_upsert_beyond_loaded_pages_is_skipped():
+    model = TariffTableModel()
+    model.append_page([BaseTariff('a', 1), BaseTariff('b', 2)], ('cursor',))
+    model.upsert_tariff(BaseTariff('c', 3))
+    assert [tariff.get_name() for tariff in model._tariffs] == ['a', 'b']
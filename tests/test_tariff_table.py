@@ -0,0 +1,55 @@
+import pytest
+
+from tariff_table import TariffTable
+from tariffs import BaseTariff, TariffException
+
+ROWS = [('sea', 30.0, 0.0), ('air', 10.0, 0.0), ('road', 20.0, 10.0)]
+
+
+@pytest.fixture
+def table():
+    return TariffTable.from_rows(ROWS)
+
+
+def test_views_read_columns(table):
+    assert len(table) == 3
+    assert [(view.get_name(), view.get_price(), view.get_discount()) for view in table] == ROWS
+    assert table[-1].calculate_final_price() == 18.0
+    with pytest.raises(IndexError):
+        table[3]
+
+
+def test_find_and_set_discount(table):
+    view = table.find('sea')
+    table.set_discount('sea', 50)
+    assert view.calculate_final_price() == 15.0
+    assert table.find('missing') is None
+    with pytest.raises(TariffException):
+        table.set_discount('missing', 10)
+    with pytest.raises(TariffException):
+        table.set_discount('sea', 150)
+
+
+def test_append_after_find_rejects_duplicate(table):
+    table.find('sea')
+    with pytest.raises(TariffException):
+        table.append('sea', 5.0)
+    table.append('rail', 5.0)
+    assert table.find('rail').get_price() == 5.0
+
+
+def test_final_prices_match_tariffs(table):
+    tariffs = [BaseTariff(*row) for row in ROWS]
+    assert list(TariffTable.from_tariffs(tariffs).final_prices()) == \
+        [tariff.calculate_final_price() for tariff in tariffs]
+
+
+def test_view_converts_to_independent_tariff(table):
+    tariff = table.find('road').to_tariff()
+    tariff.set_discount(0)
+    assert table.find('road').get_discount() == 10.0
+
+
+def test_tariffs_have_no_instance_dict():
+    assert not hasattr(BaseTariff('sea', 30.0), '__dict__')
+    assert not hasattr(TariffTable.from_rows(ROWS)[0], '__dict__')
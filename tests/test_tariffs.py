@@ -0,0 +1,18 @@
+import math
+
+import pytest
+
+from tariffs import BaseTariff, TariffException
+
+
+@pytest.mark.parametrize('price, discount', [
+    (math.inf, 0), (-math.inf, 0), (math.nan, 0), (100.0, math.nan), (100.0, math.inf)])
+def test_base_tariff_rejects_non_finite_values(price, discount):
+    with pytest.raises(TariffException):
+        BaseTariff('sea', price, discount)
+
+
+def test_final_price_is_exact_in_kopecks():
+    tariff = BaseTariff('sea', 0.05, 10)
+    assert tariff.calculate_final_price_kopecks() == 5
+    assert tariff.format_final_price() == '0.05'